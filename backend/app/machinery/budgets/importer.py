@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db import DatabaseError
+
+from .serializers import BudgetCreateSerializer
+from .services import BudgetService
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+
+@dataclass
+class ImportReport:
+    lineas: int = 0
+    importados: int = 0
+    con_error: int = 0
+    chunks: int = 0
+    segundos: float = 0.0
+    errores: List[Dict[str, Any]] = field(default_factory=list)
+    errores_truncados: bool = False
+
+    @property
+    def presupuestos_por_segundo(self) -> float:
+        return round(self.importados / self.segundos, 1) if self.segundos else 0.0
+
+    def add_error(self, linea: int, errores: Any) -> None:
+        self.con_error += 1
+        if len(self.errores) < MAX_REPORTED_ERRORS:
+            self.errores.append({"linea": linea, "errores": errores})
+        else:
+            self.errores_truncados = True
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "lineas": self.lineas,
+            "importados": self.importados,
+            "con_error": self.con_error,
+            "chunks": self.chunks,
+            "segundos": round(self.segundos, 3),
+            "presupuestos_por_segundo": self.presupuestos_por_segundo,
+            "errores": self.errores,
+            "errores_truncados": self.errores_truncados,
+        }
+
+
+def _duplicated_refs(payload: Dict[str, Any]) -> Optional[str]:
+    """
+    Las tablas hijas tienen constraints únicos (impuesto/logística por budget, accesorio
+    por item). Lo chequeamos antes para que un payload inválido no tire abajo el chunk.
+    """
+    def _dups(ids: Iterable[int]) -> List[int]:
+        seen, dups = set(), []
+        for i in ids:
+            if i in seen:
+                dups.append(i)
+            seen.add(i)
+        return dups
+
+    if d := _dups(tx["tax_id"] for tx in payload.get("impuestos") or []):
+        return f"Impuestos repetidos: {d}"
+    if d := _dups(lg["logistics_leg_id"] for lg in payload.get("logisticas") or []):
+        return f"Tramos logísticos repetidos: {d}"
+    for idx, it in enumerate(payload.get("items") or []):
+        if d := _dups(acc["accessory_id"] for acc in it.get("accesorios") or []):
+            return f"Accesorios repetidos en items[{idx}]: {d}"
+    return None
+
+
+class BudgetNdjsonImporter:
+    """
+    Import masivo de presupuestos desde NDJSON (un payload de create por línea).
+
+    - Lee línea por línea: en memoria solo vive el chunk actual.
+    - Valida cada línea con BudgetCreateSerializer y acumula errores por línea.
+    - Cada chunk se cotiza y se guarda en su propia transacción (BudgetService.import_chunk),
+      con bulk inserts en las cinco tablas del presupuesto.
+    """
+
+    def __init__(self, service: BudgetService, *, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        self.service = service
+        self.chunk_size = max(1, int(chunk_size))
+
+    def run(self, lines: Iterable[bytes | str]) -> ImportReport:
+        report = ImportReport()
+        started = time.perf_counter()
+
+        chunk: List[Tuple[int, Dict[str, Any]]] = []
+        for linea, raw in enumerate(lines, start=1):
+            report.lineas = linea
+            payload = self._parse_line(linea, raw, report)
+            if payload is None:
+                continue
+
+            chunk.append((linea, payload))
+            if len(chunk) >= self.chunk_size:
+                self._flush(chunk, report)
+                chunk = []
+
+        if chunk:
+            self._flush(chunk, report)
+
+        report.segundos = time.perf_counter() - started
+        return report
+
+    @staticmethod
+    def _parse_line(linea: int, raw: bytes | str, report: ImportReport) -> Optional[Dict[str, Any]]:
+        if isinstance(raw, bytes):
+            try:
+                raw = raw.decode("utf-8")
+            except UnicodeDecodeError:
+                report.add_error(linea, "La línea no es UTF-8 válido.")
+                return None
+
+        raw = raw.strip()
+        if not raw:
+            return None
+
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            report.add_error(linea, f"JSON inválido: {e}")
+            return None
+
+        ser = BudgetCreateSerializer(data=data)
+        if not ser.is_valid():
+            report.add_error(linea, ser.errors)
+            return None
+
+        dup = _duplicated_refs(ser.validated_data)
+        if dup:
+            report.add_error(linea, dup)
+            return None
+
+        return ser.validated_data
+
+    def _flush(self, chunk: List[Tuple[int, Dict[str, Any]]], report: ImportReport) -> None:
+        report.chunks += 1
+        try:
+            creados, errores = self.service.import_chunk(chunk)
+        except DatabaseError as e:
+            # el chunk entero se revierte: lo reportamos en cada línea
+            for linea, _ in chunk:
+                report.add_error(linea, f"Chunk {report.chunks} revertido: {e}")
+            return
+
+        report.importados += creados
+        for linea, error in errores:
+            report.add_error(linea, error)
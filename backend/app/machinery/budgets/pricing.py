@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from machinery.shared.errors import DomainError, ErrorCodes
+
+D = Decimal
+
+HASTA_ADUANA = "HASTA_ADUANA"
+
+
+def _d(v: Any) -> Decimal:
+    if v is None:
+        return D("0.00")
+    if isinstance(v, Decimal):
+        return v
+    return D(str(v))
+
+
+def _money(v: Decimal) -> Decimal:
+    return v.quantize(D("0.01"), rounding=ROUND_HALF_UP)
+
+
+# -------------------------
+# Catálogo (value objects)
+# -------------------------
+@dataclass(frozen=True)
+class MachinePrice:
+    id: int
+    nombre: str
+    total: Decimal
+
+
+@dataclass(frozen=True)
+class AccessoryPrice:
+    id: int
+    nombre: str
+    total: Decimal
+
+
+@dataclass(frozen=True)
+class LogisticsLegPrice:
+    id: int
+    desde: str
+    hasta: str
+    tipo: str
+    etapa: str
+    total: Decimal
+
+
+@dataclass(frozen=True)
+class TaxRate:
+    id: int
+    nombre: str
+    porcentaje: Decimal
+    monto_minimo: Optional[Decimal]
+
+
+@dataclass(frozen=True)
+class PriceCatalog:
+    """
+    Foto del catálogo necesaria para cotizar un payload.
+    `default_taxes` son los impuestos `siempre_incluir` (orden por nombre), que se
+    aplican cuando el payload no trae impuestos.
+    """
+    machines: Dict[int, MachinePrice]
+    accessories: Dict[int, AccessoryPrice]
+    legs: Dict[int, LogisticsLegPrice]
+    taxes: Dict[int, TaxRate]
+    default_taxes: List[TaxRate] = field(default_factory=list)
+
+    def with_overrides(self, overrides: List["CatalogOverride"]) -> "PriceCatalog":
+        """Copia del catálogo con los precios pisados aplicados."""
+        tables = {
+            "machine": dict(self.machines),
+            "accessory": dict(self.accessories),
+            "logistics_leg": dict(self.legs),
+            "tax": dict(self.taxes),
+        }
+        for ov in overrides:
+            table = tables[ov.kind]
+            table[ov.id] = replace(table[ov.id], **{ov.field: ov.value})
+
+        taxes = tables["tax"]
+        return PriceCatalog(
+            machines=tables["machine"],
+            accessories=tables["accessory"],
+            legs=tables["logistics_leg"],
+            taxes=taxes,
+            default_taxes=[taxes.get(t.id, t) for t in self.default_taxes],
+        )
+
+
+# -------------------------
+# Resultado
+# -------------------------
+@dataclass(frozen=True)
+class QuoteAccessory:
+    accessory: AccessoryPrice
+    cantidad: int
+    accessory_total: Decimal
+    subtotal: Decimal
+
+
+@dataclass(frozen=True)
+class QuoteItem:
+    machine: MachinePrice
+    cantidad: int
+    machine_total: Decimal
+    subtotal: Decimal
+    accesorios: List[QuoteAccessory]
+
+
+@dataclass(frozen=True)
+class QuoteLogistics:
+    leg: LogisticsLegPrice
+    total: Decimal
+
+
+@dataclass(frozen=True)
+class QuoteTax:
+    tax: TaxRate
+    incluido: bool
+    porcentaje: Decimal
+    monto_minimo: Optional[Decimal]
+    monto_aplicado: Decimal  # 0.00 si no está incluido
+
+
+@dataclass(frozen=True)
+class CatalogOverride:
+    """Precio del catálogo que el payload pisó (kind: machine/accessory/logistics_leg/tax)."""
+    kind: str
+    id: int
+    field: str
+    value: Decimal
+
+
+@dataclass(frozen=True)
+class Quote:
+    items: List[QuoteItem]
+    logisticas: List[QuoteLogistics]
+    impuestos: List[QuoteTax]
+
+    subtotal_maquinas: Decimal
+    subtotal_accesorios: Decimal
+    subtotal_logistica_hasta_aduana: Decimal
+    subtotal_logistica_post_aduana: Decimal
+    base_imponible: Decimal
+    total_impuestos: Decimal
+    costo_aduana: Decimal
+    total: Decimal
+
+    overrides: List[CatalogOverride]
+
+    def snapshot(self) -> Dict[str, Decimal]:
+        """Totales con los nombres de campo de `Budget`."""
+        return {
+            "subtotal_maquinas_snapshot": self.subtotal_maquinas,
+            "subtotal_accesorios_snapshot": self.subtotal_accesorios,
+            "subtotal_logistica_hasta_aduana_snapshot": self.subtotal_logistica_hasta_aduana,
+            "subtotal_logistica_post_aduana_snapshot": self.subtotal_logistica_post_aduana,
+            "base_imponible_snapshot": self.base_imponible,
+            "total_impuestos_snapshot": self.total_impuestos,
+            "costo_aduana_snapshot": self.costo_aduana,
+            "total_snapshot": self.total,
+        }
+
+
+class _CatalogPrices:
+    """
+    Precios vigentes durante el cálculo. Un override pisa el precio para las líneas
+    siguientes (mismo comportamiento que guardar el catálogo en el momento).
+    """
+
+    def __init__(self) -> None:
+        self._overrides: Dict[Tuple[str, int, str], Decimal] = {}
+
+    def get(self, kind: str, pk: int, name: str, default):
+        return self._overrides.get((kind, pk, name), default)
+
+    def set(self, kind: str, pk: int, name: str, value: Decimal) -> None:
+        self._overrides[(kind, pk, name)] = value
+
+    def as_list(self) -> List[CatalogOverride]:
+        return [CatalogOverride(kind=k, id=pk, field=f, value=v) for (k, pk, f), v in self._overrides.items()]
+
+
+def price_budget(payload: Mapping[str, Any], catalog: PriceCatalog) -> Quote:
+    """
+    Calcula todos los snapshots de un presupuesto. Puro: no toca la base.
+
+    Reglas:
+    - machine/accessory/logistics total: override del payload o precio de catálogo.
+    - base imponible = máquinas + accesorios + logística HASTA_ADUANA.
+    - impuesto = max(base * % , monto_minimo) (el mínimo solo si el catálogo lo define).
+    - costo aduana = logística HASTA_ADUANA + impuestos incluidos.
+    - total = base imponible + impuestos incluidos + logística POST_ADUANA.
+    """
+    items: List[Mapping[str, Any]] = payload.get("items") or []
+    if not items:
+        raise DomainError(
+            ErrorCodes.VALIDATION_ERROR,
+            message_override="Debe incluir al menos 1 máquina en el presupuesto.",
+        )
+
+    prices = _CatalogPrices()
+
+    subtotal_maquinas = D("0.00")
+    subtotal_accesorios = D("0.00")
+    quote_items: List[QuoteItem] = []
+
+    for it in items:
+        mb = catalog.machines[int(it["machine_base_id"])]
+        cantidad = int(it.get("cantidad") or 1)
+
+        cat_total = prices.get("machine", mb.id, "total", mb.total)
+        machine_total = _money(_d(it.get("machine_total") or cat_total))
+        if machine_total != _money(cat_total):
+            prices.set("machine", mb.id, "total", machine_total)
+
+        subtotal_maquina = _money(machine_total * cantidad)
+        subtotal_maquinas += subtotal_maquina
+
+        quote_accs: List[QuoteAccessory] = []
+        for acc in it.get("accesorios") or []:
+            a = catalog.accessories[int(acc["accessory_id"])]
+            acc_qty = int(acc.get("cantidad") or 1)
+
+            cat_acc_total = prices.get("accessory", a.id, "total", a.total)
+            acc_total = _money(_d(acc.get("accessory_total") or cat_acc_total))
+            if acc_total != _money(cat_acc_total):
+                prices.set("accessory", a.id, "total", acc_total)
+
+            acc_subtotal = _money(acc_total * acc_qty)
+            subtotal_accesorios += acc_subtotal
+            quote_accs.append(
+                QuoteAccessory(accessory=a, cantidad=acc_qty, accessory_total=acc_total, subtotal=acc_subtotal)
+            )
+
+        quote_items.append(
+            QuoteItem(
+                machine=mb,
+                cantidad=cantidad,
+                machine_total=machine_total,
+                subtotal=subtotal_maquina,
+                accesorios=quote_accs,
+            )
+        )
+
+    subtotal_log_hasta = D("0.00")
+    subtotal_log_post = D("0.00")
+    quote_legs: List[QuoteLogistics] = []
+
+    for lg in payload.get("logisticas") or []:
+        leg = catalog.legs[int(lg["logistics_leg_id"])]
+
+        cat_leg_total = prices.get("logistics_leg", leg.id, "total", leg.total)
+        leg_total = _money(_d(lg.get("total") or cat_leg_total))
+        if leg_total != _money(cat_leg_total):
+            prices.set("logistics_leg", leg.id, "total", leg_total)
+
+        quote_legs.append(QuoteLogistics(leg=leg, total=leg_total))
+
+        if leg.etapa == HASTA_ADUANA:
+            subtotal_log_hasta += leg_total
+        else:
+            subtotal_log_post += leg_total
+
+    base_imponible = _money(subtotal_maquinas + subtotal_accesorios + subtotal_log_hasta)
+
+    impuestos: List[Mapping[str, Any]] = payload.get("impuestos") or []
+    if not impuestos:
+        impuestos = [
+            {"tax_id": t.id, "incluido": True, "porcentaje": str(t.porcentaje)}
+            for t in catalog.default_taxes
+        ]
+
+    total_impuestos = D("0.00")
+    quote_taxes: List[QuoteTax] = []
+
+    for tx in impuestos:
+        tax = catalog.taxes[int(tx["tax_id"])]
+        incluido = bool(tx.get("incluido", True))
+
+        # % override
+        cat_pct = prices.get("tax", tax.id, "porcentaje", tax.porcentaje)
+        porcentaje = _d(tx.get("porcentaje") or cat_pct)
+
+        porc2 = porcentaje.quantize(D("0.01"), rounding=ROUND_HALF_UP)
+        if porc2 != cat_pct.quantize(D("0.01"), rounding=ROUND_HALF_UP):
+            prices.set("tax", tax.id, "porcentaje", porc2)
+
+        # ✅ mínimo override SOLO si el impuesto del catálogo tiene mínimo
+        # si el tax no tiene mínimo, ignoramos cualquier monto_minimo que venga
+        monto_minimo = None
+        cat_min = prices.get("tax", tax.id, "monto_minimo", tax.monto_minimo)
+        if cat_min is not None:
+            override = tx.get("monto_minimo", None)
+            monto_minimo = _money(_d(override)) if override is not None else _money(cat_min)
+
+            if override is not None and monto_minimo != _money(cat_min):
+                prices.set("tax", tax.id, "monto_minimo", monto_minimo)
+
+        monto_pct = _money(base_imponible * (porcentaje / D("100.00")))
+        monto_aplicado = monto_pct
+        if monto_minimo is not None:
+            monto_aplicado = _money(max(monto_pct, monto_minimo))
+
+        quote_taxes.append(
+            QuoteTax(
+                tax=tax,
+                incluido=incluido,
+                porcentaje=porcentaje,
+                monto_minimo=monto_minimo,
+                monto_aplicado=(monto_aplicado if incluido else D("0.00")),
+            )
+        )
+
+        if incluido:
+            total_impuestos += _money(monto_aplicado)
+
+    total_impuestos = _money(total_impuestos)
+
+    return Quote(
+        items=quote_items,
+        logisticas=quote_legs,
+        impuestos=quote_taxes,
+        subtotal_maquinas=_money(subtotal_maquinas),
+        subtotal_accesorios=_money(subtotal_accesorios),
+        subtotal_logistica_hasta_aduana=_money(subtotal_log_hasta),
+        subtotal_logistica_post_aduana=_money(subtotal_log_post),
+        base_imponible=base_imponible,
+        total_impuestos=total_impuestos,
+        costo_aduana=_money(subtotal_log_hasta + total_impuestos),
+        total=_money(base_imponible + total_impuestos + subtotal_log_post),
+        overrides=prices.as_list(),
+    )
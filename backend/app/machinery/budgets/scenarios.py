@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from decimal import Decimal
+from itertools import product
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .pricing import HASTA_ADUANA, PriceCatalog, TaxRate, _d, _money, price_budget
+
+ORDER_FIELDS = ("total", "costo_aduana")
+
+
+def _cents(v: Decimal) -> int:
+    """Decimal ya redondeado a 2 decimales -> centavos (int exacto)."""
+    return int(_money(v) * 100)
+
+
+def _basis_points(porcentaje: Decimal) -> int:
+    """% con 2 decimales -> centésimos de % (21.50 -> 2150)."""
+    bp = _d(porcentaje) * 100
+    if bp != bp.to_integral_value():
+        raise ValueError(f"Porcentaje con más de 2 decimales: {porcentaje}")
+    return int(bp)
+
+
+def cents_to_str(cents: int) -> str:
+    return f"{cents // 100}.{cents % 100:02d}"
+
+
+@dataclass(frozen=True)
+class ScenarioGrid:
+    """
+    Variaciones sobre un payload base (producto cartesiano de todas):
+    - cantidades: índice de item -> cantidades a probar
+    - rutas: alternativas para `logisticas` (mismo formato que el payload); vacío = la del base
+    - impuestos_opcionales: tax ids que se prueban incluidos y no incluidos
+    """
+    cantidades: Dict[int, List[int]] = field(default_factory=dict)
+    rutas: List[List[Mapping[str, Any]]] = field(default_factory=list)
+    impuestos_opcionales: List[int] = field(default_factory=list)
+
+    def size(self) -> int:
+        n = 1
+        for valores in self.cantidades.values():
+            n *= len(valores)
+        return n * max(1, len(self.rutas)) * (2 ** len(self.impuestos_opcionales))
+
+
+@dataclass(frozen=True)
+class ScenarioRow:
+    cantidades: Tuple[int, ...]
+    ruta: Optional[int]
+    logistics_leg_ids: Tuple[int, ...]
+    tax_ids: Tuple[int, ...]  # impuestos incluidos
+
+    # montos en centavos
+    base_imponible: int
+    total_impuestos: int
+    costo_aduana: int
+    total: int
+
+
+@dataclass(frozen=True)
+class ScenarioResult:
+    variantes: int
+    filas: List[ScenarioRow]
+
+
+def price_scenarios(
+    payload: Mapping[str, Any],
+    grid: ScenarioGrid,
+    catalog: PriceCatalog,
+    *,
+    ordenar_por: str = "total",
+    limite: Optional[int] = None,
+) -> ScenarioResult:
+    """
+    Evalúa todas las variantes del grid en una sola pasada por columnas, con montos
+    en centavos enteros. Reproduce exactamente `price_budget`:
+    - subtotales exactos (precio con 2 decimales * cantidad entera)
+    - impuesto = ROUND_HALF_UP(base * % / 100), luego max(pct, monto_minimo)
+    Los precios (con sus overrides) salen de cotizar el payload base.
+    """
+    if ordenar_por not in ORDER_FIELDS:
+        raise ValueError(f"ordenar_por inválido: {ordenar_por}")
+
+    base = price_budget(payload, catalog)
+
+    # --- Ejes del producto cartesiano
+    qty_axes: List[Sequence[int]] = [
+        grid.cantidades.get(i) or [qi.cantidad] for i, qi in enumerate(base.items)
+    ]
+
+    # rutas: (ids, hasta_aduana, post_aduana) en centavos
+    routes: List[Tuple[Tuple[int, ...], int, int]] = []
+    if grid.rutas:
+        for ruta in grid.rutas:
+            ids, hasta, post = [], 0, 0
+            for lg in ruta:
+                leg = catalog.legs[int(lg["logistics_leg_id"])]
+                total = _cents(_d(lg.get("total") or leg.total))
+                ids.append(leg.id)
+                if leg.etapa == HASTA_ADUANA:
+                    hasta += total
+                else:
+                    post += total
+            routes.append((tuple(ids), hasta, post))
+    else:
+        routes.append((
+            tuple(ql.leg.id for ql in base.logisticas),
+            _cents(base.subtotal_logistica_hasta_aduana),
+            _cents(base.subtotal_logistica_post_aduana),
+        ))
+
+    # impuestos: (tax_id, bp, minimo_cents | None, incluido fijo | None si es opcional)
+    opcionales = [int(t) for t in grid.impuestos_opcionales]
+    taxes: List[Tuple[int, int, Optional[int], Optional[bool]]] = []
+    for qt in base.impuestos:
+        fijo = None if qt.tax.id in opcionales else qt.incluido
+        minimo = _cents(qt.monto_minimo) if qt.monto_minimo is not None else None
+        taxes.append((qt.tax.id, _basis_points(qt.porcentaje), minimo, fijo))
+    en_base = {qt.tax.id for qt in base.impuestos}
+    for tax_id in opcionales:
+        if tax_id not in en_base:
+            t: TaxRate = catalog.taxes[tax_id]
+            minimo = _cents(t.monto_minimo) if t.monto_minimo is not None else None
+            taxes.append((t.id, _basis_points(t.porcentaje), minimo, None))
+
+    tax_axes = [[False, True] if fijo is None else [fijo] for _, _, _, fijo in taxes]
+
+    combos = list(product(*qty_axes, range(len(routes)), *tax_axes))
+    n = len(combos)
+    columns = list(zip(*combos)) if combos else []
+    n_items = len(qty_axes)
+    qty_cols = columns[:n_items]
+    route_col = columns[n_items]
+    incl_cols = columns[n_items + 1:]
+
+    # --- Evaluación por columnas
+    subtotal_acc = _cents(base.subtotal_accesorios)
+    maquinas = [0] * n
+    for qi, col in zip(base.items, qty_cols):
+        precio = _cents(qi.machine_total)
+        maquinas = [m + precio * q for m, q in zip(maquinas, col)]
+
+    hasta_col = [routes[r][1] for r in route_col]
+    post_col = [routes[r][2] for r in route_col]
+    base_col = [m + subtotal_acc + h for m, h in zip(maquinas, hasta_col)]
+
+    impuestos_col = [0] * n
+    for (_, bp, minimo, _), incl in zip(taxes, incl_cols):
+        # ROUND_HALF_UP(b * bp / 10000) sobre enteros no negativos
+        monto = [(2 * b * bp + 10000) // 20000 for b in base_col]
+        if minimo is not None:
+            monto = [max(x, minimo) for x in monto]
+        impuestos_col = [acc + (x if on else 0) for acc, x, on in zip(impuestos_col, monto, incl)]
+
+    aduana_col = [h + ti for h, ti in zip(hasta_col, impuestos_col)]
+    total_col = [b + ti + p for b, ti, p in zip(base_col, impuestos_col, post_col)]
+
+    # --- Ranking
+    key_col = total_col if ordenar_por == "total" else aduana_col
+    order = sorted(range(n), key=lambda k: (key_col[k], total_col[k], k))
+    if limite is not None:
+        order = order[:limite]
+
+    filas = [
+        ScenarioRow(
+            cantidades=tuple(col[k] for col in qty_cols),
+            ruta=(route_col[k] if grid.rutas else None),
+            logistics_leg_ids=routes[route_col[k]][0],
+            tax_ids=tuple(t[0] for t, incl in zip(taxes, incl_cols) if incl[k]),
+            base_imponible=base_col[k],
+            total_impuestos=impuestos_col[k],
+            costo_aduana=aduana_col[k],
+            total=total_col[k],
+        )
+        for k in order
+    ]
+    return ScenarioResult(variantes=n, filas=filas)
@@ -10,6 +10,13 @@ from machinery.models import (
     BudgetSelectedLogisticsLeg,
 )
 
+from machinery.shared.fieldsets import SparseFieldsetSerializerMixin
+
+from .scenarios import cents_to_str
+
+# Tope de presupuestos por compra en lote
+MAX_PURCHASE_BATCH = 500
+
 
 class BudgetItemAccessoryInSerializer(serializers.Serializer):
     accessory_id = serializers.IntegerField()
@@ -37,14 +44,52 @@ class BudgetLogisticsInSerializer(serializers.Serializer):
 
 class BudgetCreateSerializer(serializers.Serializer):
     fecha = serializers.DateField(required=False)
-    items = BudgetItemInSerializer(many=True)
+    items = BudgetItemInSerializer(many=True, allow_empty=False)
     impuestos = BudgetTaxInSerializer(many=True, required=False)
     logisticas = BudgetLogisticsInSerializer(many=True, required=False)
 
 
+class ScenarioQtyInSerializer(serializers.Serializer):
+    item = serializers.IntegerField(min_value=0)  # índice en base.items
+    valores = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+
+class BudgetScenariosSerializer(serializers.Serializer):
+    base = BudgetCreateSerializer()
+    cantidades = ScenarioQtyInSerializer(many=True, required=False)
+    rutas = serializers.ListField(child=BudgetLogisticsInSerializer(many=True), required=False)
+    impuestos_opcionales = serializers.ListField(child=serializers.IntegerField(), required=False)
+    ordenar_por = serializers.ChoiceField(choices=["total", "costo_aduana"], default="total")
+    limite = serializers.IntegerField(min_value=1, required=False)
+
+
+class BudgetPurchaseBatchItemSerializer(serializers.Serializer):
+    budget_id = serializers.IntegerField(min_value=1)
+    fecha_compra = serializers.DateField(required=False, allow_null=True)
+    notas = serializers.CharField(required=False, allow_blank=True)
+
+
+class BudgetPurchaseBatchSerializer(serializers.Serializer):
+    compras = BudgetPurchaseBatchItemSerializer(many=True, allow_empty=False)
+    # defaults para las compras que no traen los suyos
+    fecha_compra = serializers.DateField(required=False, allow_null=True)
+    notas = serializers.CharField(required=False, allow_blank=True, default="")
+
+    def validate_compras(self, value):
+        if len(value) > MAX_PURCHASE_BATCH:
+            raise serializers.ValidationError(f"Máximo {MAX_PURCHASE_BATCH} presupuestos por lote.")
+        return value
+
+
 # -------------------------
 # Output serializers
 # -------------------------
+def _logistics_sort_key(leg):
+    # HASTA_ADUANA primero, luego POST_ADUANA; dentro orden por desde/hasta/tipo
+    etapa_rank = 0 if str(leg.etapa) == "HASTA_ADUANA" else 1
+    return (etapa_rank, (leg.desde or ""), (leg.hasta or ""), (leg.tipo or ""))
+
+
 class BudgetItemAccessoryOutSerializer(serializers.ModelSerializer):
     accessory_nombre = serializers.CharField(source="accessory.nombre", read_only=True)
 
@@ -77,8 +122,8 @@ class BudgetItemOutSerializer(serializers.ModelSerializer):
         ]
 
     def get_accesorios(self, obj):
-        qs = obj.accesorios.select_related("accessory").order_by("accessory__nombre", "id")
-        return BudgetItemAccessoryOutSerializer(qs, many=True).data
+        # orden por nombre: viene del Prefetch de BudgetService.list_qs
+        return BudgetItemAccessoryOutSerializer(obj.accesorios.all(), many=True).data
 
 
 class BudgetTaxOutSerializer(serializers.ModelSerializer):
@@ -100,7 +145,7 @@ class BudgetLogisticsOutSerializer(serializers.ModelSerializer):
         fields = ["id", "logistics_leg", "desde", "hasta", "tipo", "etapa", "total_snapshot"]
 
 
-class BudgetListSerializer(serializers.ModelSerializer):
+class BudgetListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     compra_id = serializers.SerializerMethodField()
     tiene_compra = serializers.SerializerMethodField()
     machine_bases = serializers.SerializerMethodField()
@@ -131,13 +176,14 @@ class BudgetListSerializer(serializers.ModelSerializer):
         return bool(hasattr(obj, "compra") and obj.compra)
 
     def get_machine_bases(self, obj):
-        # nombres únicos, en orden alfabético
-        qs = obj.items.select_related("machine_base").all()
-        nombres = sorted({it.machine_base.nombre for it in qs})
+        # nombres únicos, en orden alfabético (items prefetcheados con su máquina)
+        nombres = sorted({it.machine_base.nombre for it in obj.items.all()})
         return nombres
 
 
-class BudgetDetailSerializer(serializers.ModelSerializer):
+class BudgetDetailSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """Espera un Budget de BudgetService.list_qs()/get() (lee los Prefetch ordenados)."""
+
     items = serializers.SerializerMethodField()
     impuestos = serializers.SerializerMethodField()
     logisticas = serializers.SerializerMethodField()
@@ -165,30 +211,126 @@ class BudgetDetailSerializer(serializers.ModelSerializer):
         ]
 
     def get_items(self, obj):
-        # ✅ máquinas ordenadas alfabéticamente
-        qs = obj.items.select_related("machine_base").order_by("machine_base__nombre", "id")
-        return BudgetItemOutSerializer(qs, many=True).data
+        # ✅ máquinas ordenadas alfabéticamente (orden del Prefetch)
+        return BudgetItemOutSerializer(obj.items.all(), many=True).data
 
     def get_impuestos(self, obj):
         # ✅ solo los impuestos efectivamente incluidos + orden alfabético
-        qs = obj.impuestos.select_related("tax").filter(incluido=True).order_by("tax__nombre", "id")
-        return BudgetTaxOutSerializer(qs, many=True).data
+        # (Prefetch filtrado de BudgetService.list_qs)
+        return BudgetTaxOutSerializer(obj.impuestos_incluidos, many=True).data
 
     def get_logisticas(self, obj):
         # ✅ HASTA_ADUANA primero, luego POST_ADUANA
         # y dentro orden por desde/hasta/tipo
-        qs = obj.logisticas.select_related("logistics_leg").all()
-
-        def sort_key(x):
-            etapa = x.logistics_leg.etapa
-            etapa_rank = 0 if str(etapa) == "HASTA_ADUANA" else 1
-            return (
-                etapa_rank,
-                (x.logistics_leg.desde or ""),
-                (x.logistics_leg.hasta or ""),
-                (x.logistics_leg.tipo or ""),
-                x.id,
-            )
-
-        items = sorted(list(qs), key=sort_key)
+        items = sorted(obj.logisticas.all(), key=lambda x: (*_logistics_sort_key(x.logistics_leg), x.id))
         return BudgetLogisticsOutSerializer(items, many=True).data
+
+
+# -------------------------
+# Quote (cotización sin persistir)
+# -------------------------
+class QuoteAccessoryOutSerializer(serializers.Serializer):
+    accessory = serializers.IntegerField(source="accessory.id")
+    accessory_nombre = serializers.CharField(source="accessory.nombre")
+    cantidad = serializers.IntegerField()
+    accessory_total_snapshot = serializers.DecimalField(max_digits=12, decimal_places=2, source="accessory_total")
+    subtotal_snapshot = serializers.DecimalField(max_digits=14, decimal_places=2, source="subtotal")
+
+
+class QuoteItemOutSerializer(serializers.Serializer):
+    machine_base = serializers.IntegerField(source="machine.id")
+    machine_nombre = serializers.CharField(source="machine.nombre")
+    cantidad = serializers.IntegerField()
+    machine_total_snapshot = serializers.DecimalField(max_digits=12, decimal_places=2, source="machine_total")
+    subtotal_maquina_snapshot = serializers.DecimalField(max_digits=14, decimal_places=2, source="subtotal")
+    accesorios = serializers.SerializerMethodField()
+
+    def get_accesorios(self, obj):
+        accs = sorted(obj.accesorios, key=lambda a: a.accessory.nombre)
+        return QuoteAccessoryOutSerializer(accs, many=True).data
+
+
+class QuoteTaxOutSerializer(serializers.Serializer):
+    tax = serializers.IntegerField(source="tax.id")
+    tax_nombre = serializers.CharField(source="tax.nombre")
+    porcentaje_snapshot = serializers.DecimalField(max_digits=6, decimal_places=2, source="porcentaje")
+    monto_minimo_snapshot = serializers.DecimalField(
+        max_digits=14, decimal_places=2, source="monto_minimo", allow_null=True
+    )
+    monto_aplicado_snapshot = serializers.DecimalField(max_digits=14, decimal_places=2, source="monto_aplicado")
+
+
+class QuoteLogisticsOutSerializer(serializers.Serializer):
+    logistics_leg = serializers.IntegerField(source="leg.id")
+    desde = serializers.CharField(source="leg.desde")
+    hasta = serializers.CharField(source="leg.hasta")
+    tipo = serializers.CharField(source="leg.tipo")
+    etapa = serializers.CharField(source="leg.etapa")
+    total_snapshot = serializers.DecimalField(max_digits=12, decimal_places=2, source="total")
+
+
+class BudgetQuoteSerializer(serializers.Serializer):
+    """
+    Misma forma (y mismo orden de líneas) que BudgetDetailSerializer, pero a partir
+    de un `pricing.Quote` en memoria.
+    """
+    subtotal_maquinas_snapshot = serializers.DecimalField(max_digits=14, decimal_places=2, source="subtotal_maquinas")
+    subtotal_accesorios_snapshot = serializers.DecimalField(
+        max_digits=14, decimal_places=2, source="subtotal_accesorios"
+    )
+    subtotal_logistica_hasta_aduana_snapshot = serializers.DecimalField(
+        max_digits=14, decimal_places=2, source="subtotal_logistica_hasta_aduana"
+    )
+    subtotal_logistica_post_aduana_snapshot = serializers.DecimalField(
+        max_digits=14, decimal_places=2, source="subtotal_logistica_post_aduana"
+    )
+    base_imponible_snapshot = serializers.DecimalField(max_digits=14, decimal_places=2, source="base_imponible")
+    total_impuestos_snapshot = serializers.DecimalField(max_digits=14, decimal_places=2, source="total_impuestos")
+    costo_aduana_snapshot = serializers.DecimalField(max_digits=14, decimal_places=2, source="costo_aduana")
+    total_snapshot = serializers.DecimalField(max_digits=14, decimal_places=2, source="total")
+    items = serializers.SerializerMethodField()
+    impuestos = serializers.SerializerMethodField()
+    logisticas = serializers.SerializerMethodField()
+
+    def get_items(self, obj):
+        items = sorted(obj.items, key=lambda it: it.machine.nombre)
+        return QuoteItemOutSerializer(items, many=True).data
+
+    def get_impuestos(self, obj):
+        taxes = sorted((t for t in obj.impuestos if t.incluido), key=lambda t: t.tax.nombre)
+        return QuoteTaxOutSerializer(taxes, many=True).data
+
+    def get_logisticas(self, obj):
+        legs = sorted(obj.logisticas, key=lambda x: _logistics_sort_key(x.leg))
+        return QuoteLogisticsOutSerializer(legs, many=True).data
+
+
+class CentsField(serializers.Field):
+    """Monto en centavos (int) -> string con 2 decimales, igual que los DecimalField."""
+
+    def to_representation(self, value):
+        return cents_to_str(value)
+
+
+class ScenarioRowOutSerializer(serializers.Serializer):
+    cantidades = serializers.ListField(child=serializers.IntegerField())
+    ruta = serializers.IntegerField(allow_null=True)
+    logisticas = serializers.ListField(child=serializers.IntegerField(), source="logistics_leg_ids")
+    impuestos = serializers.ListField(child=serializers.IntegerField(), source="tax_ids")
+    base_imponible = CentsField()
+    total_impuestos = CentsField()
+    costo_aduana = CentsField()
+    total = CentsField()
+
+
+class BudgetPurchaseBatchResultSerializer(serializers.Serializer):
+    budget_id = serializers.IntegerField()
+    numero = serializers.CharField()
+    purchase_id = serializers.IntegerField()
+    fecha_compra = serializers.DateField()
+    unidades = serializers.IntegerField()
+
+
+class BudgetScenariosOutSerializer(serializers.Serializer):
+    variantes = serializers.IntegerField()
+    resultados = ScenarioRowOutSerializer(many=True, source="filas")
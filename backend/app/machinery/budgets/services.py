@@ -1,11 +1,12 @@
 from __future__ import annotations
 from uuid import uuid4
+from collections import defaultdict
 from dataclasses import dataclass
 from datetime import date
-from decimal import Decimal, ROUND_HALF_UP
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from django.db import transaction
+from django.db.models import Prefetch
 from django.db.models.deletion import ProtectedError
 from django.utils import timezone
 
@@ -16,55 +17,146 @@ from machinery.models import (
     BudgetTaxApplied,
     BudgetSelectedLogisticsLeg,
     BudgetStatus,
+    Purchase,
     MachineBase,
     Accessory,
     Tax,
     LogisticsLeg,
-    LogisticsStage,
 )
 
+from .pricing import (
+    AccessoryPrice,
+    CatalogOverride,
+    LogisticsLegPrice,
+    MachinePrice,
+    PriceCatalog,
+    Quote,
+    TaxRate,
+    price_budget,
+)
 from .repositories import BudgetRepository
+from .scenarios import ScenarioGrid, ScenarioResult, price_scenarios
 from ..shared.errors import DomainError, ErrorCodes
 from machinery.purchases.services import PurchaseService  # ✅ usamos el service real
+from machinery.reports.cache import bump_data_version
 
-D = Decimal
 
+def _gen_numero() -> str:
+    now = timezone.now()
+    return f"PRESU-{now:%Y%m%d-%H%M%S-%f}-{uuid4().hex[:6].upper()}"
 
-def _d(v: Any) -> Decimal:
-    if v is None:
-        return D("0.00")
-    if isinstance(v, Decimal):
-        return v
-    return D(str(v))
 
+# Tope de combinaciones por request de escenarios (what-if)
+MAX_SCENARIOS = 5000
 
-def _money(v: Decimal) -> Decimal:
-    return v.quantize(D("0.01"), rounding=ROUND_HALF_UP)
+_SNAPSHOT_FIELDS = [
+    "subtotal_maquinas_snapshot",
+    "subtotal_accesorios_snapshot",
+    "subtotal_logistica_hasta_aduana_snapshot",
+    "subtotal_logistica_post_aduana_snapshot",
+    "base_imponible_snapshot",
+    "total_impuestos_snapshot",
+    "costo_aduana_snapshot",
+    "total_snapshot",
+]
 
+# Campos que se comparan al actualizar incrementalmente cada tabla hija
+_ITEM_FIELDS = ["cantidad", "machine_total_snapshot", "subtotal_maquina_snapshot"]
+_ACCESSORY_FIELDS = ["cantidad", "accessory_total_snapshot", "subtotal_snapshot"]
+_LOGISTICS_FIELDS = ["total_snapshot"]
+_TAX_FIELDS = ["incluido", "porcentaje_snapshot", "monto_minimo_snapshot", "monto_aplicado_snapshot"]
 
-def _gen_numero() -> str:
-    now = timezone.now()
-    return f"PRESU-{now:%Y%m%d-%H%M%S-%f}-{uuid4().hex[:6].upper()}"
+
+@dataclass
+class _BudgetRows:
+    """
+    Filas hijas (sin guardar) de un presupuesto cotizado.
+    `accesorios` es paralelo a `items` (accesorios[i] son los del items[i]).
+    """
+    quote: Quote
+    items: List[BudgetItem]
+    accesorios: List[List[BudgetItemAccessory]]
+    logisticas: List[BudgetSelectedLogisticsLeg]
+    impuestos: List[BudgetTaxApplied]
+
+
+# kind de CatalogOverride -> modelo del catálogo
+_CATALOG_MODELS = {
+    "machine": MachineBase,
+    "accessory": Accessory,
+    "logistics_leg": LogisticsLeg,
+    "tax": Tax,
+}
+
+
+def _copy_if_changed(current, new, fields: List[str], *, now) -> bool:
+    """Copia `fields` de new -> current. Devuelve True si algo cambió."""
+    changed = False
+    for f in fields:
+        value = getattr(new, f)
+        if getattr(current, f) != value:
+            setattr(current, f, value)
+            changed = True
+    if changed:
+        current.updated_at = now
+    return changed
+
+
+def _diff_keyed(current: Dict[Any, Any], new_rows: List[Any], *, key: str, fields: List[str], now):
+    """
+    Diff de filas únicas por `key` (p.ej. tax_id). Devuelve (insertar, actualizar, borrar).
+    Consume `current`: lo que queda sin emparejar se borra.
+    """
+    to_insert, to_update = [], []
+    for row in new_rows:
+        cur = current.pop(getattr(row, key), None)
+        if cur is None:
+            to_insert.append(row)
+        elif _copy_if_changed(cur, row, fields, now=now):
+            to_update.append(cur)
+    return to_insert, to_update, list(current.values())
 
 
 @dataclass
 class BudgetService:
     repo: BudgetRepository
 
-    def list_qs(self):
-        return (
-            self.repo.list_qs()
-            .prefetch_related(
+    @staticmethod
+    def prefetches() -> Dict[str, Prefetch]:
+        """
+        Prefetch ordenados: los serializers leen todo de acá (sin queries por fila).
+        - items por nombre de máquina, accesorios por nombre
+        - impuestos: solo los incluidos, por nombre (en `impuestos_incluidos`)
+        """
+        return {
+            "items": Prefetch(
                 "items",
-                "items__machine_base",
+                queryset=BudgetItem.objects.select_related("machine_base").order_by("machine_base__nombre", "id"),
+            ),
+            "items__accesorios": Prefetch(
                 "items__accesorios",
-                "items__accesorios__accessory",
+                queryset=BudgetItemAccessory.objects.select_related("accessory").order_by("accessory__nombre", "id"),
+            ),
+            "impuestos": Prefetch(
                 "impuestos",
-                "impuestos__tax",
+                queryset=BudgetTaxApplied.objects.select_related("tax").filter(incluido=True).order_by("tax__nombre", "id"),
+                to_attr="impuestos_incluidos",
+            ),
+            "logisticas": Prefetch(
                 "logisticas",
-                "logisticas__logistics_leg",
-            )
-        )
+                queryset=BudgetSelectedLogisticsLeg.objects.select_related("logistics_leg"),
+            ),
+        }
+
+    def list_qs(self, *, relations: Optional[Iterable[str]] = None):
+        """relations: claves de `prefetches()` a cargar (None = todas)."""
+        prefetches = self.prefetches()
+        if relations is not None:
+            wanted = set(relations)
+            if "items__accesorios" in wanted:
+                wanted.add("items")
+            prefetches = {k: v for k, v in prefetches.items() if k in wanted}
+        return self.repo.list_qs().prefetch_related(*prefetches.values())
 
     def get(self, pk: int) -> Budget:
         return self.list_qs().get(pk=pk)
@@ -111,6 +203,94 @@ class BudgetService:
             notas=notas or "",
         )
 
+    @transaction.atomic
+    def purchase_many_from_draft(
+        self,
+        *,
+        purchase_service: PurchaseService,
+        compras: Sequence[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """
+        Cierre de mes: marca como comprados varios DRAFT en una sola transacción.
+        compras = [{"budget_id", "fecha_compra"?, "notas"?}, ...]
+
+        - lock de todos los presupuestos con un único select_for_update ordenado por id
+          (mismo orden en cada request => sin deadlocks entre lotes que se pisan)
+        - se validan todos juntos: si alguno no se puede comprar no se escribe nada y el
+          error trae el detalle por presupuesto
+        - compras + unidades con bulk inserts (PurchaseService no vuelve a leer los budgets)
+        """
+        by_id: Dict[int, Dict[str, Any]] = {}
+        for c in compras:
+            budget_id = int(c["budget_id"])
+            if budget_id in by_id:
+                raise DomainError(
+                    ErrorCodes.VALIDATION_ERROR,
+                    message_override="Hay presupuestos repetidos en el lote.",
+                    details={"budget_id": budget_id},
+                )
+            by_id[budget_id] = c
+
+        ids = sorted(by_id)
+        budgets: List[Budget] = list(
+            Budget.objects.select_for_update()
+            .filter(pk__in=ids)
+            .order_by("pk")
+            .prefetch_related(purchase_service.items_prefetch())
+        )
+
+        missing = sorted(set(ids) - {b.id for b in budgets})
+        if missing:
+            raise DomainError(ErrorCodes.NOT_FOUND, details={"budget_ids": missing})
+
+        compradas = dict(
+            Purchase.objects.filter(budget_id__in=ids).values_list("budget_id", "id")
+        )
+        errores = []
+        for b in budgets:
+            if b.estado != BudgetStatus.DRAFT:
+                errores.append({
+                    "budget_id": b.id,
+                    "error": "Solo podés marcar como comprado un presupuesto en estado DRAFT.",
+                    "estado_actual": b.estado,
+                })
+            elif b.id in compradas:
+                errores.append({
+                    "budget_id": b.id,
+                    "error": "Este presupuesto ya tiene una compra asociada.",
+                    "purchase_id": compradas[b.id],
+                })
+        if errores:
+            raise DomainError(
+                ErrorCodes.CONFLICT,
+                message_override="Hay presupuestos del lote que no se pueden comprar.",
+                details={"errores": errores},
+            )
+
+        # 1) Cerrar todos (un UPDATE)
+        now = timezone.now()
+        Budget.objects.filter(pk__in=ids).update(estado=BudgetStatus.CERRADO, updated_at=now)
+        for b in budgets:
+            b.estado = BudgetStatus.CERRADO
+            b.updated_at = now
+
+        # 2) Crear compras + stock
+        purchases = purchase_service.create_purchases_for_budgets(
+            budgets=budgets,
+            fechas_compra={i: c.get("fecha_compra") for i, c in by_id.items()},
+            notas={i: c.get("notas") or "" for i, c in by_id.items()},
+        )
+        return [
+            {
+                "budget_id": p.budget_id,
+                "numero": p.budget.numero,
+                "purchase_id": p.id,
+                "fecha_compra": p.fecha_compra,
+                "unidades": sum(it.cantidad for it in p.budget.items.all()),
+            }
+            for p in purchases
+        ]
+
     def delete(self, budget_id: int) -> None:
         budget: Budget = self.repo.get(budget_id)
 
@@ -128,161 +308,394 @@ class BudgetService:
 
         try:
             self.repo.delete(budget)
+            bump_data_version()
         except ProtectedError:
             raise DomainError(
                 error=ErrorCodes.BUDGET_DELETE_NOT_ALLOWED,
                 details={"budget_id": budget.id},
             )
 
-    def _apply_payload_to_budget(self, *, budget: Budget, payload: Dict[str, Any]) -> None:
-        subtotal_maquinas = D("0.00")
-        subtotal_accesorios = D("0.00")
-
-        items: List[Dict[str, Any]] = payload.get("items") or []
-        if not items:
-            raise ValueError("Debe incluir al menos 1 máquina en el presupuesto.")
-
-        for it in items:
-            mb: MachineBase = MachineBase.objects.get(pk=it["machine_base_id"])
-            cantidad = int(it.get("cantidad") or 1)
-
-            machine_total = _money(_d(it.get("machine_total") or mb.total))
-            if machine_total != _money(mb.total):
-                mb.total = machine_total
-                mb.save(update_fields=["total"])
-
-            item = BudgetItem.objects.create(
-                budget=budget,
-                machine_base=mb,
-                cantidad=cantidad,
-                machine_total_snapshot=machine_total,
-                subtotal_maquina_snapshot=_money(machine_total * cantidad),
+    @staticmethod
+    def _in_bulk(model, ids, *, strict: bool = True) -> Dict[int, Any]:
+        """
+        Resuelve todos los ids referenciados de un modelo en una sola query.
+        Con `strict`, si falta alguno -> NOT_FOUND con los ids inexistentes.
+        """
+        ids = {int(i) for i in ids}
+        if not ids:
+            return {}
+        found = model.objects.in_bulk(ids)
+        if strict and len(found) != len(ids):
+            raise DomainError(
+                ErrorCodes.NOT_FOUND,
+                message_override=f"{model.__name__}: referencia inexistente en el catálogo.",
+                details={"model": model.__name__, "ids": sorted(ids - set(found))},
             )
-            subtotal_maquinas += item.subtotal_maquina_snapshot
-
-            accesorios: List[Dict[str, Any]] = it.get("accesorios") or []
-            for acc in accesorios:
-                a: Accessory = Accessory.objects.get(pk=acc["accessory_id"])
-                acc_qty = int(acc.get("cantidad") or 1)
-                acc_total = _money(_d(acc.get("accessory_total") or a.total))
+        return found
+
+    def _load_catalog(
+        self,
+        payload: Dict[str, Any],
+        *,
+        extra_leg_ids: Iterable[int] = (),
+        extra_tax_ids: Iterable[int] = (),
+    ) -> PriceCatalog:
+        """
+        Carga (solo lectura, sin locks) el catálogo que referencia el payload:
+        un `in_bulk` por modelo, así la cantidad de queries no depende del tamaño del payload.
+        `extra_*` suma ids que no están en el payload (p.ej. variantes de escenarios).
+        """
+        return self._load_catalog_many(
+            [payload],
+            extra_leg_ids=extra_leg_ids,
+            extra_tax_ids=extra_tax_ids,
+        )
 
-                if acc_total != _money(a.total):
-                    a.total = acc_total
-                    a.save(update_fields=["total"])
+    def _load_catalog_many(
+        self,
+        payloads: Sequence[Dict[str, Any]],
+        *,
+        extra_leg_ids: Iterable[int] = (),
+        extra_tax_ids: Iterable[int] = (),
+        strict: bool = True,
+    ) -> PriceCatalog:
+        """
+        Igual que `_load_catalog` pero para varios payloads a la vez (import masivo).
+        Sin `strict`, los ids inexistentes simplemente no quedan en el catálogo y el
+        motor de precios falla solo para el payload que los referencia.
+        """
+        items = [it for p in payloads for it in (p.get("items") or [])]
+        logisticas = [lg for p in payloads for lg in (p.get("logisticas") or [])]
+        impuestos = [tx for p in payloads for tx in (p.get("impuestos") or [])]
+
+        machines = self._in_bulk(MachineBase, (it["machine_base_id"] for it in items), strict=strict)
+        accessories = self._in_bulk(
+            Accessory,
+            (acc["accessory_id"] for it in items for acc in (it.get("accesorios") or [])),
+            strict=strict,
+        )
+        legs = self._in_bulk(
+            LogisticsLeg,
+            [*(lg["logistics_leg_id"] for lg in logisticas), *extra_leg_ids],
+            strict=strict,
+        )
 
-                bia = BudgetItemAccessory.objects.create(
-                    budget_item=item,
-                    accessory=a,
-                    cantidad=acc_qty,
-                    accessory_total_snapshot=acc_total,
-                    subtotal_snapshot=_money(acc_total * acc_qty),
+        # los impuestos por defecto solo hacen falta si algún payload no trae impuestos
+        default_taxes: List[Tax] = []
+        if any(not p.get("impuestos") for p in payloads):
+            default_taxes = list(Tax.objects.filter(siempre_incluir=True).order_by("nombre"))
+        taxes = {t.id: t for t in default_taxes}
+        wanted = {int(i) for i in [*(tx["tax_id"] for tx in impuestos), *extra_tax_ids]} - set(taxes)
+        taxes.update(self._in_bulk(Tax, wanted, strict=strict))
+
+        def _tax(t: Tax) -> TaxRate:
+            return TaxRate(id=t.id, nombre=t.nombre, porcentaje=t.porcentaje, monto_minimo=t.monto_minimo)
+
+        return PriceCatalog(
+            machines={pk: MachinePrice(id=m.id, nombre=m.nombre, total=m.total) for pk, m in machines.items()},
+            accessories={pk: AccessoryPrice(id=a.id, nombre=a.nombre, total=a.total) for pk, a in accessories.items()},
+            legs={
+                pk: LogisticsLegPrice(
+                    id=lg.id, desde=lg.desde, hasta=lg.hasta, tipo=lg.tipo, etapa=lg.etapa, total=lg.total
                 )
-                subtotal_accesorios += bia.subtotal_snapshot
+                for pk, lg in legs.items()
+            },
+            taxes={pk: _tax(t) for pk, t in taxes.items()},
+            default_taxes=[_tax(t) for t in default_taxes],
+        )
 
-        subtotal_log_hasta = D("0.00")
-        subtotal_log_post = D("0.00")
+    def quote(self, payload: Dict[str, Any]) -> Quote:
+        """
+        Cotiza un payload sin persistir nada: ni filas del presupuesto ni overrides
+        de precios en el catálogo. Usa el mismo motor que create/update.
+        """
+        items: List[Dict[str, Any]] = payload.get("items") or []
+        if not items:
+            raise DomainError(
+                ErrorCodes.VALIDATION_ERROR,
+                message_override="Debe incluir al menos 1 máquina en el presupuesto.",
+            )
+        return price_budget(payload, self._load_catalog(payload))
+
+    def scenarios(
+        self,
+        *,
+        payload: Dict[str, Any],
+        grid: ScenarioGrid,
+        ordenar_por: str = "total",
+        limite: int | None = None,
+    ) -> ScenarioResult:
+        """
+        What-if: cotiza todas las combinaciones del grid sobre el payload base y las
+        devuelve rankeadas. No persiste nada (igual que `quote`).
+        """
+        items: List[Dict[str, Any]] = payload.get("items") or []
+        if not items:
+            raise DomainError(
+                ErrorCodes.VALIDATION_ERROR,
+                message_override="Debe incluir al menos 1 máquina en el presupuesto.",
+            )
 
-        logisticas: List[Dict[str, Any]] = payload.get("logisticas") or []
-        for lg in logisticas:
-            leg: LogisticsLeg = LogisticsLeg.objects.get(pk=lg["logistics_leg_id"])
-            leg_total = _money(_d(lg.get("total") or leg.total))
+        fuera_de_rango = [i for i in grid.cantidades if not 0 <= i < len(items)]
+        if fuera_de_rango:
+            raise DomainError(
+                ErrorCodes.VALIDATION_ERROR,
+                message_override="Las variaciones de cantidad deben referenciar items del presupuesto base.",
+                details={"items": fuera_de_rango, "items_en_base": len(items)},
+            )
 
-            if leg_total != _money(leg.total):
-                leg.total = leg_total
-                leg.save(update_fields=["total"])
+        variantes = grid.size()
+        if variantes > MAX_SCENARIOS:
+            raise DomainError(
+                ErrorCodes.VALIDATION_ERROR,
+                message_override=f"Demasiadas variantes ({variantes}). Máximo: {MAX_SCENARIOS}.",
+                details={"variantes": variantes, "maximo": MAX_SCENARIOS},
+            )
 
-            BudgetSelectedLogisticsLeg.objects.create(
+        catalog = self._load_catalog(
+            payload,
+            extra_leg_ids=(lg["logistics_leg_id"] for ruta in grid.rutas for lg in ruta),
+            extra_tax_ids=grid.impuestos_opcionales,
+        )
+        return price_scenarios(payload, grid, catalog, ordenar_por=ordenar_por, limite=limite)
+
+    def _build_rows(self, *, budget: Budget, payload: Dict[str, Any]) -> _BudgetRows:
+        """
+        Cotiza el payload y arma las filas hijas SIN guardarlas.
+        """
+        return self._rows_from_quote(budget=budget, quote=self.quote(payload))
+
+    @staticmethod
+    def _rows_from_quote(*, budget: Budget, quote: Quote) -> _BudgetRows:
+        items: List[BudgetItem] = []
+        accesorios: List[List[BudgetItemAccessory]] = []
+        for qi in quote.items:
+            item = BudgetItem(
                 budget=budget,
-                logistics_leg=leg,
-                total_snapshot=leg_total,
+                machine_base_id=qi.machine.id,
+                cantidad=qi.cantidad,
+                machine_total_snapshot=qi.machine_total,
+                subtotal_maquina_snapshot=qi.subtotal,
             )
+            items.append(item)
+            # el FK al item se completa solo: bulk_create de items asigna los pk antes
+            accesorios.append([
+                BudgetItemAccessory(
+                    budget_item=item,
+                    accessory_id=qa.accessory.id,
+                    cantidad=qa.cantidad,
+                    accessory_total_snapshot=qa.accessory_total,
+                    subtotal_snapshot=qa.subtotal,
+                )
+                for qa in qi.accesorios
+            ])
+
+        return _BudgetRows(
+            quote=quote,
+            items=items,
+            accesorios=accesorios,
+            logisticas=[
+                BudgetSelectedLogisticsLeg(budget=budget, logistics_leg_id=ql.leg.id, total_snapshot=ql.total)
+                for ql in quote.logisticas
+            ],
+            impuestos=[
+                BudgetTaxApplied(
+                    budget=budget,
+                    tax_id=qt.tax.id,
+                    incluido=qt.incluido,
+                    porcentaje_snapshot=qt.porcentaje,
+                    monto_minimo_snapshot=qt.monto_minimo,
+                    monto_aplicado_snapshot=qt.monto_aplicado,
+                )
+                for qt in quote.impuestos
+            ],
+        )
 
-            if leg.etapa == LogisticsStage.HASTA_ADUANA:
-                subtotal_log_hasta += leg_total
-            else:
-                subtotal_log_post += leg_total
-
-        base_imponible = _money(subtotal_maquinas + subtotal_accesorios + subtotal_log_hasta)
-
-        total_impuestos = D("0.00")
-        impuestos: List[Dict[str, Any]] = payload.get("impuestos") or []
-
-        if not impuestos:
-            impuestos = [
-                {"tax_id": t.id, "incluido": True, "porcentaje": str(t.porcentaje)}
-                for t in Tax.objects.filter(siempre_incluir=True).order_by("nombre")
-            ]
+    @staticmethod
+    def _flush_catalog(overrides: Iterable[CatalogOverride]) -> None:
+        """
+        Persiste en el catálogo los precios que el payload pisó (un bulk_update por
+        modelo y campo; si un precio se pisó varias veces gana el último).
+        Solo create/update/import lo hacen; `quote` no escribe.
+        """
+        latest = {(ov.kind, ov.id, ov.field): ov.value for ov in overrides}
 
-        for tx in impuestos:
-            tax: Tax = Tax.objects.get(pk=tx["tax_id"])
-            incluido = bool(tx.get("incluido", True))
+        grouped: Dict[Tuple[str, str], List[Any]] = defaultdict(list)
+        for (kind, pk, field), value in latest.items():
+            grouped[(kind, field)].append(_CATALOG_MODELS[kind](pk=pk, **{field: value}))
 
-            # % override (igual que hoy)
-            porcentaje = _d(tx.get("porcentaje") or tax.porcentaje)
+        for (kind, field), objs in grouped.items():
+            _CATALOG_MODELS[kind].objects.bulk_update(objs, [field])
 
-            porc2 = porcentaje.quantize(D("0.01"), rounding=ROUND_HALF_UP)
-            tax_porc2 = tax.porcentaje.quantize(D("0.01"), rounding=ROUND_HALF_UP)
-            if porc2 != tax_porc2:
-                tax.porcentaje = porc2
-                tax.save(update_fields=["porcentaje"])
+    @staticmethod
+    def _save_totals(budget: Budget, rows: _BudgetRows, *, extra_fields: Tuple[str, ...] = ()) -> None:
+        for field, value in rows.quote.snapshot().items():
+            setattr(budget, field, value)
+        budget.save(update_fields=[*extra_fields, *_SNAPSHOT_FIELDS, "updated_at"])
 
-            # ✅ mínimo override SOLO si el impuesto del catálogo tiene mínimo
-            # si el tax no tiene mínimo, ignoramos cualquier monto_minimo que venga
-            monto_minimo = None
-            if tax.monto_minimo is not None:
-                override = tx.get("monto_minimo", None)
-                monto_minimo = _money(_d(override)) if override is not None else _money(tax.monto_minimo)
+    def _apply_payload_to_budget(self, *, budget: Budget, payload: Dict[str, Any]) -> None:
+        rows = self._build_rows(budget=budget, payload=payload)
+
+        # --- Escrituras: un bulk por tabla
+        BudgetItem.objects.bulk_create(rows.items)
+        BudgetItemAccessory.objects.bulk_create([a for accs in rows.accesorios for a in accs])
+        BudgetSelectedLogisticsLeg.objects.bulk_create(rows.logisticas)
+        BudgetTaxApplied.objects.bulk_create(rows.impuestos)
+
+        self._flush_catalog(rows.quote.overrides)
+        self._save_totals(budget, rows)
+
+    def _sync_payload_to_budget(
+        self,
+        *,
+        budget: Budget,
+        payload: Dict[str, Any],
+        extra_fields: Tuple[str, ...] = (),
+    ) -> None:
+        """
+        Variante incremental de `_apply_payload_to_budget` para presupuestos existentes.
+
+        Compara las filas guardadas con las del payload y solo inserta/actualiza/borra lo
+        que cambió: las líneas idénticas conservan su id y no generan escrituras.
+        - Items: se emparejan por máquina, en orden de aparición (puede repetirse la máquina).
+        - Accesorios, logística e impuestos: por su FK al catálogo (son únicos por padre).
+        """
+        rows = self._build_rows(budget=budget, payload=payload)
+        now = timezone.now()
+
+        pool: Dict[int, List[BudgetItem]] = defaultdict(list)
+        for cur in budget.items.prefetch_related("accesorios").order_by("id"):
+            pool[cur.machine_base_id].append(cur)
+
+        items_ins: List[BudgetItem] = []
+        items_upd: List[BudgetItem] = []
+        accs_ins: List[BudgetItemAccessory] = []
+        accs_upd: List[BudgetItemAccessory] = []
+        accs_del: List[BudgetItemAccessory] = []
+
+        for new_item, new_accs in zip(rows.items, rows.accesorios):
+            candidates = pool.get(new_item.machine_base_id)
+            if not candidates:
+                items_ins.append(new_item)
+                accs_ins.extend(new_accs)
+                continue
+
+            cur = candidates.pop(0)
+            if _copy_if_changed(cur, new_item, _ITEM_FIELDS, now=now):
+                items_upd.append(cur)
+
+            for bia in new_accs:
+                bia.budget_item = cur
+            ins, upd, dele = _diff_keyed(
+                {a.accessory_id: a for a in cur.accesorios.all()},
+                new_accs,
+                key="accessory_id",
+                fields=_ACCESSORY_FIELDS,
+                now=now,
+            )
+            accs_ins.extend(ins)
+            accs_upd.extend(upd)
+            accs_del.extend(dele)
+
+        items_del = [cur for leftovers in pool.values() for cur in leftovers]
+
+        legs_ins, legs_upd, legs_del = _diff_keyed(
+            {x.logistics_leg_id: x for x in budget.logisticas.all()},
+            rows.logisticas,
+            key="logistics_leg_id",
+            fields=_LOGISTICS_FIELDS,
+            now=now,
+        )
+        taxes_ins, taxes_upd, taxes_del = _diff_keyed(
+            {x.tax_id: x for x in budget.impuestos.all()},
+            rows.impuestos,
+            key="tax_id",
+            fields=_TAX_FIELDS,
+            now=now,
+        )
 
-                if override is not None:
-                    new_min2 = _money(_d(override))
-                    old_min2 = _money(tax.monto_minimo) if tax.monto_minimo is not None else None
+        # --- Borrados (el delete de items cascadea a sus accesorios)
+        for model, objs in (
+            (BudgetItem, items_del),
+            (BudgetItemAccessory, accs_del),
+            (BudgetSelectedLogisticsLeg, legs_del),
+            (BudgetTaxApplied, taxes_del),
+        ):
+            if objs:
+                model.objects.filter(pk__in=[o.pk for o in objs]).delete()
+
+        # --- Altas (items primero: los accesorios nuevos necesitan su pk)
+        BudgetItem.objects.bulk_create(items_ins)
+        BudgetItemAccessory.objects.bulk_create(accs_ins)
+        BudgetSelectedLogisticsLeg.objects.bulk_create(legs_ins)
+        BudgetTaxApplied.objects.bulk_create(taxes_ins)
+
+        # --- Modificaciones
+        for model, objs, fields in (
+            (BudgetItem, items_upd, _ITEM_FIELDS),
+            (BudgetItemAccessory, accs_upd, _ACCESSORY_FIELDS),
+            (BudgetSelectedLogisticsLeg, legs_upd, _LOGISTICS_FIELDS),
+            (BudgetTaxApplied, taxes_upd, _TAX_FIELDS),
+        ):
+            if objs:
+                model.objects.bulk_update(objs, [*fields, "updated_at"])
+
+        self._flush_catalog(rows.quote.overrides)
+        self._save_totals(budget, rows, extra_fields=extra_fields)
 
-                    if old_min2 is None or new_min2 != old_min2:
-                        tax.monto_minimo = new_min2
-                        tax.save(update_fields=["monto_minimo"])
+    @transaction.atomic
+    def import_chunk(self, entries: Sequence[Tuple[int, Dict[str, Any]]]) -> Tuple[int, List[Tuple[int, str]]]:
+        """
+        Crea en bloque los presupuestos de un chunk de import (entries = (línea, payload)
+        ya validados). Cotiza todo en memoria y escribe cada una de las cinco tablas con
+        un único `bulk_create`, así el costo por chunk es constante en queries.
+
+        Cada payload ve los overrides de precio de los anteriores del mismo chunk, igual
+        que si se hubieran creado uno por uno con `create_from_payload`.
+        Devuelve (creados, [(línea, error)]) con los payloads que no se pudieron cotizar.
+        """
+        catalog = self._load_catalog_many([p for _, p in entries], strict=False)
+        today = date.today()
+
+        errores: List[Tuple[int, str]] = []
+        overrides: List[CatalogOverride] = []
+        budgets: List[Budget] = []
+        quotes: List[Quote] = []
+
+        for linea, payload in entries:
+            try:
+                quote = price_budget(payload, catalog)
+            except KeyError as e:
+                errores.append((linea, f"Referencia inexistente en el catálogo: {e.args[0]}"))
+                continue
+            except DomainError as e:
+                errores.append((linea, e.message))
+                continue
+
+            if quote.overrides:
+                catalog = catalog.with_overrides(quote.overrides)
+                overrides.extend(quote.overrides)
+
+            budgets.append(
+                Budget(
+                    numero=_gen_numero(),
+                    fecha=payload.get("fecha") or today,
+                    estado=BudgetStatus.DRAFT,
+                    **quote.snapshot(),
+                )
+            )
+            quotes.append(quote)
 
-            monto_pct = _money(base_imponible * (porcentaje / D("100.00")))
-            monto_aplicado = monto_pct
-            if monto_minimo is not None:
-                monto_aplicado = _money(max(monto_pct, monto_minimo))
+        Budget.objects.bulk_create(budgets)
 
-            BudgetTaxApplied.objects.create(
-                budget=budget,
-                tax=tax,
-                incluido=incluido,
-                porcentaje_snapshot=porcentaje,
-                monto_minimo_snapshot=monto_minimo,
-                monto_aplicado_snapshot=(monto_aplicado if incluido else D("0.00")),
-            )
+        rows = [self._rows_from_quote(budget=b, quote=q) for b, q in zip(budgets, quotes)]
+        BudgetItem.objects.bulk_create([it for r in rows for it in r.items])
+        BudgetItemAccessory.objects.bulk_create([a for r in rows for accs in r.accesorios for a in accs])
+        BudgetSelectedLogisticsLeg.objects.bulk_create([lg for r in rows for lg in r.logisticas])
+        BudgetTaxApplied.objects.bulk_create([tx for r in rows for tx in r.impuestos])
 
-            if incluido:
-                total_impuestos += _money(monto_aplicado)
-
-        total_impuestos = _money(total_impuestos)
-
-        costo_aduana = _money(subtotal_log_hasta + total_impuestos)
-        total = _money(base_imponible + total_impuestos + subtotal_log_post)
-
-        budget.subtotal_maquinas_snapshot = _money(subtotal_maquinas)
-        budget.subtotal_accesorios_snapshot = _money(subtotal_accesorios)
-        budget.subtotal_logistica_hasta_aduana_snapshot = _money(subtotal_log_hasta)
-        budget.subtotal_logistica_post_aduana_snapshot = _money(subtotal_log_post)
-        budget.base_imponible_snapshot = base_imponible
-        budget.total_impuestos_snapshot = total_impuestos
-        budget.costo_aduana_snapshot = costo_aduana
-        budget.total_snapshot = total
-
-        budget.save(update_fields=[
-            "subtotal_maquinas_snapshot",
-            "subtotal_accesorios_snapshot",
-            "subtotal_logistica_hasta_aduana_snapshot",
-            "subtotal_logistica_post_aduana_snapshot",
-            "base_imponible_snapshot",
-            "total_impuestos_snapshot",
-            "costo_aduana_snapshot",
-            "total_snapshot",
-            "updated_at",
-        ])
+        self._flush_catalog(overrides)
+        return len(budgets), errores
 
     @transaction.atomic
     def create_from_payload(self, payload: Dict[str, Any]) -> Budget:
@@ -310,11 +723,7 @@ class BudgetService:
             )
 
         budget.fecha = payload.get("fecha") or budget.fecha
-        budget.save(update_fields=["fecha", "updated_at"])
 
-        budget.items.all().delete()
-        budget.logisticas.all().delete()
-        budget.impuestos.all().delete()
-
-        self._apply_payload_to_budget(budget=budget, payload=payload)
+        # ✅ incremental: solo se tocan las líneas que cambiaron
+        self._sync_payload_to_budget(budget=budget, payload=payload, extra_fields=("fecha",))
         return budget
@@ -4,16 +4,30 @@ from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from machinery.shared.pagination import DefaultPagination
-
-from .serializers import BudgetCreateSerializer, BudgetListSerializer, BudgetDetailSerializer
+from machinery.shared.fieldsets import SparseFieldsetViewSetMixin, SparseSource
+from machinery.shared.pagination import DefaultOrKeysetPagination
+
+from .serializers import (
+    BudgetCreateSerializer,
+    BudgetListSerializer,
+    BudgetDetailSerializer,
+    BudgetQuoteSerializer,
+    BudgetScenariosSerializer,
+    BudgetScenariosOutSerializer,
+    BudgetPurchaseBatchSerializer,
+    BudgetPurchaseBatchResultSerializer,
+)
+from .scenarios import ScenarioGrid
+from .importer import BudgetNdjsonImporter, DEFAULT_CHUNK_SIZE
 from .services import BudgetService
 from .repositories import BudgetRepository
 
 from machinery.purchases.services import PurchaseService
+from machinery.shared.errors import DomainError, ErrorCodes
 
 
 class BudgetViewSet(
+    SparseFieldsetViewSetMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -21,7 +35,19 @@ class BudgetViewSet(
     mixins.UpdateModelMixin,
     viewsets.GenericViewSet,
 ):
-    pagination_class = DefaultPagination
+    pagination_class = DefaultOrKeysetPagination
+    # ?cursor= -> keyset sobre el mismo orden del listado (+ id para desempatar)
+    cursor_ordering = ("-fecha", "-created_at", "id")
+
+    _COMPRA = SparseSource(columns=("compra__id",), select=("compra",))
+    sparse_sources = {
+        "machine_bases": SparseSource(prefetch=("items",)),
+        "tiene_compra": _COMPRA,
+        "compra_id": _COMPRA,
+        "items": SparseSource(prefetch=("items", "items__accesorios")),
+        "impuestos": SparseSource(prefetch=("impuestos",)),
+        "logisticas": SparseSource(prefetch=("logisticas",)),
+    }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -29,7 +55,13 @@ class BudgetViewSet(
         self.purchase_service = PurchaseService()
 
     def get_queryset(self):
-        qs = self.service.list_qs().select_related("compra").order_by("-fecha", "-created_at")
+        plan = self.get_sparse_plan()
+        if plan is None:
+            qs = self.service.list_qs().select_related("compra")
+        else:
+            # ✅ solo los prefetch/joins/columnas que usan los campos pedidos
+            qs = plan.apply(self.service.list_qs(relations=plan.prefetch))
+        qs = qs.order_by("-fecha", "-created_at")
 
         # filtros
         params = self.request.query_params
@@ -49,8 +81,12 @@ class BudgetViewSet(
         return qs
 
     def get_serializer_class(self):
-        if self.action == "create":
+        if self.action in ("create", "quote"):
             return BudgetCreateSerializer
+        if self.action == "scenarios":
+            return BudgetScenariosSerializer
+        if self.action == "purchase_batch":
+            return BudgetPurchaseBatchSerializer
         if self.action == "retrieve":
             return BudgetDetailSerializer
         return BudgetListSerializer
@@ -59,7 +95,7 @@ class BudgetViewSet(
         ser = BudgetCreateSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
         budget = self.service.create_from_payload(ser.validated_data)
-        out = BudgetDetailSerializer(instance=budget).data
+        out = BudgetDetailSerializer(instance=self.service.get(budget.id)).data
         return Response(out, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
@@ -71,9 +107,72 @@ class BudgetViewSet(
             budget_id=budget_id,
             payload=ser.validated_data,
         )
-        out = BudgetDetailSerializer(instance=budget).data
+        out = BudgetDetailSerializer(instance=self.service.get(budget.id)).data
         return Response(out, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=["post"], url_path="quote")
+    def quote(self, request):
+        """
+        Cotiza un payload (mismo formato que create) sin guardar nada:
+        no crea el presupuesto ni actualiza precios del catálogo.
+        """
+        ser = BudgetCreateSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        quote = self.service.quote(ser.validated_data)
+        return Response(BudgetQuoteSerializer(quote).data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["post"], url_path="scenarios")
+    def scenarios(self, request):
+        """
+        What-if: payload base + grilla de variaciones (cantidades por item, rutas
+        logísticas alternativas, impuestos opcionales). Devuelve todas las variantes
+        rankeadas por total (o costo_aduana), sin guardar nada.
+        """
+        ser = BudgetScenariosSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        data = ser.validated_data
+
+        grid = ScenarioGrid(
+            cantidades={c["item"]: c["valores"] for c in data.get("cantidades") or []},
+            rutas=data.get("rutas") or [],
+            impuestos_opcionales=data.get("impuestos_opcionales") or [],
+        )
+        result = self.service.scenarios(
+            payload=data["base"],
+            grid=grid,
+            ordenar_por=data["ordenar_por"],
+            limite=data.get("limite"),
+        )
+        return Response(BudgetScenariosOutSerializer(result).data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_ndjson(self, request):
+        """
+        Import masivo (NDJSON: un payload de create por línea).
+        - body crudo `application/x-ndjson`, o multipart con el archivo en `archivo`
+        - ?chunk_size=500: presupuestos por transacción
+        Devuelve errores por línea + métricas (líneas, importados, presupuestos/seg).
+        """
+        try:
+            chunk_size = int(request.query_params.get("chunk_size") or DEFAULT_CHUNK_SIZE)
+        except ValueError:
+            raise DomainError(ErrorCodes.VALIDATION_ERROR, message_override="chunk_size debe ser un entero.")
+
+        if (request.content_type or "").startswith("multipart/"):
+            archivo = request.FILES.get("archivo")
+            if archivo is None:
+                raise DomainError(
+                    ErrorCodes.VALIDATION_ERROR,
+                    message_override="Falta el archivo NDJSON en el campo 'archivo'.",
+                )
+            lines = archivo
+        else:
+            # leemos el stream línea por línea (sin cargar el body completo en memoria)
+            lines = request.stream or []
+
+        report = BudgetNdjsonImporter(self.service, chunk_size=chunk_size).run(lines)
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
+
     def destroy(self, request, *args, **kwargs):
         self.service.delete(int(kwargs["pk"]))
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -96,3 +195,31 @@ class BudgetViewSet(
             purchase_service=self.purchase_service,
         )
         return Response({"ok": True, "purchase_id": purchase.id}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"], url_path="purchase-batch")
+    def purchase_batch(self, request):
+        """
+        Marcar varios presupuestos DRAFT como comprados (cierre de mes), todo o nada:
+        - body: {"compras": [{"budget_id", "fecha_compra"?, "notas"?}], "fecha_compra"?, "notas"?}
+          (fecha_compra/notas de nivel superior son el default de cada compra)
+        - si algún presupuesto no se puede comprar -> 409 con el detalle por presupuesto
+        Devuelve la compra creada por cada presupuesto.
+        """
+        ser = BudgetPurchaseBatchSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        data = ser.validated_data
+
+        compras = [
+            {
+                "budget_id": c["budget_id"],
+                "fecha_compra": c.get("fecha_compra") or data.get("fecha_compra"),
+                "notas": c["notas"] if "notas" in c else data["notas"],
+            }
+            for c in data["compras"]
+        ]
+        resultados = self.service.purchase_many_from_draft(
+            purchase_service=self.purchase_service,
+            compras=compras,
+        )
+        out = BudgetPurchaseBatchResultSerializer(resultados, many=True).data
+        return Response({"ok": True, "compras": out}, status=status.HTTP_201_CREATED)
@@ -28,9 +28,13 @@ from machinery.models import (
     PurchasedUnit,
     RevenueEvent,
     RevenueEventUnit, UnitStatus,
+    InventoryCounter,
+    DailyFinanceLedger,
 )
 from machinery.budgets.repositories import BudgetRepository
 from machinery.budgets.services import BudgetService
+from machinery.purchases.availability import availability_index
+from machinery.reports.cache import bump_data_version, data_version_batch
 from machinery.purchases.services import PurchaseService, UnitLifecycleService
 
 @dataclass(frozen=True)
@@ -279,6 +283,10 @@ def clear_demo_data() -> None:
 
     PurchasedUnit.objects.all().delete()
     Purchase.objects.all().delete()
+    InventoryCounter.objects.all().delete()
+    DailyFinanceLedger.objects.all().delete()
+    bump_data_version()
+    availability_index.changed()
 
     BudgetSelectedLogisticsLeg.objects.all().delete()
     BudgetTaxApplied.objects.all().delete()
@@ -296,6 +304,7 @@ class DemoSeedResult:
 
 
 @transaction.atomic
+@data_version_batch()
 def apply_demo_seed(*, months_back: int = 6, clear_first: bool = True) -> DemoSeedResult:
     """
     Genera data DEMO para poder navegar toda la app.
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from rest_framework import serializers
 
+from machinery.shared.fieldsets import SparseFieldsetSerializerMixin
 from machinery.models import (
     MachineBase,
     Accessory,
@@ -10,25 +11,25 @@ from machinery.models import (
     LogisticsStage,
 )
 
-class MachineBaseSerializer(serializers.ModelSerializer):
+class MachineBaseSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = MachineBase
         fields = ["id", "nombre", "total", "created_at", "updated_at"]
         read_only_fields = ["id", "created_at", "updated_at"]
 
-class AccessorySerializer(serializers.ModelSerializer):
+class AccessorySerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Accessory
         fields = ["id", "nombre", "total", "created_at", "updated_at"]
         read_only_fields = ["id", "created_at", "updated_at"]
 
-class TaxSerializer(serializers.ModelSerializer):
+class TaxSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Tax
         fields = ["id", "nombre", "porcentaje", "monto_minimo", "siempre_incluir", "created_at", "updated_at"]
         read_only_fields = ["id", "created_at", "updated_at"]
 
-class LogisticsLegSerializer(serializers.ModelSerializer):
+class LogisticsLegSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     tipo = serializers.ChoiceField(choices=LogisticsType.choices)
     etapa = serializers.ChoiceField(choices=LogisticsStage.choices)
 
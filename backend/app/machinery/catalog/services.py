@@ -3,7 +3,9 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any, Dict
 
-from machinery.models import MachineBase, Accessory, Tax, LogisticsLeg
+from django.db import transaction
+
+from machinery.models import MachineBase, Accessory, Tax, LogisticsLeg, PurchasedUnit
 from .repositories import (
     MachineBaseRepository,
     AccessoryRepository,
@@ -22,9 +24,15 @@ class MachineBaseService:
     def create(self, data: Dict[str, Any]) -> MachineBase:
         return self.repo.create(**data)
 
+    @transaction.atomic
     def update(self, pk: int, data: Dict[str, Any]) -> MachineBase:
         obj = self.repo.get(pk)
-        return self.repo.update(obj, **data)
+        renamed = "nombre" in data and data["nombre"] != obj.nombre
+        obj = self.repo.update(obj, **data)
+        if renamed:
+            # read model del inventario (PurchasedUnit.machine_nombre)
+            PurchasedUnit.objects.filter(machine_base=obj).update(machine_nombre=obj.nombre)
+        return obj
 
     def delete(self, pk: int) -> None:
         obj = self.repo.get(pk)
@@ -5,6 +5,8 @@ from rest_framework.decorators import action
 from rest_framework.exceptions import MethodNotAllowed
 from rest_framework.response import Response
 
+from machinery.shared.fieldsets import SparseFieldsetViewSetMixin
+
 from .repositories import (
     MachineBaseRepository,
     AccessoryRepository,
@@ -31,6 +33,7 @@ class NoPatchMixin:
 
 
 class BaseCatalogViewSet(
+    SparseFieldsetViewSetMixin,
     NoPatchMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
@@ -46,8 +49,11 @@ class BaseCatalogViewSet(
     - POST / -> crear
     - PUT /{id}/ -> actualizar (sin PATCH)
     - DELETE /{id}/ -> eliminar
+    - ?fields=id,nombre / ?exclude=... en los GET (proyección con .only())
     """
 
+    sparse_actions = ("list", "retrieve", "all")
+
     @action(detail=False, methods=["get"], url_path="all")
     def all(self, request):
         qs = self.get_queryset()
@@ -63,7 +69,7 @@ class MachineBaseViewSet(BaseCatalogViewSet):
         self.service = MachineBaseService(repo=MachineBaseRepository())
 
     def get_queryset(self):
-        return self.service.list_qs().order_by("nombre")
+        return self.sparse_queryset(self.service.list_qs().order_by("nombre"))
 
     def perform_create(self, serializer):
         obj = self.service.create(serializer.validated_data)
@@ -85,7 +91,7 @@ class AccessoryViewSet(BaseCatalogViewSet):
         self.service = AccessoryService(repo=AccessoryRepository())
 
     def get_queryset(self):
-        return self.service.list_qs().order_by("nombre")
+        return self.sparse_queryset(self.service.list_qs().order_by("nombre"))
 
     def perform_create(self, serializer):
         obj = self.service.create(serializer.validated_data)
@@ -107,7 +113,7 @@ class TaxViewSet(BaseCatalogViewSet):
         self.service = TaxService(repo=TaxRepository())
 
     def get_queryset(self):
-        return self.service.list_qs().order_by("nombre")
+        return self.sparse_queryset(self.service.list_qs().order_by("nombre"))
 
     def perform_create(self, serializer):
         obj = self.service.create(serializer.validated_data)
@@ -129,7 +135,7 @@ class LogisticsLegViewSet(BaseCatalogViewSet):
         self.service = LogisticsLegService(repo=LogisticsLegRepository())
 
     def get_queryset(self):
-        return self.service.list_qs().order_by("etapa", "desde", "hasta", "tipo")
+        return self.sparse_queryset(self.service.list_qs().order_by("etapa", "desde", "hasta", "tipo"))
 
     def perform_create(self, serializer):
         obj = self.service.create(serializer.validated_data)
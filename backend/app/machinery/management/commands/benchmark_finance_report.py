@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Callable
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from machinery.models import Purchase, RevenueEvent, RevenueType
+from machinery.reports.ledger import Deltas, FinanceLedgerService
+
+ZERO = Decimal("0")
+
+
+def _source_days_3q() -> Deltas:
+    """Camino anterior (referencia): tres GROUP BY y merge con defaultdicts."""
+    ingresos = defaultdict(lambda: ZERO)
+    egresos = defaultdict(lambda: ZERO)
+
+    ventas = RevenueEvent.objects.filter(tipo=RevenueType.VENTA).values("fecha").annotate(t=Sum("monto_total")).order_by()
+    for r in ventas:
+        ingresos[r["fecha"]] += r["t"] or ZERO
+
+    alquileres = (
+        RevenueEvent.objects.filter(tipo=RevenueType.ALQUILER, fecha_retorno_real__isnull=False)
+        .values("fecha_retorno_real")
+        .annotate(t=Sum("monto_total"))
+        .order_by()
+    )
+    for r in alquileres:
+        ingresos[r["fecha_retorno_real"]] += r["t"] or ZERO
+
+    compras = Purchase.objects.values("fecha_compra").annotate(t=Sum("total_snapshot")).order_by()
+    for r in compras:
+        egresos[r["fecha_compra"]] += r["t"] or ZERO
+
+    return {d: (ingresos[d], egresos[d]) for d in sorted(set(ingresos) | set(egresos))}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de la agregación por día de revenue_event + purchase: tres GROUP BY "
+        "vs un UNION ALL. Genera los eventos dentro de una transacción y hace rollback al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=1_000_000, help="Eventos a generar (default 1M).")
+        parser.add_argument("--years", type=int, default=10, help="Años hacia atrás que cubren los eventos.")
+        parser.add_argument("--repeat", type=int, default=3, help="Corridas por camino (se toma la mejor).")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options["events"], options["years"], options["seed"])
+            self._run(options["repeat"])
+            # nada de lo generado queda en la base
+            transaction.set_rollback(True)
+
+    def _seed(self, n: int, years: int, seed: int) -> None:
+        rnd = random.Random(seed)
+        hoy = date.today()
+        dias = years * 365
+        batch = []
+        t0 = time.perf_counter()
+        for i in range(n):
+            fecha = hoy - timedelta(days=rnd.randrange(dias))
+            if rnd.random() < 0.5:
+                ev = RevenueEvent(tipo=RevenueType.VENTA, fecha=fecha, monto_total=Decimal(rnd.randrange(1000, 500000)))
+            else:
+                inicio = date(fecha.year, fecha.month, 1)
+                meses = rnd.randrange(1, 24)
+                idx = inicio.year * 12 + inicio.month - 1 + meses - 1
+                fin = date(idx // 12, idx % 12 + 1, 1)
+                mensual = Decimal(rnd.randrange(500, 20000))
+                ev = RevenueEvent(
+                    tipo=RevenueType.ALQUILER,
+                    fecha=inicio,
+                    monto_mensual=mensual,
+                    monto_total=mensual * meses,
+                    fecha_retorno_estimada=fin,
+                    # ~80% cerrados
+                    fecha_retorno_real=fin if rnd.random() < 0.8 else None,
+                )
+            batch.append(ev)
+            if len(batch) >= 10_000 or i == n - 1:
+                RevenueEvent.objects.bulk_create(batch)
+                batch = []
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cur:
+                cur.execute("ANALYZE revenue_event")
+        self.stdout.write(f"{n} eventos generados en {time.perf_counter() - t0:.1f}s")
+
+    def _run(self, repeat: int) -> None:
+        def _best(fn: Callable[[], Deltas]):
+            tiempos = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                out = fn()
+                tiempos.append(time.perf_counter() - t0)
+            return out, min(tiempos)
+
+        viejo, t_viejo = _best(_source_days_3q)
+        nuevo, t_nuevo = _best(FinanceLedgerService.source_days)
+
+        if viejo != nuevo:
+            self.stderr.write(self.style.ERROR("Los dos caminos no coinciden."))
+            return
+
+        self.stdout.write(f"{len(nuevo)} días")
+        self.stdout.write(f"3 x GROUP BY + defaultdict: {t_viejo * 1000:.0f} ms")
+        self.stdout.write(f"UNION ALL (1 query):        {t_nuevo * 1000:.0f} ms")
+        self.stdout.write(self.style.SUCCESS(f"speedup x{t_viejo / t_nuevo:.2f}"))
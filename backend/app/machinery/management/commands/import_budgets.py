@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import sys
+
+from django.core.management.base import BaseCommand
+
+from machinery.budgets.importer import BudgetNdjsonImporter, DEFAULT_CHUNK_SIZE
+from machinery.budgets.repositories import BudgetRepository
+from machinery.budgets.services import BudgetService
+
+
+class Command(BaseCommand):
+    help = "Importa presupuestos desde un archivo NDJSON (un payload de create por línea)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Archivo NDJSON, o '-' para leer de stdin.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        importer = BudgetNdjsonImporter(
+            BudgetService(repo=BudgetRepository()),
+            chunk_size=options["chunk_size"],
+        )
+
+        if options["path"] == "-":
+            report = importer.run(sys.stdin.buffer)
+        else:
+            with open(options["path"], "rb") as fh:
+                report = importer.run(fh)
+
+        for err in report.errores:
+            self.stderr.write(f"línea {err['linea']}: {err['errores']}")
+        if report.errores_truncados:
+            self.stderr.write(f"... ({report.con_error - len(report.errores)} errores más)")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{report.importados} importados, {report.con_error} con error, "
+                f"{report.lineas} líneas en {report.chunks} chunks "
+                f"({report.segundos:.2f}s, {report.presupuestos_por_segundo}/s)"
+            )
+        )
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from machinery.purchases.overdue import iter_overdue, iter_overdue_ndjson
+
+
+class Command(BaseCommand):
+    help = "Lista los alquileres vencidos (sin retorno real y con retorno estimado anterior al mes actual)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--machine-base", type=int, default=None)
+        parser.add_argument("--ndjson", action="store_true", help="Una fila JSON por unidad (para notificaciones).")
+
+    def handle(self, *args, **options):
+        filtros = {"machine_base_id": options["machine_base"]}
+
+        if options["ndjson"]:
+            for line in iter_overdue_ndjson(**filtros):
+                self.stdout.write(line, ending="")
+            return
+
+        n = 0
+        for row in iter_overdue(**filtros):
+            n += 1
+            self.stdout.write(
+                f"{row['identificador']} ({row['machine_nombre']}): {row['meses_vencido']} meses vencido "
+                f"[retorno estimado {row['fecha_retorno_estimada']:%Y-%m}, evento {row['revenue_event_id']}]"
+            )
+        self.stdout.write(self.style.SUCCESS(f"{n} unidades con alquiler vencido."))
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from machinery.reports.ledger import FinanceLedgerService
+
+
+class Command(BaseCommand):
+    help = (
+        "Verifica daily_finance_ledger contra revenue_event + purchase y lo regenera "
+        "si hay diferencias."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Solo verifica, no regenera.")
+
+    def handle(self, *args, **options):
+        drift = FinanceLedgerService.rebuild(fix=not options["check"])
+
+        for d in drift:
+            self.stderr.write(
+                f"{d.fecha}: ledger +{d.ingresos_ledger} -{d.egresos_ledger} / "
+                f"real +{d.ingresos_real} -{d.egresos_real}"
+            )
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Ledger financiero al día."))
+        elif options["check"]:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} días desfasados (sin corregir)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Ledger regenerado ({len(drift)} días corregidos)."))
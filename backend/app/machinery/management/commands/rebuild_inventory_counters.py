@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from machinery.purchases.counters import InventoryCounterService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula los contadores de inventario (máquina, estado) desde purchased_unit "
+        "y reporta las diferencias encontradas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Solo reporta, no corrige.")
+
+    def handle(self, *args, **options):
+        drift = InventoryCounterService.rebuild(fix=not options["check"])
+
+        for d in drift:
+            self.stderr.write(f"máquina {d.machine_base_id} {d.estado}: contador={d.contador} real={d.real}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Contadores de inventario al día."))
+        elif options["check"]:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} contadores desfasados (sin corregir)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{len(drift)} contadores recalculados."))
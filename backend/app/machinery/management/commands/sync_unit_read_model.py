@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from machinery.purchases.services import PurchaseService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula las columnas denormalizadas de las unidades (fecha_compra, budget_numero, "
+        "machine_nombre, total_compra) y reporta cuántas estaban desfasadas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Solo reporta, no corrige.")
+
+    def handle(self, *args, **options):
+        n = PurchaseService.sync_unit_read_model(fix=not options["check"])
+
+        if not n:
+            self.stdout.write(self.style.SUCCESS("Read model de unidades al día."))
+        elif options["check"]:
+            self.stdout.write(self.style.WARNING(f"{n} unidades desfasadas (sin corregir)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{n} unidades recalculadas."))
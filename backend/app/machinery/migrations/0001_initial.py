@@ -0,0 +1,288 @@
+# Generated by Django 5.2.9 on 2026-10-17 17:35
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Accessory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('nombre', models.CharField(max_length=200, unique=True)),
+                ('total', models.DecimalField(decimal_places=2, max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+            ],
+            options={
+                'db_table': 'accessory',
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MachineBase',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('nombre', models.CharField(max_length=200, unique=True)),
+                ('total', models.DecimalField(decimal_places=2, max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+            ],
+            options={
+                'db_table': 'machine_base',
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Tax',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('nombre', models.CharField(max_length=200, unique=True)),
+                ('porcentaje', models.DecimalField(decimal_places=2, max_digits=6, validators=[django.core.validators.MinValueValidator(Decimal('0.00')), django.core.validators.MaxValueValidator(Decimal('100.00'))])),
+                ('monto_minimo', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('siempre_incluir', models.BooleanField(default=False)),
+            ],
+            options={
+                'db_table': 'tax',
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Budget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('numero', models.CharField(max_length=50, unique=True)),
+                ('fecha', models.DateField()),
+                ('estado', models.CharField(choices=[('DRAFT', 'Draft'), ('CERRADO', 'Cerrado')], default='DRAFT', max_length=10)),
+                ('subtotal_maquinas_snapshot', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('subtotal_accesorios_snapshot', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('subtotal_logistica_hasta_aduana_snapshot', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('subtotal_logistica_post_aduana_snapshot', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('base_imponible_snapshot', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('total_impuestos_snapshot', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('costo_aduana_snapshot', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('total_snapshot', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+            ],
+            options={
+                'db_table': 'budget',
+                'ordering': ['-fecha', '-created_at'],
+                'indexes': [models.Index(fields=['estado'], name='budget_estado_7968b9_idx'), models.Index(fields=['fecha'], name='budget_fecha_4d1177_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BudgetItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('cantidad', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('machine_total_snapshot', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('subtotal_maquina_snapshot', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('budget', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='machinery.budget')),
+                ('machine_base', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='budget_items', to='machinery.machinebase')),
+            ],
+            options={
+                'db_table': 'budget_item',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LogisticsLeg',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('desde', models.CharField(max_length=200)),
+                ('hasta', models.CharField(max_length=200)),
+                ('tipo', models.CharField(choices=[('TERRESTRE', 'Terrestre'), ('AEREO', 'Aéreo'), ('MARITIMO', 'Marítimo')], max_length=20)),
+                ('etapa', models.CharField(choices=[('HASTA_ADUANA', 'Hasta aduana'), ('POST_ADUANA', 'Post aduana')], max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+            ],
+            options={
+                'db_table': 'logistics_leg',
+                'ordering': ['etapa', 'desde', 'hasta', 'tipo'],
+                'indexes': [models.Index(fields=['etapa'], name='logistics_l_etapa_610d38_idx'), models.Index(fields=['tipo'], name='logistics_l_tipo_4a3e9a_idx')],
+                'constraints': [models.UniqueConstraint(fields=('desde', 'hasta', 'tipo', 'etapa'), name='uq_logistics_leg_route')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Purchase',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('fecha_compra', models.DateField()),
+                ('total_snapshot', models.DecimalField(decimal_places=2, max_digits=14, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('notas', models.TextField(blank=True, default='')),
+                ('budget', models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, related_name='compra', to='machinery.budget')),
+            ],
+            options={
+                'db_table': 'purchase',
+                'ordering': ['-fecha_compra', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PurchasedUnit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('estado', models.CharField(choices=[('DEPOSITO', 'Depósito'), ('ALQUILADA', 'Alquilada'), ('VENDIDA', 'Vendida')], default='DEPOSITO', max_length=12)),
+                ('identificador', models.CharField(blank=True, default='', max_length=200)),
+                ('budget_item', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='unidades_compradas', to='machinery.budgetitem')),
+                ('machine_base', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='unidades_compradas', to='machinery.machinebase')),
+                ('purchase', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unidades', to='machinery.purchase')),
+            ],
+            options={
+                'db_table': 'purchased_unit',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RevenueEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tipo', models.CharField(choices=[('VENTA', 'Venta'), ('ALQUILER', 'Alquiler')], max_length=10)),
+                ('fecha', models.DateField()),
+                ('cliente_texto', models.CharField(blank=True, default='', max_length=200)),
+                ('monto_total', models.DecimalField(decimal_places=2, max_digits=14, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('monto_mensual', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('fecha_retorno_estimada', models.DateField(blank=True, null=True)),
+                ('fecha_retorno_real', models.DateField(blank=True, null=True)),
+                ('notas', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'db_table': 'revenue_event',
+                'ordering': ['-fecha', '-created_at'],
+                'indexes': [models.Index(fields=['tipo'], name='revenue_eve_tipo_4fa947_idx'), models.Index(fields=['fecha'], name='revenue_eve_fecha_036cd2_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('tipo', 'ALQUILER'), models.Q(('tipo', 'VENTA'), ('fecha_retorno_estimada__isnull', True), ('fecha_retorno_real__isnull', True), ('monto_mensual__isnull', True)), _connector='OR'), name='ck_revenue_return_dates_only_for_rental'), models.CheckConstraint(condition=models.Q(('tipo', 'VENTA'), models.Q(('tipo', 'ALQUILER'), ('monto_mensual__isnull', False), ('fecha_retorno_estimada__isnull', False)), _connector='OR'), name='ck_revenue_rental_requires_monthly_and_estimated_return'), models.CheckConstraint(condition=models.Q(('fecha_retorno_real__isnull', True), ('fecha_retorno_real__gte', models.F('fecha')), _connector='OR'), name='ck_revenue_return_real_gte_start')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RevenueEventUnit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('purchased_unit', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='revenue_usos', to='machinery.purchasedunit')),
+                ('revenue_event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unidades', to='machinery.revenueevent')),
+            ],
+            options={
+                'db_table': 'revenue_event_unit',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BudgetTaxApplied',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('incluido', models.BooleanField(default=True)),
+                ('porcentaje_snapshot', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=6, validators=[django.core.validators.MinValueValidator(Decimal('0.00')), django.core.validators.MaxValueValidator(Decimal('100.00'))])),
+                ('monto_minimo_snapshot', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('monto_aplicado_snapshot', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('budget', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='impuestos', to='machinery.budget')),
+                ('tax', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='budget_taxes', to='machinery.tax')),
+            ],
+            options={
+                'db_table': 'budget_tax_applied',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BudgetItemAccessory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('cantidad', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('accessory_total_snapshot', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('subtotal_snapshot', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('accessory', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='budget_item_accessories', to='machinery.accessory')),
+                ('budget_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='accesorios', to='machinery.budgetitem')),
+            ],
+            options={
+                'db_table': 'budget_item_accessory',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['budget_item'], name='budget_item_budget__6f4748_idx'), models.Index(fields=['accessory'], name='budget_item_accesso_df6df0_idx')],
+                'constraints': [models.UniqueConstraint(fields=('budget_item', 'accessory'), name='uq_budget_item_accessory')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BudgetSelectedLogisticsLeg',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('total_snapshot', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('budget', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='logisticas', to='machinery.budget')),
+                ('logistics_leg', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='budget_selections', to='machinery.logisticsleg')),
+            ],
+            options={
+                'db_table': 'budget_selected_logistics_leg',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['budget'], name='budget_sele_budget__744e2d_idx'), models.Index(fields=['logistics_leg'], name='budget_sele_logisti_80a21e_idx')],
+                'constraints': [models.UniqueConstraint(fields=('budget', 'logistics_leg'), name='uq_budget_selected_logistics_leg')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='budgetitem',
+            index=models.Index(fields=['budget'], name='budget_item_budget__cef243_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='budgetitem',
+            index=models.Index(fields=['machine_base'], name='budget_item_machine_b66a6d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchasedunit',
+            index=models.Index(fields=['estado'], name='purchased_u_estado_3b25fa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchasedunit',
+            index=models.Index(fields=['machine_base'], name='purchased_u_machine_694c0a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchasedunit',
+            index=models.Index(fields=['purchase'], name='purchased_u_purchas_3780c0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='revenueeventunit',
+            index=models.Index(fields=['revenue_event'], name='revenue_eve_revenue_76b123_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='revenueeventunit',
+            index=models.Index(fields=['purchased_unit'], name='revenue_eve_purchas_cf3c67_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='revenueeventunit',
+            constraint=models.UniqueConstraint(fields=('revenue_event', 'purchased_unit'), name='uq_revenue_event_unit'),
+        ),
+        migrations.AddIndex(
+            model_name='budgettaxapplied',
+            index=models.Index(fields=['budget'], name='budget_tax__budget__9f9262_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='budgettaxapplied',
+            index=models.Index(fields=['tax'], name='budget_tax__tax_id_560683_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='budgettaxapplied',
+            constraint=models.UniqueConstraint(fields=('budget', 'tax'), name='uq_budget_tax'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-17 17:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machinery', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['-fecha', '-created_at', 'id'], name='budget_fecha_2b708b_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.9 on 2026-10-17 17:47
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machinery', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='purchasedunit',
+            name='purchased_u_estado_3b25fa_idx',
+        ),
+        migrations.AddField(
+            model_name='purchasedunit',
+            name='budget_numero',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='purchasedunit',
+            name='fecha_compra',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='purchasedunit',
+            name='machine_nombre',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='purchasedunit',
+            name='total_compra',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))]),
+        ),
+        migrations.AddIndex(
+            model_name='purchasedunit',
+            index=models.Index(fields=['-fecha_compra', '-created_at', 'id'], name='purchased_u_fecha_c_5bb2fe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchasedunit',
+            index=models.Index(fields=['estado', '-fecha_compra', '-created_at', 'id'], name='purchased_u_estado_e464ab_idx'),
+        ),
+    ]
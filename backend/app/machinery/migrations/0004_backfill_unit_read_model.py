@@ -0,0 +1,28 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill(apps, schema_editor):
+    """Llena el read model de las unidades existentes desde purchase/budget/machine_base."""
+    PurchasedUnit = apps.get_model("machinery", "PurchasedUnit")
+    Purchase = apps.get_model("machinery", "Purchase")
+    MachineBase = apps.get_model("machinery", "MachineBase")
+
+    purchase = Purchase.objects.filter(pk=OuterRef("purchase_id"))
+    PurchasedUnit.objects.update(
+        fecha_compra=Subquery(purchase.values("fecha_compra")[:1]),
+        budget_numero=Subquery(purchase.values("budget__numero")[:1]),
+        machine_nombre=Subquery(MachineBase.objects.filter(pk=OuterRef("machine_base_id")).values("nombre")[:1]),
+        total_compra=Subquery(purchase.values("total_snapshot")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("machinery", "0003_unit_read_model"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-17 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machinery', '0004_backfill_unit_read_model'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='purchasedunit',
+            name='fecha_compra',
+            field=models.DateField(),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-17 17:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machinery', '0005_unit_fecha_compra_not_null'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('DEPOSITO', 'Depósito'), ('ALQUILADA', 'Alquilada'), ('VENDIDA', 'Vendida')], max_length=12)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('machine_base', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contadores_inventario', to='machinery.machinebase')),
+            ],
+            options={
+                'db_table': 'inventory_counter',
+                'ordering': ['machine_base', 'estado'],
+                'constraints': [models.UniqueConstraint(fields=('machine_base', 'estado'), name='uq_inventory_counter'), models.CheckConstraint(condition=models.Q(('cantidad__gte', 0)), name='ck_inventory_counter_non_negative')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def seed(apps, schema_editor):
+    """Mismo GROUP BY que InventoryCounterService.rebuild, con los modelos históricos."""
+    PurchasedUnit = apps.get_model("machinery", "PurchasedUnit")
+    InventoryCounter = apps.get_model("machinery", "InventoryCounter")
+
+    qs = PurchasedUnit.objects.values("machine_base_id", "estado").annotate(n=Count("id")).order_by()
+    InventoryCounter.objects.all().delete()
+    InventoryCounter.objects.bulk_create(
+        [InventoryCounter(machine_base_id=r["machine_base_id"], estado=r["estado"], cantidad=r["n"]) for r in qs]
+    )
+
+
+class Migration(migrations.Migration):
+    """Arranca inventory_counter con las unidades que ya existen."""
+
+    dependencies = [
+        ("machinery", "0006_inventory_counter"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed, migrations.RunPython.noop),
+    ]
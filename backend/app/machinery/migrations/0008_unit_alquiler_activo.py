@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-17 17:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machinery', '0007_seed_inventory_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchasedunit',
+            name='alquiler_activo',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='machinery.revenueevent'),
+        ),
+        migrations.AddIndex(
+            model_name='revenueevent',
+            index=models.Index(condition=models.Q(('fecha_retorno_real__isnull', True), ('tipo', 'ALQUILER')), fields=['fecha', 'created_at'], name='ix_revenue_open_rental'),
+        ),
+    ]
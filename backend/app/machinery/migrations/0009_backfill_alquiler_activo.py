@@ -0,0 +1,32 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill(apps, schema_editor):
+    """Unidades alquiladas: el puntero va al último alquiler abierto que las incluye."""
+    PurchasedUnit = apps.get_model("machinery", "PurchasedUnit")
+    RevenueEventUnit = apps.get_model("machinery", "RevenueEventUnit")
+
+    abierto = (
+        RevenueEventUnit.objects.filter(
+            purchased_unit_id=OuterRef("pk"),
+            revenue_event__tipo="ALQUILER",
+            revenue_event__fecha_retorno_real__isnull=True,
+        )
+        .order_by("-revenue_event__fecha", "-revenue_event__created_at")
+        .values("revenue_event_id")[:1]
+    )
+    PurchasedUnit.objects.filter(estado="ALQUILADA", alquiler_activo__isnull=True).update(
+        alquiler_activo=Subquery(abierto)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("machinery", "0008_unit_alquiler_activo"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
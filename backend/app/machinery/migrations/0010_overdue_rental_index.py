@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-17 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machinery', '0009_backfill_alquiler_activo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='revenueevent',
+            index=models.Index(fields=['tipo', 'fecha_retorno_real', 'fecha_retorno_estimada'], name='revenue_eve_tipo_3c7f3f_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-17 17:49
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machinery', '0010_overdue_rental_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyFinanceLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('egresos', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+            ],
+            options={
+                'db_table': 'daily_finance_ledger',
+                'ordering': ['fecha'],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Sum
+
+ZERO = Decimal("0")
+
+
+def build(apps, schema_editor):
+    """Mismas reglas que FinanceLedgerService (con los modelos históricos)."""
+    RevenueEvent = apps.get_model("machinery", "RevenueEvent")
+    Purchase = apps.get_model("machinery", "Purchase")
+    DailyFinanceLedger = apps.get_model("machinery", "DailyFinanceLedger")
+
+    ingresos = defaultdict(lambda: ZERO)
+    egresos = defaultdict(lambda: ZERO)
+
+    # VENTA -> ingreso en fecha
+    for d, t in RevenueEvent.objects.filter(tipo="VENTA").values_list("fecha").annotate(t=Sum("monto_total")).order_by():
+        ingresos[d] += t or ZERO
+    # ALQUILER cerrado -> ingreso en fecha_retorno_real
+    alquileres = (
+        RevenueEvent.objects.filter(tipo="ALQUILER", fecha_retorno_real__isnull=False)
+        .values_list("fecha_retorno_real")
+        .annotate(t=Sum("monto_total"))
+        .order_by()
+    )
+    for d, t in alquileres:
+        ingresos[d] += t or ZERO
+    # Purchase -> egreso en fecha_compra
+    for d, t in Purchase.objects.values_list("fecha_compra").annotate(t=Sum("total_snapshot")).order_by():
+        egresos[d] += t or ZERO
+
+    DailyFinanceLedger.objects.all().delete()
+    DailyFinanceLedger.objects.bulk_create(
+        [
+            DailyFinanceLedger(fecha=d, ingresos=ingresos[d], egresos=egresos[d])
+            for d in sorted(set(ingresos) | set(egresos))
+            if ingresos[d] or egresos[d]
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    """Arranca daily_finance_ledger con los movimientos que ya existen."""
+
+    dependencies = [
+        ("machinery", "0011_daily_finance_ledger"),
+    ]
+
+    operations = [
+        migrations.RunPython(build, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.9 on 2026-10-17 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machinery', '0013_report_data_version'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='revenueevent',
+            name='revenue_eve_tipo_4fa947_idx',
+        ),
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(fields=['fecha_compra'], name='purchase_fecha_c_ac588b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='revenueevent',
+            index=models.Index(fields=['tipo', 'fecha'], name='revenue_eve_tipo_7be67e_idx'),
+        ),
+    ]
@@ -21,6 +21,8 @@ from .purchase import (
     PurchasedUnit,
     UnitStatus,
 )
+from .inventory import AvailabilityVersion, InventoryCounter
+from .finance import DailyFinanceLedger, ReportDataVersion
 from .revenue import (
     RevenueEvent,
     RevenueEventUnit,
@@ -45,6 +47,10 @@ __all__ = [
     "Purchase",
     "PurchasedUnit",
     "UnitStatus",
+    "InventoryCounter",
+    "AvailabilityVersion",
+    "DailyFinanceLedger",
+    "ReportDataVersion",
     "RevenueEvent",
     "RevenueEventUnit",
     "RevenueType",
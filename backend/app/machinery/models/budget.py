@@ -50,6 +50,8 @@ class Budget(TimeStampedModel):
         indexes = [
             models.Index(fields=["estado"]),
             models.Index(fields=["fecha"]),
+            # keyset del listado: (-fecha, -created_at, id)
+            models.Index(fields=["-fecha", "-created_at", "id"]),
         ]
 
     def __str__(self) -> str:
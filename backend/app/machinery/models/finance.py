@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.db import models
+
+
+class DailyFinanceLedger(models.Model):
+    """
+    Ingresos/egresos acumulados por día (solo días con movimientos).
+    Lo mantienen PurchaseService y UnitLifecycleService en la misma transacción que
+    escriben compras/ventas/cierres de alquiler; `manage.py rebuild_finance_ledger`
+    lo regenera desde revenue_event + purchase.
+    """
+
+    fecha = models.DateField(unique=True)
+    ingresos = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+    egresos = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        db_table = "daily_finance_ledger"
+        ordering = ["fecha"]
+
+    def __str__(self) -> str:
+        return f"{self.fecha}: +{self.ingresos} -{self.egresos}"
+
+
+class ReportDataVersion(models.Model):
+    """
+    Contador global (una sola fila) de cambios en datos que afectan los reportes.
+    Lo incrementa cada write path de compras/ingresos en su transacción; el cache de
+    reportes lo usa como parte de la clave, así una escritura invalida todo sin borrar nada.
+    """
+
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "report_data_version"
+
+    def __str__(self) -> str:
+        return f"v{self.version}"
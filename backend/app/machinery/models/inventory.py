@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from django.db import models
+from django.db.models import Q
+
+from .catalog import MachineBase
+from .purchase import UnitStatus
+
+
+class InventoryCounter(models.Model):
+    """
+    Contador de unidades por (máquina, estado) para el resumen del inventario.
+    Lo mantienen PurchaseService y UnitLifecycleService en la misma transacción que
+    mueven las unidades; `manage.py rebuild_inventory_counters` lo recalcula.
+    """
+
+    machine_base = models.ForeignKey(MachineBase, on_delete=models.CASCADE, related_name="contadores_inventario")
+    estado = models.CharField(max_length=12, choices=UnitStatus.choices)
+    cantidad = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "inventory_counter"
+        ordering = ["machine_base", "estado"]
+        constraints = [
+            models.UniqueConstraint(fields=["machine_base", "estado"], name="uq_inventory_counter"),
+            models.CheckConstraint(check=Q(cantidad__gte=0), name="ck_inventory_counter_non_negative"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.machine_base_id} {self.estado}: {self.cantidad}"
+
+
+class AvailabilityVersion(models.Model):
+    """
+    Contador global (una sola fila) de cambios en la ocupación de las unidades: compras,
+    alquileres, devoluciones y ventas. Cada proceso compara su índice de disponibilidad
+    contra este número; a diferencia de ReportDataVersion no lo suben los cambios que no
+    mueven unidades (ledger, presupuestos).
+    """
+
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "availability_version"
+
+    def __str__(self) -> str:
+        return f"v{self.version}"
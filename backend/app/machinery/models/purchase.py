@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from decimal import Decimal
+
 from django.db import models
 
 from .base import TimeStampedModel, USD_VALIDATOR
@@ -17,6 +19,10 @@ class Purchase(TimeStampedModel):
     class Meta:
         db_table = "purchase"
         ordering = ["-fecha_compra", "-created_at"]
+        indexes = [
+            # egresos por día (rama de compras del UNION ALL del ledger)
+            models.Index(fields=["fecha_compra"]),
+        ]
 
     def __str__(self) -> str:
         return f"Compra de {self.budget.numero}"
@@ -37,13 +43,35 @@ class PurchasedUnit(TimeStampedModel):
 
     identificador = models.CharField(max_length=200, blank=True, default="")
 
+    # Alquiler abierto de la unidad (lo setea mark_rented y lo limpia finish_rental):
+    # cerrar un alquiler es un lookup por PK en vez de buscarlo en el historial.
+    alquiler_activo = models.ForeignKey(
+        "RevenueEvent",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+
+    # Read model del inventario: copia de purchase/budget/machine_base para que el listado
+    # filtre y ordene sobre esta tabla sola (los mantiene PurchaseService / MachineBaseService;
+    # `manage.py sync_unit_read_model` los recalcula).
+    fecha_compra = models.DateField()
+    budget_numero = models.CharField(max_length=50, blank=True, default="")
+    machine_nombre = models.CharField(max_length=200, blank=True, default="")
+    total_compra = models.DecimalField(
+        max_digits=14, decimal_places=2, validators=[USD_VALIDATOR], default=Decimal("0.00")
+    )
+
     class Meta:
         db_table = "purchased_unit"
         ordering = ["-created_at"]
         indexes = [
-            models.Index(fields=["estado"]),
             models.Index(fields=["machine_base"]),
             models.Index(fields=["purchase"]),
+            # listado / keyset: (-fecha_compra, -created_at, id), con y sin filtro de estado
+            models.Index(fields=["-fecha_compra", "-created_at", "id"]),
+            models.Index(fields=["estado", "-fecha_compra", "-created_at", "id"]),
         ]
 
     def __str__(self) -> str:
@@ -54,8 +54,18 @@ class RevenueEvent(TimeStampedModel):
         db_table = "revenue_event"
         ordering = ["-fecha", "-created_at"]
         indexes = [
-            models.Index(fields=["tipo"]),
             models.Index(fields=["fecha"]),
+            # ventas por día: range scan por (tipo, fecha); también cubre los filtros solo por tipo
+            models.Index(fields=["tipo", "fecha"]),
+            # alquileres vencidos: tipo + sin retorno real + rango por retorno estimado.
+            # Su prefijo (tipo, fecha_retorno_real) sirve para los alquileres cerrados por día.
+            models.Index(fields=["tipo", "fecha_retorno_real", "fecha_retorno_estimada"]),
+            # alquileres abiertos (índice parcial: solo las filas sin retorno real)
+            models.Index(
+                fields=["fecha", "created_at"],
+                condition=Q(tipo=RevenueType.ALQUILER, fecha_retorno_real__isnull=True),
+                name="ix_revenue_open_rental",
+            ),
         ]
         constraints = [
             # Si es VENTA => retorno_estimada/real y monto_mensual deben ser NULL
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import F
+
+from machinery.models import AvailabilityVersion, PurchasedUnit, RevenueEventUnit, RevenueType
+
+# Meses como índice entero desde ene/2000 (los serializers de alquiler aceptan 2000..2100)
+BASE_YEAR = 2000
+HORIZON = (2101 - BASE_YEAR) * 12
+_FULL = (1 << HORIZON) - 1
+
+
+def month_index(year: int, month: int) -> int:
+    return min(max((int(year) - BASE_YEAR) * 12 + int(month) - 1, 0), HORIZON - 1)
+
+
+def date_index(d: date) -> int:
+    return month_index(d.year, d.month)
+
+
+def index_to_ym(i: int) -> str:
+    return f"{BASE_YEAR + i // 12:04d}-{i % 12 + 1:02d}"
+
+
+def range_mask(desde: int, hasta: int) -> int:
+    """Bits [desde, hasta] (inclusive) encendidos."""
+    return ((1 << (hasta - desde + 1)) - 1) << desde
+
+
+@dataclass(slots=True)
+class UnitCalendar:
+    """Meses ocupados de una unidad como bitmap (bit i = mes i desde BASE_YEAR)."""
+    unit_id: int
+    identificador: str
+    ocupado: int
+
+    def libre(self, mask: int) -> bool:
+        return not (self.ocupado & mask)
+
+
+@dataclass(frozen=True)
+class AvailabilityResult:
+    machine_base_id: int
+    desde: int
+    hasta: int
+    libres: List[UnitCalendar]
+    ocupadas: List[UnitCalendar]
+
+    def capacidad_por_mes(self) -> List[Tuple[str, int]]:
+        unidades = self.libres + self.ocupadas
+        return [
+            (index_to_ym(i), sum(1 for u in unidades if not (u.ocupado >> i) & 1))
+            for i in range(self.desde, self.hasta + 1)
+        ]
+
+
+# fila única del contador
+_VERSION_PK = 1
+
+
+def availability_version() -> int:
+    v = AvailabilityVersion.objects.filter(pk=_VERSION_PK).values_list("version", flat=True).first()
+    return v or 0
+
+
+def _bump_availability_version() -> int:
+    """
+    +1 al contador dentro de la transacción del writer y devuelve el valor nuevo. El UPDATE
+    bloquea la fila hasta el commit, así que las versiones quedan en orden de commit.
+    """
+    if not AvailabilityVersion.objects.filter(pk=_VERSION_PK).update(version=F("version") + 1):
+        AvailabilityVersion.objects.bulk_create([AvailabilityVersion(pk=_VERSION_PK, version=0)], ignore_conflicts=True)
+        AvailabilityVersion.objects.filter(pk=_VERSION_PK).update(version=F("version") + 1)
+    return AvailabilityVersion.objects.filter(pk=_VERSION_PK).values_list("version", flat=True).get()
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """Índice armado con los datos de `version` en el mes `hoy`. No se modifica: se reemplaza entero."""
+    version: int
+    hoy: int  # los alquileres abiertos ocupan hasta el mes actual
+    by_machine: Dict[int, Tuple[UnitCalendar, ...]]
+    machine_of: Dict[int, int]
+
+
+class AvailabilityIndex:
+    """
+    Índice de disponibilidad de la flota por máquina: un bitmap de meses ocupados por unidad.
+    - ocupado antes del mes de compra y desde el mes de venta en adelante
+    - alquiler: [fecha, retorno real]; si sigue abierto, hasta max(retorno estimado, mes actual)
+
+    Una consulta (máquina, rango de meses) es un AND por unidad. Versionado con
+    AvailabilityVersion, que solo suben las escrituras que mueven unidades:
+    - los services llaman a `changed(unit_ids)` en su transacción: sube la versión y, después
+      del commit, este proceso recalcula solo esas unidades (copia del índice + swap)
+    - cada consulta lee la versión (un SELECT por PK); si la subió otro proceso, o cambió el
+      mes, rearma el índice completo antes de responder
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+
+    # -------------------------
+    # Carga
+    # -------------------------
+    @staticmethod
+    def _load(hoy: int, unit_ids: Optional[Iterable[int]] = None) -> List[Tuple[int, UnitCalendar]]:
+        units = PurchasedUnit.objects.all()
+        rels = RevenueEventUnit.objects.all()
+        if unit_ids is not None:
+            units = units.filter(pk__in=unit_ids)
+            rels = rels.filter(purchased_unit_id__in=unit_ids)
+
+        cal: Dict[int, Tuple[int, UnitCalendar]] = {}
+        for uid, machine_id, ident, fecha_compra in units.values_list(
+            "id", "machine_base_id", "identificador", "fecha_compra"
+        ).order_by():
+            ocupado = range_mask(0, date_index(fecha_compra) - 1) if fecha_compra and date_index(fecha_compra) else 0
+            cal[uid] = (machine_id, UnitCalendar(unit_id=uid, identificador=ident, ocupado=ocupado))
+
+        for uid, tipo, fecha, estimada, real in rels.values_list(
+            "purchased_unit_id",
+            "revenue_event__tipo",
+            "revenue_event__fecha",
+            "revenue_event__fecha_retorno_estimada",
+            "revenue_event__fecha_retorno_real",
+        ).order_by():
+            entry = cal.get(uid)
+            if entry is None:
+                continue
+            u = entry[1]
+            inicio = date_index(fecha)
+            if tipo == RevenueType.VENTA:
+                u.ocupado |= _FULL & ~((1 << inicio) - 1)
+                continue
+            if real is not None:
+                fin = date_index(real)
+            else:
+                fin = max(date_index(estimada) if estimada else hoy, hoy)
+            if fin >= inicio:
+                u.ocupado |= range_mask(inicio, fin)
+
+        return list(cal.values())
+
+    def _current(self) -> _Snapshot:
+        version = availability_version()
+        with self._lock:
+            snap = self._snapshot
+        if snap is not None and snap.version == version and snap.hoy == date_index(date.today()):
+            return snap
+        return self.rebuild(version)
+
+    def rebuild(self, version: Optional[int] = None) -> _Snapshot:
+        """
+        Arma un índice nuevo y lo publica de una vez. La versión se lee antes de cargar: si
+        alguien escribe durante la carga, la próxima consulta ve otra versión y rearma.
+        """
+        if version is None:
+            version = availability_version()
+        hoy = date_index(date.today())
+        by_machine: Dict[int, List[UnitCalendar]] = {}
+        machine_of: Dict[int, int] = {}
+        for machine_id, u in self._load(hoy):
+            by_machine.setdefault(machine_id, []).append(u)
+            machine_of[u.unit_id] = machine_id
+        snap = _Snapshot(
+            version=version,
+            hoy=hoy,
+            by_machine={m: tuple(us) for m, us in by_machine.items()},
+            machine_of=machine_of,
+        )
+        with self._lock:
+            self._snapshot = snap
+        return snap
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
+    # -------------------------
+    # Escrituras
+    # -------------------------
+    def changed(self, unit_ids: Optional[Iterable[int]] = None) -> None:
+        """
+        Llamar dentro de la transacción que cambia la ocupación de esas unidades (None: todas,
+        p.ej. al borrar la demo). Sube AvailabilityVersion y aplica el delta después del commit.
+        """
+        ids = None if unit_ids is None else list(unit_ids)
+        version = _bump_availability_version()
+        if ids is None:
+            transaction.on_commit(self.invalidate)
+        else:
+            transaction.on_commit(lambda: self._apply(ids, version))
+
+    def _apply(self, unit_ids: List[int], version: int) -> None:
+        """
+        Recalcula solo `unit_ids` y publica una copia del índice con `version`, si el índice
+        estaba en la versión inmediatamente anterior (nadie más escribió en el medio). Si no,
+        no hace nada: la próxima consulta ve la diferencia y rearma.
+        """
+        with self._lock:
+            snap = self._snapshot
+        if snap is None or snap.version != version - 1 or snap.hoy != date_index(date.today()):
+            return
+
+        frescas = self._load(snap.hoy, unit_ids)
+        ids = set(unit_ids)
+        by_machine = dict(snap.by_machine)
+        machine_of = dict(snap.machine_of)
+        tocadas = {machine_of.pop(uid) for uid in ids if uid in machine_of}
+        tocadas.update(machine_id for machine_id, _ in frescas)
+        for machine_id in tocadas:
+            by_machine[machine_id] = tuple(u for u in by_machine.get(machine_id, ()) if u.unit_id not in ids)
+        for machine_id, u in frescas:
+            by_machine[machine_id] += (u,)
+            machine_of[u.unit_id] = machine_id
+
+        with self._lock:
+            # otro _apply/rebuild pudo publicar mientras cargábamos: gana el que llegó primero
+            if self._snapshot is snap:
+                self._snapshot = _Snapshot(version=version, hoy=snap.hoy, by_machine=by_machine, machine_of=machine_of)
+
+    # -------------------------
+    # Consultas
+    # -------------------------
+    def query(self, *, machine_base_id: int, desde: int, hasta: int) -> AvailabilityResult:
+        mask = range_mask(desde, hasta)
+        libres: List[UnitCalendar] = []
+        ocupadas: List[UnitCalendar] = []
+        for u in self._current().by_machine.get(machine_base_id, ()):
+            (libres if u.libre(mask) else ocupadas).append(u)
+
+        key = lambda u: u.unit_id  # noqa: E731
+        return AvailabilityResult(
+            machine_base_id=machine_base_id,
+            desde=desde,
+            hasta=hasta,
+            libres=sorted(libres, key=key),
+            ocupadas=sorted(ocupadas, key=key),
+        )
+
+
+# Índice del proceso (lo comparten las vistas y los services)
+availability_index = AvailabilityIndex()
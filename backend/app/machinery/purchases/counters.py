@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+
+from machinery.models import InventoryCounter, PurchasedUnit, UnitStatus
+
+# (machine_base_id, estado) -> delta
+Key = Tuple[int, str]
+
+
+@dataclass(frozen=True)
+class CounterDrift:
+    machine_base_id: int
+    estado: str
+    contador: int
+    real: int
+
+
+class InventoryCounterService:
+    """
+    Contadores de inventario por (máquina, estado). Los llaman los services que crean
+    o mueven unidades, siempre dentro de su transacción.
+    """
+
+    @staticmethod
+    def apply(deltas: Dict[Key, int]) -> None:
+        """
+        Suma los deltas en dos queries fijas (sin importar cuántas claves):
+        - INSERT ... ON CONFLICT DO NOTHING de las filas que falten (cantidad 0)
+        - un UPDATE con CASE: cantidad = cantidad + delta(clave)
+        """
+        deltas = {k: d for k, d in deltas.items() if d}
+        if not deltas:
+            return
+
+        InventoryCounter.objects.bulk_create(
+            [InventoryCounter(machine_base_id=m, estado=e, cantidad=0) for (m, e) in deltas],
+            ignore_conflicts=True,
+        )
+
+        match = Q()
+        whens = []
+        for (m, e), d in deltas.items():
+            key = Q(machine_base_id=m, estado=e)
+            match |= key
+            whens.append(When(key, then=Value(d)))
+
+        InventoryCounter.objects.filter(match).update(
+            cantidad=F("cantidad") + Case(*whens, default=Value(0), output_field=IntegerField())
+        )
+
+    @classmethod
+    def add(cls, machine_base_ids: Iterable[int], estado: str) -> None:
+        """Unidades nuevas (una entrada por unidad) que entran en `estado`."""
+        cls.apply({(m, estado): n for m, n in Counter(machine_base_ids).items()})
+
+    @classmethod
+    def move(cls, machine_base_ids: Iterable[int], *, desde: str, hacia: str) -> None:
+        """Unidades (una entrada por unidad) que pasan de `desde` a `hacia`."""
+        deltas: Dict[Key, int] = {}
+        for m, n in Counter(machine_base_ids).items():
+            deltas[(m, desde)] = -n
+            deltas[(m, hacia)] = n
+        cls.apply(deltas)
+
+    @staticmethod
+    def summary() -> List[Dict]:
+        """Una fila por máquina con unidades por estado (solo lee inventory_counter)."""
+        rows: Dict[int, Dict] = {}
+        qs = (
+            InventoryCounter.objects.filter(cantidad__gt=0)
+            .values_list("machine_base_id", "machine_base__nombre", "estado", "cantidad")
+            .order_by("machine_base__nombre", "machine_base_id")
+        )
+        for machine_id, nombre, estado, cantidad in qs:
+            row = rows.get(machine_id)
+            if row is None:
+                row = {"machine_base": machine_id, "machine_nombre": nombre, "total": 0}
+                row.update({s: 0 for s in UnitStatus.values})
+                rows[machine_id] = row
+            row[estado] = cantidad
+            row["total"] += cantidad
+        return list(rows.values())
+
+    @staticmethod
+    def _actual() -> Dict[Key, int]:
+        qs = PurchasedUnit.objects.values("machine_base_id", "estado").annotate(n=Count("id")).order_by()
+        return {(r["machine_base_id"], r["estado"]): r["n"] for r in qs}
+
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls, *, fix: bool = True) -> List[CounterDrift]:
+        """
+        Recalcula los contadores con un GROUP BY sobre purchased_unit y devuelve las
+        diferencias encontradas. fix=False: solo las reporta.
+        """
+        # lock de la tabla de contadores: nadie los mueve mientras comparamos/reescribimos
+        current = {
+            (c.machine_base_id, c.estado): c.cantidad
+            for c in InventoryCounter.objects.select_for_update()
+        }
+        actual = cls._actual()
+
+        drift = [
+            CounterDrift(machine_base_id=m, estado=e, contador=current.get((m, e), 0), real=actual.get((m, e), 0))
+            for (m, e) in sorted(set(current) | set(actual))
+            if current.get((m, e), 0) != actual.get((m, e), 0)
+        ]
+
+        if fix and drift:
+            InventoryCounter.objects.all().delete()
+            InventoryCounter.objects.bulk_create(
+                [InventoryCounter(machine_base_id=m, estado=e, cantidad=n) for (m, e), n in actual.items()]
+            )
+        return drift
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+from typing import Any, Dict, Iterator, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from machinery.models import RevenueEventUnit, RevenueType
+
+# filas por fetch del cursor (memoria constante aunque haya cientos de miles de eventos)
+CHUNK_SIZE = 2000
+
+_COLUMNS = (
+    "revenue_event_id",
+    "purchased_unit_id",
+    "purchased_unit__identificador",
+    "purchased_unit__machine_base_id",
+    "purchased_unit__machine_nombre",
+    "revenue_event__cliente_texto",
+    "revenue_event__fecha",
+    "revenue_event__fecha_retorno_estimada",
+    "revenue_event__monto_mensual",
+)
+
+
+def _month(d: date) -> int:
+    return d.year * 12 + d.month - 1
+
+
+def iter_overdue(*, hoy: Optional[date] = None, machine_base_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Alquileres vencidos (una fila por unidad): abiertos (sin retorno real) y con retorno
+    estimado anterior al mes actual. Ordenados del más atrasado al menos atrasado.
+
+    El filtro es un range scan del índice (tipo, fecha_retorno_real, fecha_retorno_estimada)
+    y se recorre con un cursor por chunks.
+    """
+    hoy = hoy or date.today()
+    mes_actual = date(hoy.year, hoy.month, 1)
+
+    qs = RevenueEventUnit.objects.filter(
+        revenue_event__tipo=RevenueType.ALQUILER,
+        revenue_event__fecha_retorno_real__isnull=True,
+        revenue_event__fecha_retorno_estimada__lt=mes_actual,
+    )
+    if machine_base_id is not None:
+        qs = qs.filter(purchased_unit__machine_base_id=machine_base_id)
+
+    rows = qs.values_list(*_COLUMNS).order_by(
+        "revenue_event__fecha_retorno_estimada", "revenue_event_id", "purchased_unit_id"
+    )
+    for ev_id, unit_id, ident, machine_id, machine_nombre, cliente, inicio, estimada, mensual in rows.iterator(
+        chunk_size=CHUNK_SIZE
+    ):
+        yield {
+            "revenue_event_id": ev_id,
+            "unit_id": unit_id,
+            "identificador": ident,
+            "machine_base": machine_id,
+            "machine_nombre": machine_nombre,
+            "cliente_texto": cliente,
+            "fecha_inicio": inicio,
+            "fecha_retorno_estimada": estimada,
+            "meses_vencido": _month(mes_actual) - _month(estimada),
+            "monto_mensual": str(mensual) if mensual is not None else None,
+        }
+
+
+def iter_overdue_ndjson(**kwargs) -> Iterator[str]:
+    for row in iter_overdue(**kwargs):
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
@@ -3,6 +3,7 @@ from __future__ import annotations
 from rest_framework import serializers
 
 from machinery.models import PurchasedUnit, BudgetItemAccessory, RevenueType
+from machinery.shared.fieldsets import SparseFieldsetSerializerMixin
 
 
 class PurchasedUnitAccessorySerializer(serializers.ModelSerializer):
@@ -20,14 +21,15 @@ class PurchasedUnitAccessorySerializer(serializers.ModelSerializer):
         ]
 
 
-class PurchasedUnitListSerializer(serializers.ModelSerializer):
-    machine_nombre = serializers.CharField(source="machine_base.nombre", read_only=True)
-    fecha_compra = serializers.DateField(source="purchase.fecha_compra", read_only=True)
-    budget_numero = serializers.CharField(source="purchase.budget.numero", read_only=True)
-    purchase_id = serializers.IntegerField(source="purchase.id", read_only=True)
+class PurchasedUnitListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    # ✅ read model: todo sale de columnas de purchased_unit (sin joins)
+    machine_nombre = serializers.CharField(read_only=True)
+    fecha_compra = serializers.DateField(read_only=True)
+    budget_numero = serializers.CharField(read_only=True)
+    purchase_id = serializers.IntegerField(read_only=True)
 
     # ✅ IMPORTANTE: para sugerencias de precio desde el listado
-    total_compra = serializers.CharField(source="purchase.total_snapshot", read_only=True)
+    total_compra = serializers.CharField(read_only=True)
 
     class Meta:
         model = PurchasedUnit
@@ -66,13 +68,13 @@ class RevenueEventForUnitSerializer(serializers.Serializer):
     updated_at = serializers.DateTimeField()
 
 
-class PurchasedUnitDetailSerializer(serializers.ModelSerializer):
-    machine_nombre = serializers.CharField(source="machine_base.nombre", read_only=True)
-    fecha_compra = serializers.DateField(source="purchase.fecha_compra", read_only=True)
-    budget_numero = serializers.CharField(source="purchase.budget.numero", read_only=True)
-    purchase_id = serializers.IntegerField(source="purchase.id", read_only=True)
+class PurchasedUnitDetailSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    machine_nombre = serializers.CharField(read_only=True)
+    fecha_compra = serializers.DateField(read_only=True)
+    budget_numero = serializers.CharField(read_only=True)
+    purchase_id = serializers.IntegerField(read_only=True)
 
-    total_compra = serializers.CharField(source="purchase.total_snapshot", read_only=True)
+    total_compra = serializers.CharField(read_only=True)
     notas_compra = serializers.CharField(source="purchase.notas", read_only=True)
 
     accesorios = serializers.SerializerMethodField()
@@ -102,8 +104,8 @@ class PurchasedUnitDetailSerializer(serializers.ModelSerializer):
         ]
 
     def get_accesorios(self, obj):
-        qs = obj.budget_item.accesorios.select_related("accessory").order_by("accessory__nombre", "id")
-        return PurchasedUnitAccessorySerializer(qs, many=True).data
+        # ✅ prefetch ordenado (PurchasedUnitQueries): sin query por unidad
+        return PurchasedUnitAccessorySerializer(obj.budget_item.accesorios.all(), many=True).data
 
     @staticmethod
     def _map_revenue(ev):
@@ -134,24 +136,19 @@ class PurchasedUnitDetailSerializer(serializers.ModelSerializer):
         }
         return RevenueEventForUnitSerializer(data).data
 
+    @staticmethod
+    def _events(obj, tipo):
+        # revenue_usos viene prefetcheado con el evento y ordenado (más reciente primero)
+        return [r.revenue_event for r in obj.revenue_usos.all() if r.revenue_event.tipo == tipo]
+
     def get_venta(self, obj):
-        rels = (
-            obj.revenue_usos.select_related("revenue_event")
-            .filter(revenue_event__tipo=RevenueType.VENTA)
-            .order_by("-revenue_event__fecha", "-revenue_event__created_at")
-        )
-        rel = rels.first()
-        if not rel:
+        ventas = self._events(obj, RevenueType.VENTA)
+        if not ventas:
             return None
-        return self._map_revenue(rel.revenue_event)
+        return self._map_revenue(ventas[0])
 
     def get_alquileres(self, obj):
-        rels = (
-            obj.revenue_usos.select_related("revenue_event")
-            .filter(revenue_event__tipo=RevenueType.ALQUILER)
-            .order_by("-revenue_event__fecha", "-revenue_event__created_at")
-        )
-        return [self._map_revenue(r.revenue_event) for r in rels]
+        return [self._map_revenue(ev) for ev in self._events(obj, RevenueType.ALQUILER)]
 
 
 class UnitMarkRentedSerializer(serializers.Serializer):
@@ -184,3 +181,50 @@ class UnitMarkSoldSerializer(serializers.Serializer):
     monto_total = serializers.DecimalField(max_digits=14, decimal_places=2)
     cliente_texto = serializers.CharField(max_length=200, required=False, allow_blank=True, default="")
     notas = serializers.CharField(required=False, allow_blank=True, default="")
+
+
+# Tope de unidades por transición en lote
+MAX_BULK_UNITS = 500
+
+
+class _BulkUnitsMixin(serializers.Serializer):
+    unit_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_UNITS,
+    )
+
+    def validate_unit_ids(self, value):
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError("Hay unidades repetidas.")
+        return value
+
+
+class UnitBulkMarkRentedSerializer(_BulkUnitsMixin, UnitMarkRentedSerializer):
+    # monto_mensual es por unidad (igual que en el alta individual)
+    cliente_texto = serializers.CharField(max_length=200, required=False, allow_blank=True, default="")
+
+
+class UnitBulkFinishRentalSerializer(_BulkUnitsMixin, UnitFinishRentalSerializer):
+    pass
+
+
+class UnitBulkMarkSoldSerializer(_BulkUnitsMixin, UnitMarkSoldSerializer):
+    # monto_total es el total de la venta (todas las unidades)
+    pass
+
+
+class AvailabilityQuerySerializer(serializers.Serializer):
+    machine_base = serializers.IntegerField(min_value=1)
+    desde = serializers.RegexField(r"^\d{4}-(0[1-9]|1[0-2])$", help_text="YYYY-MM")
+    hasta = serializers.RegexField(r"^\d{4}-(0[1-9]|1[0-2])$", help_text="YYYY-MM")
+
+    def validate(self, attrs):
+        for k in ("desde", "hasta"):
+            y, m = attrs[k].split("-")
+            if not 2000 <= int(y) <= 2100:
+                raise serializers.ValidationError({k: "Año fuera de rango (2000-2100)."})
+            attrs[k] = (int(y), int(m))
+        if attrs["hasta"] < attrs["desde"]:
+            raise serializers.ValidationError("hasta no puede ser anterior a desde.")
+        return attrs
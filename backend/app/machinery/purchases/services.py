@@ -1,26 +1,33 @@
 from __future__ import annotations
 
 from datetime import date
-from django.db import transaction
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, List, Sequence, Tuple
+
+from django.db import models, transaction
+from django.db.models import OuterRef, Prefetch, Q, Subquery
 from django.utils import timezone
 
-from machinery.models import Budget, BudgetStatus, Purchase, PurchasedUnit, UnitStatus, RevenueEvent, RevenueType, \
+from machinery.models import Budget, BudgetItem, BudgetItemAccessory, BudgetStatus, MachineBase, Purchase, PurchasedUnit, UnitStatus, \
+    RevenueEvent, RevenueType, \
     RevenueEventUnit
 from machinery.shared.errors import DomainError, ErrorCodes
 
+from machinery.reports.cache import bump_data_version, data_version_batch
+from machinery.reports.ledger import FinanceLedgerService
+
+from .availability import availability_index
+from .counters import InventoryCounterService
+
 
 class PurchaseService:
     @transaction.atomic
+    @data_version_batch()
     def create_purchase_from_budget(self, *, budget_id: int, fecha_compra: str | None, notas: str = "") -> Purchase:
         budget = (
             Budget.objects.select_for_update()
             .select_related("compra")
-            .prefetch_related(
-                "items",
-                "items__accesorios",
-                "logisticas",
-                "impuestos",
-            )
+            .prefetch_related(self.items_prefetch())  # ✅ solo usamos items (+ nombre de la máquina)
             .get(pk=budget_id)
         )
 
@@ -38,34 +45,164 @@ class PurchaseService:
                 details={"budget_id": budget.id, "purchase_id": budget.compra.id},
             )
 
-        # fecha compra
-        if fecha_compra:
-            f = date.fromisoformat(fecha_compra)
-        else:
-            f = timezone.now().date()
-
         purchase = Purchase.objects.create(
             budget=budget,
-            fecha_compra=f,
+            fecha_compra=self._fecha_compra(fecha_compra),
             total_snapshot=budget.total_snapshot,
             notas=notas or "",
         )
 
-        # Crear unidades (una por item * cantidad)
-        for it in budget.items.all():
-            for i in range(it.cantidad):
-                PurchasedUnit.objects.create(
-                    purchase=purchase,
-                    budget_item=it,
-                    machine_base=it.machine_base,
-                    estado=UnitStatus.DEPOSITO,
-                    identificador=f"{budget.numero}-{it.machine_base_id}-{i+1}",
-                )
+        # Crear unidades (una por item * cantidad) en un solo INSERT
+        units = PurchasedUnit.objects.bulk_create(self._build_units(purchase=purchase, budget=budget))
+        InventoryCounterService.add((u.machine_base_id for u in units), UnitStatus.DEPOSITO)
+        availability_index.changed(u.id for u in units)
+        FinanceLedgerService.add_egresos([(purchase.fecha_compra, purchase.total_snapshot)])
 
         return purchase
 
+    def create_purchases_for_budgets(
+        self,
+        *,
+        budgets: Sequence[Budget],
+        fechas_compra: Dict[int, date | str | None],
+        notas: Dict[int, str],
+    ) -> List[Purchase]:
+        """
+        Compra en lote: `budgets` ya vienen bloqueados, validados y CERRADOS por el caller
+        (con `items_prefetch()`), así que no se vuelven a leer.
+        Una compra por presupuesto y todas las unidades con dos INSERT en total.
+        """
+        purchases = Purchase.objects.bulk_create(
+            [
+                Purchase(
+                    budget=b,
+                    fecha_compra=self._fecha_compra(fechas_compra.get(b.id)),
+                    total_snapshot=b.total_snapshot,
+                    notas=notas.get(b.id) or "",
+                )
+                for b in budgets
+            ]
+        )
+        units = PurchasedUnit.objects.bulk_create(
+            [u for p in purchases for u in self._build_units(purchase=p, budget=p.budget)]
+        )
+        InventoryCounterService.add((u.machine_base_id for u in units), UnitStatus.DEPOSITO)
+        availability_index.changed(u.id for u in units)
+        FinanceLedgerService.add_egresos((p.fecha_compra, p.total_snapshot) for p in purchases)
+        return purchases
+
+    @staticmethod
+    def _fecha_compra(fecha_compra: str | date | None) -> date:
+        if isinstance(fecha_compra, date):
+            return fecha_compra
+        if fecha_compra:
+            return date.fromisoformat(fecha_compra)
+        return timezone.now().date()
+
+    @staticmethod
+    def items_prefetch() -> Prefetch:
+        """Items del budget con su máquina (el nombre va al read model de la unidad)."""
+        return Prefetch("items", queryset=BudgetItem.objects.select_related("machine_base"))
+
+    @staticmethod
+    def _build_units(*, purchase: Purchase, budget: Budget) -> List[PurchasedUnit]:
+        """
+        Unidades en memoria (una por item * cantidad); identificador: numero-machine-n.
+        Ya salen con las columnas del read model (fecha/número/máquina/total).
+        """
+        return [
+            PurchasedUnit(
+                purchase=purchase,
+                budget_item=it,
+                machine_base_id=it.machine_base_id,
+                estado=UnitStatus.DEPOSITO,
+                identificador=f"{budget.numero}-{it.machine_base_id}-{i+1}",
+                fecha_compra=purchase.fecha_compra,
+                budget_numero=budget.numero,
+                machine_nombre=it.machine_base.nombre,
+                total_compra=purchase.total_snapshot,
+            )
+            for it in budget.items.all()
+            for i in range(it.cantidad)
+        ]
+
+    @staticmethod
+    @transaction.atomic
+    def sync_unit_read_model(*, fix: bool = True) -> int:
+        """
+        Recalcula las columnas denormalizadas de PurchasedUnit desde purchase/budget/machine_base.
+        Devuelve cuántas unidades estaban desfasadas (fix=False: solo las cuenta).
+        """
+        purchase = Purchase.objects.filter(pk=OuterRef("purchase_id"))
+        source = {
+            "fecha_compra": Subquery(purchase.values("fecha_compra")[:1]),
+            "budget_numero": Subquery(purchase.values("budget__numero")[:1]),
+            "machine_nombre": Subquery(MachineBase.objects.filter(pk=OuterRef("machine_base_id")).values("nombre")[:1]),
+            "total_compra": Subquery(purchase.values("total_snapshot")[:1]),
+        }
+        drift = PurchasedUnit.objects.filter(
+            Q(fecha_compra__isnull=True)
+            | ~Q(fecha_compra=models.F("purchase__fecha_compra"))
+            | ~Q(budget_numero=models.F("purchase__budget__numero"))
+            | ~Q(machine_nombre=models.F("machine_base__nombre"))
+            | ~Q(total_compra=models.F("purchase__total_snapshot"))
+        )
+        n = drift.count()
+        if n and fix:
+            PurchasedUnit.objects.filter(pk__in=drift.values("pk")).update(**source)
+        return n
+
+
+class PurchasedUnitQueries:
+    # joins que usa el detalle (el listado lee todo de purchased_unit)
+    SELECT = ("purchase",)
+
+    @staticmethod
+    def prefetches() -> Dict[str, Prefetch]:
+        """
+        Prefetch ordenados para el detalle (los serializers no hacen queries por fila):
+        - revenue_usos con su evento, del más reciente al más viejo
+        - accesorios del item por nombre
+        """
+        return {
+            "revenue_usos": Prefetch(
+                "revenue_usos",
+                queryset=RevenueEventUnit.objects.select_related("revenue_event").order_by(
+                    "-revenue_event__fecha", "-revenue_event__created_at"
+                ),
+            ),
+            "budget_item__accesorios": Prefetch(
+                "budget_item__accesorios",
+                queryset=BudgetItemAccessory.objects.select_related("accessory").order_by("accessory__nombre", "id"),
+            ),
+        }
+
+    @classmethod
+    def lookups(cls, relations=None) -> list:
+        """relations: claves de `prefetches()` a cargar (None = todas)."""
+        prefetches = cls.prefetches()
+        if relations is not None:
+            prefetches = {k: v for k, v in prefetches.items() if k in set(relations)}
+        return list(prefetches.values())
+
+    @classmethod
+    def detail_qs(cls, relations=None):
+        return PurchasedUnit.objects.select_related(*cls.SELECT).prefetch_related(*cls.lookups(relations))
+
 
 class UnitLifecycleService:
+    @staticmethod
+    def _lock_unit(unit_id: int) -> PurchasedUnit:
+        """
+        Lock de la unidad (solo su fila: of=self) trayendo en el mismo SELECT los joins
+        del detalle, así la vista serializa esta misma instancia sin volver a leerla.
+        """
+        return (
+            PurchasedUnit.objects.select_for_update(of=("self",))
+            .select_related(*PurchasedUnitQueries.SELECT)
+            .get(pk=unit_id)
+        )
+
     @staticmethod
     def _ym_to_date(*, year: int, month: int) -> date:
         return date(int(year), int(month), 1)
@@ -78,6 +215,7 @@ class UnitLifecycleService:
 
     @staticmethod
     @transaction.atomic
+    @data_version_batch()
     def mark_rented(
         *,
         unit_id: int,
@@ -89,7 +227,7 @@ class UnitLifecycleService:
         cliente_texto: str = "",
         notas: str = "",
     ) -> PurchasedUnit:
-        unit = PurchasedUnit.objects.select_for_update().select_related("machine_base").get(pk=unit_id)
+        unit = UnitLifecycleService._lock_unit(unit_id)
 
         if unit.estado != UnitStatus.DEPOSITO:
             raise DomainError(
@@ -121,13 +259,18 @@ class UnitLifecycleService:
         RevenueEventUnit.objects.create(revenue_event=ev, purchased_unit=unit)
 
         unit.estado = UnitStatus.ALQUILADA
-        unit.save(update_fields=["estado"])
+        unit.alquiler_activo = ev
+        unit.save(update_fields=["estado", "alquiler_activo"])
+        InventoryCounterService.move([unit.machine_base_id], desde=UnitStatus.DEPOSITO, hacia=UnitStatus.ALQUILADA)
+        availability_index.changed([unit.id])
+        bump_data_version()  # alquiler abierto: cambia el reporte en modo devengado
         return unit
 
     @staticmethod
     @transaction.atomic
+    @data_version_batch()
     def finish_rental(*, unit_id: int, retorno_real_year: int, retorno_real_month: int) -> PurchasedUnit:
-        unit = PurchasedUnit.objects.select_for_update().get(pk=unit_id)
+        unit = UnitLifecycleService._lock_unit(unit_id)
 
         if unit.estado != UnitStatus.ALQUILADA:
             raise DomainError(
@@ -136,25 +279,16 @@ class UnitLifecycleService:
                 details={"unit_id": unit.id, "estado_actual": unit.estado},
             )
 
-        rel = (
-            RevenueEventUnit.objects.select_related("revenue_event")
-            .filter(
-                purchased_unit=unit,
-                revenue_event__tipo=RevenueType.ALQUILER,
-                revenue_event__fecha_retorno_real__isnull=True,
-            )
-            .order_by("-revenue_event__fecha", "-revenue_event__created_at")
-            .first()
-        )
-
-        if not rel:
+        ev = UnitLifecycleService._open_rentals([unit]).get(unit.id)
+        if ev is None:
             raise DomainError(
                 ErrorCodes.NOT_FOUND,
                 message_override="No se encontró un alquiler activo para esta unidad.",
                 details={"unit_id": unit.id},
             )
 
-        ev = rel.revenue_event
+        # alquiler de flota: la unidad que vuelve antes pasa a un evento propio
+        ev = UnitLifecycleService._split_off(ev, [unit.id])
         fecha_retorno_real = UnitLifecycleService._ym_to_date(year=retorno_real_year, month=retorno_real_month)
 
         # Recalculamos total en base al período real, usando el monto mensual guardado
@@ -168,13 +302,18 @@ class UnitLifecycleService:
         ev.fecha_retorno_real = fecha_retorno_real
         ev.monto_total = monto_mensual * meses
         ev.save(update_fields=["fecha_retorno_real", "monto_total"])
+        FinanceLedgerService.add_ingresos([(fecha_retorno_real, ev.monto_total)])
 
         unit.estado = UnitStatus.DEPOSITO
-        unit.save(update_fields=["estado"])
+        unit.alquiler_activo = None
+        unit.save(update_fields=["estado", "alquiler_activo"])
+        InventoryCounterService.move([unit.machine_base_id], desde=UnitStatus.ALQUILADA, hacia=UnitStatus.DEPOSITO)
+        availability_index.changed([unit.id])
         return unit
 
     @staticmethod
     @transaction.atomic
+    @data_version_batch()
     def mark_sold(
         *,
         unit_id: int,
@@ -183,7 +322,7 @@ class UnitLifecycleService:
         cliente_texto: str = "",
         notas: str = "",
     ) -> PurchasedUnit:
-        unit = PurchasedUnit.objects.select_for_update().get(pk=unit_id)
+        unit = UnitLifecycleService._lock_unit(unit_id)
 
         if unit.estado != UnitStatus.DEPOSITO:
             raise DomainError(
@@ -199,8 +338,266 @@ class UnitLifecycleService:
             cliente_texto=cliente_texto or "",
             notas=notas or "",
         )
+        FinanceLedgerService.add_ingresos([(ev.fecha, ev.monto_total)])
         RevenueEventUnit.objects.create(revenue_event=ev, purchased_unit=unit)
 
         unit.estado = UnitStatus.VENDIDA
         unit.save(update_fields=["estado"])
+        InventoryCounterService.move([unit.machine_base_id], desde=UnitStatus.DEPOSITO, hacia=UnitStatus.VENDIDA)
+        availability_index.changed([unit.id])
         return unit
+
+    # -------------------------
+    # Transiciones en lote (un evento compartido para todas las unidades)
+    # -------------------------
+    @staticmethod
+    def _lock_units(*, unit_ids: Sequence[int], estado: str, message: str) -> List[PurchasedUnit]:
+        """
+        Lock del set completo con un único select_for_update ordenado por id (sin deadlocks
+        entre lotes que se pisan) y chequeo de estado de todas las unidades antes de escribir.
+        """
+        ids = sorted({int(i) for i in unit_ids})
+        units = list(PurchasedUnit.objects.select_for_update().filter(pk__in=ids).order_by("pk"))
+
+        missing = sorted(set(ids) - {u.id for u in units})
+        if missing:
+            raise DomainError(ErrorCodes.NOT_FOUND, details={"unit_ids": missing})
+
+        invalid = [{"unit_id": u.id, "estado_actual": u.estado} for u in units if u.estado != estado]
+        if invalid:
+            raise DomainError(ErrorCodes.CONFLICT, message_override=message, details={"unidades": invalid})
+        return units
+
+    @staticmethod
+    def _set_estado(units: List[PurchasedUnit], estado: str, **extra) -> None:
+        """
+        Un solo UPDATE para todo el set (y sincroniza las instancias en memoria).
+        Las unidades ya se validaron todas en el mismo estado (_lock_units).
+        extra: otras columnas con el mismo valor para todo el set (p.ej. alquiler_activo).
+        """
+        InventoryCounterService.move((u.machine_base_id for u in units), desde=units[0].estado, hacia=estado)
+        availability_index.changed([u.id for u in units])
+        now = timezone.now()
+        values = {"estado": estado, "updated_at": now, **extra}
+        PurchasedUnit.objects.filter(pk__in=[u.id for u in units]).update(**values)
+        for u in units:
+            for k, v in values.items():
+                setattr(u, k, v)
+
+    @staticmethod
+    def _open_rentals(units: Sequence[PurchasedUnit]) -> Dict[int, RevenueEvent]:
+        """
+        unit_id -> alquiler abierto. Por el puntero `alquiler_activo` es un lookup por PK;
+        las unidades alquiladas antes de que existiera el puntero caen a la búsqueda en el
+        historial (índice parcial ix_revenue_open_rental).
+        """
+        by_pk = RevenueEvent.objects.in_bulk({u.alquiler_activo_id for u in units if u.alquiler_activo_id})
+        out = {
+            u.id: by_pk[u.alquiler_activo_id]
+            for u in units
+            if u.alquiler_activo_id in by_pk and by_pk[u.alquiler_activo_id].fecha_retorno_real is None
+        }
+
+        legacy = [u.id for u in units if u.id not in out]
+        if legacy:
+            rels = (
+                RevenueEventUnit.objects.select_related("revenue_event")
+                .filter(
+                    purchased_unit_id__in=legacy,
+                    revenue_event__tipo=RevenueType.ALQUILER,
+                    revenue_event__fecha_retorno_real__isnull=True,
+                )
+                .order_by("purchased_unit_id", "-revenue_event__fecha", "-revenue_event__created_at")
+            )
+            for rel in rels:
+                out.setdefault(rel.purchased_unit_id, rel.revenue_event)
+        return out
+
+    @staticmethod
+    def _link_units(ev: RevenueEvent, units: List[PurchasedUnit]) -> None:
+        RevenueEventUnit.objects.bulk_create(
+            [RevenueEventUnit(revenue_event=ev, purchased_unit=u) for u in units]
+        )
+
+    @staticmethod
+    def _split_off(ev: RevenueEvent, unit_ids: Sequence[int]) -> RevenueEvent:
+        """
+        Devolución anticipada de parte de un alquiler compartido: las unidades de unit_ids
+        pasan a un evento propio (abierto, con su parte del mensual prorrateada por unidad)
+        y el original sigue con el resto. Si el evento no tiene otras unidades se devuelve tal cual.
+
+        Lock del evento antes de contar sus unidades: dos devoluciones parciales del mismo
+        alquiler se serializan y la segunda prorratea sobre lo que dejó la primera.
+        Los centavos del redondeo quedan en el original (la suma de mensuales no cambia).
+        """
+        ev = RevenueEvent.objects.select_for_update().get(pk=ev.pk)
+        n = RevenueEventUnit.objects.filter(revenue_event=ev).count()
+        if n <= len(unit_ids):
+            return ev
+
+        meses = UnitLifecycleService._months_inclusive(
+            start_year=ev.fecha.year,
+            start_month=ev.fecha.month,
+            end_year=ev.fecha_retorno_estimada.year,
+            end_month=ev.fecha_retorno_estimada.month,
+        )
+        mensual = ev.monto_mensual or Decimal("0")
+        parte = (mensual * len(unit_ids) / n).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+        nuevo = RevenueEvent.objects.create(
+            tipo=RevenueType.ALQUILER,
+            fecha=ev.fecha,
+            monto_mensual=parte,
+            monto_total=parte * meses,
+            cliente_texto=ev.cliente_texto,
+            fecha_retorno_estimada=ev.fecha_retorno_estimada,
+            notas=ev.notas,
+        )
+        RevenueEventUnit.objects.filter(revenue_event=ev, purchased_unit_id__in=unit_ids).update(revenue_event=nuevo)
+
+        ev.monto_mensual = mensual - parte
+        ev.monto_total = ev.monto_mensual * meses
+        ev.save(update_fields=["monto_mensual", "monto_total", "updated_at"])
+        return nuevo
+
+    @staticmethod
+    @transaction.atomic
+    @data_version_batch()
+    def mark_rented_many(
+        *,
+        unit_ids: Sequence[int],
+        inicio_year: int,
+        inicio_month: int,
+        retorno_estimada_year: int,
+        retorno_estimada_month: int,
+        monto_mensual,
+        cliente_texto: str = "",
+        notas: str = "",
+    ) -> Tuple[RevenueEvent, List[PurchasedUnit]]:
+        """
+        Alquiler de flota: un único evento ALQUILER para todas las unidades.
+        monto_mensual es por unidad; el evento guarda el mensual del contrato (x unidades).
+        """
+        units = UnitLifecycleService._lock_units(
+            unit_ids=unit_ids,
+            estado=UnitStatus.DEPOSITO,
+            message="Solo podés alquilar unidades que estén en DEPÓSITO.",
+        )
+
+        meses = UnitLifecycleService._months_inclusive(
+            start_year=inicio_year,
+            start_month=inicio_month,
+            end_year=retorno_estimada_year,
+            end_month=retorno_estimada_month,
+        )
+        mensual_contrato = monto_mensual * len(units)
+
+        ev = RevenueEvent.objects.create(
+            tipo=RevenueType.ALQUILER,
+            fecha=UnitLifecycleService._ym_to_date(year=inicio_year, month=inicio_month),
+            monto_mensual=mensual_contrato,
+            monto_total=mensual_contrato * meses,
+            cliente_texto=cliente_texto or "",
+            fecha_retorno_estimada=UnitLifecycleService._ym_to_date(
+                year=retorno_estimada_year, month=retorno_estimada_month
+            ),
+            notas=notas or "",
+        )
+        UnitLifecycleService._link_units(ev, units)
+        UnitLifecycleService._set_estado(units, UnitStatus.ALQUILADA, alquiler_activo=ev)
+        bump_data_version()  # alquiler abierto: cambia el reporte en modo devengado
+        return ev, units
+
+    @staticmethod
+    @transaction.atomic
+    @data_version_batch()
+    def finish_rental_many(
+        *,
+        unit_ids: Sequence[int],
+        retorno_real_year: int,
+        retorno_real_month: int,
+    ) -> Tuple[List[RevenueEvent], List[PurchasedUnit]]:
+        """
+        Devolución en lote. Si un evento compartido tiene unidades fuera del lote, las del
+        lote se separan en un evento propio (_split_off) y el resto sigue alquilado.
+        """
+        units = UnitLifecycleService._lock_units(
+            unit_ids=unit_ids,
+            estado=UnitStatus.ALQUILADA,
+            message="Solo podés finalizar alquiler si la unidad está ALQUILADA.",
+        )
+        ids = [u.id for u in units]
+
+        # alquiler abierto por unidad (lookup por PK del puntero)
+        abiertos = UnitLifecycleService._open_rentals(units)
+        events: Dict[int, RevenueEvent] = {ev.id: ev for ev in abiertos.values()}
+        por_evento: Dict[int, List[int]] = {}
+        for unit_id, ev in abiertos.items():
+            por_evento.setdefault(ev.id, []).append(unit_id)
+
+        sin_alquiler = [i for i in ids if i not in abiertos]
+        if sin_alquiler:
+            raise DomainError(
+                ErrorCodes.NOT_FOUND,
+                message_override="No se encontró un alquiler activo para estas unidades.",
+                details={"unit_ids": sin_alquiler},
+            )
+
+        fecha_retorno_real = UnitLifecycleService._ym_to_date(year=retorno_real_year, month=retorno_real_month)
+        antes = [ev.id for ev in events.values() if fecha_retorno_real < ev.fecha]
+        if antes:
+            raise DomainError(
+                ErrorCodes.VALIDATION_ERROR,
+                message_override="El retorno real no puede ser anterior al inicio del alquiler.",
+                details={"revenue_event_ids": antes},
+            )
+
+        # eventos en orden de id (lock sin deadlocks entre lotes); los compartidos se separan
+        cerrar = [UnitLifecycleService._split_off(events[i], por_evento[i]) for i in sorted(events)]
+
+        now = timezone.now()
+        for ev in cerrar:
+            meses = UnitLifecycleService._months_inclusive(
+                start_year=ev.fecha.year,
+                start_month=ev.fecha.month,
+                end_year=retorno_real_year,
+                end_month=retorno_real_month,
+            )
+            ev.fecha_retorno_real = fecha_retorno_real
+            ev.monto_total = (ev.monto_mensual or 0) * meses
+            ev.updated_at = now
+        RevenueEvent.objects.bulk_update(cerrar, ["fecha_retorno_real", "monto_total", "updated_at"])
+        FinanceLedgerService.add_ingresos((fecha_retorno_real, ev.monto_total) for ev in cerrar)
+
+        UnitLifecycleService._set_estado(units, UnitStatus.DEPOSITO, alquiler_activo=None)
+        return cerrar, units
+
+    @staticmethod
+    @transaction.atomic
+    @data_version_batch()
+    def mark_sold_many(
+        *,
+        unit_ids: Sequence[int],
+        fecha_venta: date,
+        monto_total,
+        cliente_texto: str = "",
+        notas: str = "",
+    ) -> Tuple[RevenueEvent, List[PurchasedUnit]]:
+        """Venta de varias unidades al mismo cliente: un único evento VENTA (monto_total = total de la venta)."""
+        units = UnitLifecycleService._lock_units(
+            unit_ids=unit_ids,
+            estado=UnitStatus.DEPOSITO,
+            message="Solo podés vender unidades que estén en DEPÓSITO.",
+        )
+
+        ev = RevenueEvent.objects.create(
+            tipo=RevenueType.VENTA,
+            fecha=fecha_venta,
+            monto_total=monto_total,
+            cliente_texto=cliente_texto or "",
+            notas=notas or "",
+        )
+        FinanceLedgerService.add_ingresos([(ev.fecha, ev.monto_total)])
+        UnitLifecycleService._link_units(ev, units)
+        UnitLifecycleService._set_estado(units, UnitStatus.VENDIDA)
+        return ev, units
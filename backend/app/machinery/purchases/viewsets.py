@@ -1,35 +1,60 @@
 from __future__ import annotations
 
+from django.db.models import prefetch_related_objects
+from django.http import StreamingHttpResponse
 from django.utils.dateparse import parse_date
-from rest_framework import mixins, viewsets
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from machinery.shared.pagination import DefaultPagination
-from machinery.models import PurchasedUnit
-from .services import UnitLifecycleService
+from machinery.shared.fieldsets import SparseFieldsetViewSetMixin, SparseSource
+from machinery.shared.pagination import DefaultOrKeysetPagination
+from machinery.models import PurchasedUnit, UnitStatus
+from machinery.shared.errors import DomainError, ErrorCodes
+from .availability import availability_index, index_to_ym, month_index
+from .counters import InventoryCounterService
+from .overdue import iter_overdue_ndjson
+from .services import PurchasedUnitQueries, UnitLifecycleService
 from .serializers import (
     PurchasedUnitListSerializer,
     PurchasedUnitDetailSerializer,
     UnitMarkRentedSerializer,
     UnitFinishRentalSerializer,
     UnitMarkSoldSerializer,
+    UnitBulkMarkRentedSerializer,
+    UnitBulkFinishRentalSerializer,
+    UnitBulkMarkSoldSerializer,
+    AvailabilityQuerySerializer,
 )
 
 
 class PurchasedUnitViewSet(
+    SparseFieldsetViewSetMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     viewsets.GenericViewSet,
 ):
-    pagination_class = DefaultPagination
+    pagination_class = DefaultOrKeysetPagination
+    # ?cursor= -> keyset sobre el mismo orden del listado (+ id para desempatar)
+    cursor_ordering = ("-fecha_compra", "-created_at", "id")
+
+    sparse_sources = {
+        "accesorios": SparseSource(columns=("budget_item",), prefetch=("budget_item__accesorios",)),
+        "venta": SparseSource(prefetch=("revenue_usos",)),
+        "alquileres": SparseSource(prefetch=("revenue_usos",)),
+    }
 
     def get_queryset(self):
-        qs = (
-            PurchasedUnit.objects.select_related("purchase", "purchase__budget", "machine_base")
-            .all()
-            .order_by("-purchase__fecha_compra", "-created_at")
-        )
+        plan = self.get_sparse_plan()
+        if plan is None:
+            qs = PurchasedUnit.objects.all()
+        else:
+            qs = plan.apply(PurchasedUnit.objects.all())
+            if self.action == "retrieve":
+                # ✅ solo los prefetch que usan los campos pedidos
+                qs = qs.prefetch_related(*PurchasedUnitQueries.lookups(plan.prefetch))
+        # ✅ una sola tabla: filtro + orden los resuelve el índice (estado, -fecha_compra, -created_at, id)
+        qs = qs.order_by("-fecha_compra", "-created_at")
 
         params = self.request.query_params
 
@@ -41,13 +66,13 @@ class PurchasedUnitViewSet(
         if fecha_desde:
             d = parse_date(fecha_desde)
             if d:
-                qs = qs.filter(purchase__fecha_compra__gte=d)
+                qs = qs.filter(fecha_compra__gte=d)
 
         fecha_hasta = params.get("fecha_hasta")
         if fecha_hasta:
             d = parse_date(fecha_hasta)
             if d:
-                qs = qs.filter(purchase__fecha_compra__lte=d)
+                qs = qs.filter(fecha_compra__lte=d)
 
         return qs
 
@@ -56,12 +81,81 @@ class PurchasedUnitViewSet(
             return PurchasedUnitDetailSerializer
         return PurchasedUnitListSerializer
 
+    @action(detail=False, methods=["get"], url_path="summary")
+    def summary(self, request):
+        """
+        Unidades por máquina y estado (DEPOSITO / ALQUILADA / VENDIDA) + totales.
+        Lee los contadores mantenidos por los services (sin GROUP BY sobre purchased_unit).
+        """
+        maquinas = InventoryCounterService.summary()
+        totales = {s: sum(m[s] for m in maquinas) for s in UnitStatus.values}
+        totales["total"] = sum(m["total"] for m in maquinas)
+        return Response({"maquinas": maquinas, "totales": totales}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], url_path="availability")
+    def availability(self, request):
+        """
+        Disponibilidad de la flota para cotizar:
+        ?machine_base=3&desde=2026-01&hasta=2026-06
+        - unidades libres durante todo el rango y las que se superponen con él
+        - capacidad libre mes a mes
+        Se resuelve contra el índice en memoria (bitmaps de meses por unidad).
+        """
+        ser = AvailabilityQuerySerializer(data=request.query_params)
+        ser.is_valid(raise_exception=True)
+        data = ser.validated_data
+
+        res = availability_index.query(
+            machine_base_id=data["machine_base"],
+            desde=month_index(*data["desde"]),
+            hasta=month_index(*data["hasta"]),
+        )
+        return Response(
+            {
+                "machine_base": res.machine_base_id,
+                "desde": index_to_ym(res.desde),
+                "hasta": index_to_ym(res.hasta),
+                "total": len(res.libres) + len(res.ocupadas),
+                "libres": len(res.libres),
+                "unidades_libres": [{"id": u.unit_id, "identificador": u.identificador} for u in res.libres],
+                "unidades_ocupadas": [{"id": u.unit_id, "identificador": u.identificador} for u in res.ocupadas],
+                "capacidad_por_mes": [{"mes": mes, "libres": n} for mes, n in res.capacidad_por_mes()],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["get"], url_path="overdue")
+    def overdue(self, request):
+        """
+        Alquileres vencidos (NDJSON en streaming, una fila por unidad):
+        unidad, máquina, cliente, retorno estimado y meses de atraso.
+        ?machine_base=3 para filtrar por máquina.
+        """
+        machine_base = request.query_params.get("machine_base")
+        try:
+            machine_base_id = int(machine_base) if machine_base else None
+        except ValueError:
+            raise DomainError(ErrorCodes.VALIDATION_ERROR, message_override="machine_base debe ser un entero.")
+
+        return StreamingHttpResponse(
+            iter_overdue_ndjson(machine_base_id=machine_base_id),
+            content_type="application/x-ndjson",
+        )
+
+    def _detail_response(self, unit: PurchasedUnit) -> Response:
+        """
+        Serializa la unidad que devolvió el service (ya trae purchase del lock):
+        solo se completan los prefetch del detalle, sin releerla.
+        """
+        prefetch_related_objects([unit], *PurchasedUnitQueries.lookups())
+        return Response(PurchasedUnitDetailSerializer(unit).data)
+
     @action(detail=True, methods=["post"], url_path="mark-rented")
     def mark_rented(self, request, pk=None):
         ser = UnitMarkRentedSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
 
-        UnitLifecycleService.mark_rented(
+        unit = UnitLifecycleService.mark_rented(
             unit_id=int(pk),
             inicio_year=ser.validated_data["inicio_year"],
             inicio_month=ser.validated_data["inicio_month"],
@@ -70,33 +164,91 @@ class PurchasedUnitViewSet(
             monto_mensual=ser.validated_data["monto_mensual"],
             notas=ser.validated_data.get("notas", ""),
         )
-        obj = self.get_queryset().get(pk=int(pk))
-        return Response(PurchasedUnitDetailSerializer(obj).data)
+        return self._detail_response(unit)
 
     @action(detail=True, methods=["post"], url_path="finish-rental")
     def finish_rental(self, request, pk=None):
         ser = UnitFinishRentalSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
 
-        UnitLifecycleService.finish_rental(
+        unit = UnitLifecycleService.finish_rental(
             unit_id=int(pk),
             retorno_real_year=ser.validated_data["retorno_real_year"],
             retorno_real_month=ser.validated_data["retorno_real_month"],
         )
-        obj = self.get_queryset().get(pk=int(pk))
-        return Response(PurchasedUnitDetailSerializer(obj).data)
+        return self._detail_response(unit)
 
     @action(detail=True, methods=["post"], url_path="mark-sold")
     def mark_sold(self, request, pk=None):
         ser = UnitMarkSoldSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
 
-        UnitLifecycleService.mark_sold(
+        unit = UnitLifecycleService.mark_sold(
             unit_id=int(pk),
             fecha_venta=ser.validated_data["fecha_venta"],
             monto_total=ser.validated_data["monto_total"],
             cliente_texto=ser.validated_data.get("cliente_texto", ""),
             notas=ser.validated_data.get("notas", ""),
         )
-        obj = self.get_queryset().get(pk=int(pk))
-        return Response(PurchasedUnitDetailSerializer(obj).data)
+        return self._detail_response(unit)
+
+    # -------------------------
+    # Transiciones en lote: una transacción y un evento compartido para todo el set
+    # -------------------------
+    def _bulk_response(self, *, eventos, units):
+        # sin get_queryset(): los filtros del listado (?estado=, fechas) no aplican acá
+        ids = [u.id for u in units]
+        qs = PurchasedUnit.objects.filter(pk__in=ids).order_by("-fecha_compra", "-created_at")
+        return Response(
+            {
+                "revenue_event_ids": [ev.id for ev in eventos],
+                "unidades": PurchasedUnitListSerializer(qs, many=True).data,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["post"], url_path="bulk/mark-rented")
+    def bulk_mark_rented(self, request):
+        ser = UnitBulkMarkRentedSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        data = ser.validated_data
+
+        ev, units = UnitLifecycleService.mark_rented_many(
+            unit_ids=data["unit_ids"],
+            inicio_year=data["inicio_year"],
+            inicio_month=data["inicio_month"],
+            retorno_estimada_year=data["retorno_estimada_year"],
+            retorno_estimada_month=data["retorno_estimada_month"],
+            monto_mensual=data["monto_mensual"],
+            cliente_texto=data.get("cliente_texto", ""),
+            notas=data.get("notas", ""),
+        )
+        return self._bulk_response(eventos=[ev], units=units)
+
+    @action(detail=False, methods=["post"], url_path="bulk/finish-rental")
+    def bulk_finish_rental(self, request):
+        ser = UnitBulkFinishRentalSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        data = ser.validated_data
+
+        eventos, units = UnitLifecycleService.finish_rental_many(
+            unit_ids=data["unit_ids"],
+            retorno_real_year=data["retorno_real_year"],
+            retorno_real_month=data["retorno_real_month"],
+        )
+        return self._bulk_response(eventos=eventos, units=units)
+
+    @action(detail=False, methods=["post"], url_path="bulk/mark-sold")
+    def bulk_mark_sold(self, request):
+        ser = UnitBulkMarkSoldSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        data = ser.validated_data
+
+        ev, units = UnitLifecycleService.mark_sold_many(
+            unit_ids=data["unit_ids"],
+            fecha_venta=data["fecha_venta"],
+            monto_total=data["monto_total"],
+            cliente_texto=data.get("cliente_texto", ""),
+            notas=data.get("notas", ""),
+        )
+        return self._bulk_response(eventos=[ev], units=units)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from itertools import accumulate
+from typing import Dict, Optional
+
+from django.db.models import DateField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from machinery.models import RevenueEvent, RevenueType
+
+ZERO = Decimal("0")
+
+
+def _month(d: date) -> int:
+    return d.year * 12 + d.month - 1
+
+
+def _month_start(i: int) -> date:
+    return date(i // 12, i % 12 + 1, 1)
+
+
+def accrued_rentals(*, desde: date, hasta: date, hoy: Optional[date] = None) -> Dict[date, Decimal]:
+    """
+    Ingresos de alquiler devengados por mes (1er día del mes -> monto) en [desde, hasta]:
+    cada alquiler aporta su monto_mensual en todos los meses entre `fecha` y el retorno
+    real inclusive; si sigue abierto, hasta el mes actual.
+
+    Sin expandir evento x mes: es un array de diferencias (+mensual en el mes de inicio,
+    -mensual en el mes siguiente al fin) armado con dos GROUP BY y una suma acumulada.
+    El costo depende de la cantidad de meses, no de eventos ni de su duración.
+    """
+    hoy = hoy or date.today()
+    mes_actual = date(hoy.year, hoy.month, 1)
+    fin_rango = _month(hasta)
+
+    alquileres = RevenueEvent.objects.filter(tipo=RevenueType.ALQUILER, fecha__lte=hasta).filter(
+        # abiertos: solo los que ya empezaron (devengan hasta el mes actual)
+        Q(fecha_retorno_real__isnull=False) | Q(fecha__lte=mes_actual)
+    )
+
+    deltas: Dict[int, Decimal] = defaultdict(lambda: ZERO)
+
+    inicios = alquileres.values_list("fecha").annotate(m=Sum("monto_mensual")).order_by()
+    for fecha, m in inicios:
+        deltas[_month(fecha)] += m or ZERO
+
+    fines = (
+        alquileres.annotate(fin=Coalesce("fecha_retorno_real", Value(mes_actual), output_field=DateField()))
+        .filter(fin__lt=date(hasta.year, hasta.month, 1))
+        .values_list("fin")
+        .annotate(m=Sum("monto_mensual"))
+        .order_by()
+    )
+    for fin, m in fines:
+        deltas[_month(fin) + 1] -= m or ZERO
+
+    if not deltas:
+        return {}
+
+    primero = min(deltas)
+    meses = range(primero, fin_rango + 1)
+    desde_i = _month(desde)
+    return {
+        _month_start(i): monto
+        for i, monto in zip(meses, accumulate(deltas.get(i, ZERO) for i in meses))
+        if i >= desde_i and monto
+    }
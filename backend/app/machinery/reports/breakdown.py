@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+from django.db.models import CharField, DecimalField, F, Q, Sum, Value
+
+from machinery.models import BudgetItem, Purchase, RevenueEvent, RevenueEventUnit, RevenueType
+
+ZERO = Decimal("0")
+_CENT = Decimal("0.01")
+
+# ?group_by=...
+MAQUINA = "maquina"
+TIPO = "tipo"
+CLIENTE = "cliente"
+GROUP_BYS = (MAQUINA, TIPO, CLIENTE)
+
+# clave de los egresos cuando la dimensión no aplica a compras
+COMPRA = "COMPRA"
+
+
+@dataclass(frozen=True, slots=True)
+class BreakdownRow:
+    clave: Any  # machine_base_id / tipo / cliente_texto (None: compras sin cliente)
+    nombre: str
+    ingresos: Decimal
+    egresos: Decimal
+
+    @property
+    def ganancia(self) -> Decimal:
+        return self.ingresos - self.egresos
+
+
+class FinanceBreakdownService:
+    """
+    Ingresos/egresos de un rango desglosados por una dimensión (criterio caja, mismas
+    reglas que FinanceReportService):
+    - maquina: ingresos por unidad (monto_total del evento repartido entre sus unidades)
+      vía revenue_event_unit -> purchased_unit -> machine_base; egresos por budget_item,
+      prorrateando el total de la compra según el subtotal de máquina de cada ítem.
+    - tipo: VENTA / ALQUILER; las compras van en COMPRA.
+    - cliente: cliente_texto del evento; las compras van en una fila sin cliente.
+
+    tipo/cliente: un solo query (UNION ALL de la rama de ingresos y la de egresos, ya
+    agrupadas). maquina: dos queries (unidades de los eventos, items de las compras) y el
+    reparto se hace acá en centavos, con el resto en la última parte, para que la suma de
+    las filas cierre con los totales del reporte. El pivot (clave -> ingresos/egresos) se
+    arma acá en los dos casos.
+    """
+
+    @staticmethod
+    def build(*, desde: date, hasta: date, group_by: str) -> List[BreakdownRow]:
+        if group_by not in GROUP_BYS:
+            raise ValueError(f"group_by inválido: {group_by}")
+
+        filas_de, nombre = _DIMENSIONES[group_by]
+
+        pivot: Dict[Any, List] = {}
+        for clave, nom, ing, egr in filas_de(desde, hasta):
+            if not ing and not egr:
+                continue  # agregado sin filas (rama con clave constante)
+            row = pivot.setdefault(clave, [nombre(clave, nom), ZERO, ZERO])
+            row[1] += ing or ZERO
+            row[2] += egr or ZERO
+
+        filas = [
+            BreakdownRow(clave=clave, nombre=nom, ingresos=ing.quantize(_CENT), egresos=egr.quantize(_CENT))
+            for clave, (nom, ing, egr) in pivot.items()
+        ]
+        filas.sort(key=lambda r: (-r.ganancia, r.nombre or ""))
+        return filas
+
+
+_MONEY = DecimalField(max_digits=16, decimal_places=2)
+_CERO = Value(ZERO, output_field=_MONEY)
+
+
+def _cobrados(desde: date, hasta: date, prefix: str = "") -> Q:
+    """Eventos que entran en caja en el rango: ventas por fecha, alquileres por retorno real."""
+    return Q(**{f"{prefix}tipo": RevenueType.VENTA, f"{prefix}fecha__gte": desde, f"{prefix}fecha__lte": hasta}) | Q(
+        **{
+            f"{prefix}tipo": RevenueType.ALQUILER,
+            f"{prefix}fecha_retorno_real__gte": desde,
+            f"{prefix}fecha_retorno_real__lte": hasta,
+        }
+    )
+
+
+def _agrupado(qs, clave, nombre, *, ing=None, egr=None):
+    return (
+        qs.annotate(clave=clave, nombre=nombre)
+        .values_list("clave", "nombre")
+        .annotate(
+            ing=Sum(ing, output_field=_MONEY) if ing is not None else _CERO,
+            egr=Sum(egr, output_field=_MONEY) if egr is not None else _CERO,
+        )
+        .order_by()
+    )
+
+
+def _compras(desde: date, hasta: date, clave: Value, nombre: Value):
+    return _agrupado(
+        Purchase.objects.filter(fecha_compra__gte=desde, fecha_compra__lte=hasta),
+        clave,
+        nombre,
+        egr=F("total_snapshot"),
+    )
+
+
+def _union(ingresos: Callable, egresos: Callable) -> Callable:
+    return lambda desde, hasta: ingresos(desde, hasta).union(egresos(desde, hasta), all=True)
+
+
+def _reparto(total: Decimal, pesos: Sequence[Decimal]) -> List[Decimal]:
+    """
+    Reparte `total` en proporción a `pesos` en centavos enteros; lo que sobra del
+    redondeo va a la última parte (la suma da exactamente `total`). Sin pesos: partes iguales.
+    """
+    centavos = int((total or ZERO).quantize(_CENT) * 100)
+    pesos = [p or ZERO for p in pesos]
+    suma = sum(pesos)
+    if not suma:
+        pesos, suma = [Decimal(1)] * len(pesos), Decimal(len(pesos))
+    partes = [int(centavos * p / suma) for p in pesos]
+    partes[-1] += centavos - sum(partes)
+    return [Decimal(c) / 100 for c in partes]
+
+
+# --- maquina ---
+def _filas_maquina(desde: date, hasta: date) -> Iterable[Tuple[Any, Any, Decimal, Decimal]]:
+    # ingresos: cada evento cobrado en el rango, repartido en partes iguales entre sus unidades
+    unidades = (
+        RevenueEventUnit.objects.filter(_cobrados(desde, hasta, "revenue_event__"))
+        .values_list(
+            "revenue_event_id",
+            "revenue_event__monto_total",
+            "purchased_unit__machine_base_id",
+            "purchased_unit__machine_base__nombre",
+        )
+        .order_by("revenue_event_id", "id")
+    )
+    for _, filas in groupby(unidades, key=itemgetter(0)):
+        filas = list(filas)
+        for (_, _, machine_id, nombre), monto in zip(filas, _reparto(filas[0][1], [Decimal(1)] * len(filas))):
+            yield machine_id, nombre, monto, ZERO
+
+    # egresos: total de cada compra del rango prorrateado por el subtotal de máquina de sus items
+    items = (
+        BudgetItem.objects.filter(budget__compra__fecha_compra__gte=desde, budget__compra__fecha_compra__lte=hasta)
+        .values_list(
+            "budget_id",
+            "budget__compra__total_snapshot",
+            "subtotal_maquina_snapshot",
+            "machine_base_id",
+            "machine_base__nombre",
+        )
+        .order_by("budget_id", "id")
+    )
+    for _, filas in groupby(items, key=itemgetter(0)):
+        filas = list(filas)
+        for (_, _, _, machine_id, nombre), monto in zip(filas, _reparto(filas[0][1], [f[2] for f in filas])):
+            yield machine_id, nombre, ZERO, monto
+
+
+# --- tipo ---
+def _ingresos_tipo(desde: date, hasta: date):
+    return _agrupado(RevenueEvent.objects.filter(_cobrados(desde, hasta)), F("tipo"), F("tipo"), ing=F("monto_total"))
+
+
+def _egresos_tipo(desde: date, hasta: date):
+    return _compras(desde, hasta, Value(COMPRA, output_field=CharField()), Value(COMPRA, output_field=CharField()))
+
+
+# --- cliente ---
+def _ingresos_cliente(desde: date, hasta: date):
+    return _agrupado(
+        RevenueEvent.objects.filter(_cobrados(desde, hasta)),
+        F("cliente_texto"),
+        F("cliente_texto"),
+        ing=F("monto_total"),
+    )
+
+
+def _egresos_cliente(desde: date, hasta: date):
+    return _compras(desde, hasta, Value(None, output_field=CharField()), Value(None, output_field=CharField()))
+
+
+_TIPO_LABELS = {**dict(RevenueType.choices), COMPRA: "Compra"}
+
+# dimensión -> (filas (clave, nombre, ingresos, egresos), nombre visible)
+_DIMENSIONES: Dict[str, Tuple[Callable, Callable[[Any, Any], str]]] = {
+    MAQUINA: (_filas_maquina, lambda clave, nombre: nombre),
+    TIPO: (_union(_ingresos_tipo, _egresos_tipo), lambda clave, nombre: _TIPO_LABELS.get(clave, clave)),
+    CLIENTE: (
+        _union(_ingresos_cliente, _egresos_cliente),
+        lambda clave, nombre: "Compras (sin cliente)" if clave is None else (nombre or "Sin cliente"),
+    ),
+}
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Hashable, Iterator, Tuple
+
+from django.db.models import F
+
+from machinery.models import ReportDataVersion
+
+# fila única del contador
+_VERSION_PK = 1
+
+# entradas por proceso (cada una es la respuesta ya armada de un reporte)
+DEFAULT_MAXSIZE = 128
+
+
+def data_version() -> int:
+    v = ReportDataVersion.objects.filter(pk=_VERSION_PK).values_list("version", flat=True).first()
+    return v or 0
+
+
+# bumps pendientes del data_version_batch() en curso (por thread = por conexión)
+_batch = threading.local()
+
+
+@contextmanager
+def data_version_batch() -> Iterator[None]:
+    """
+    Agrupa los bumps de una unidad de trabajo: adentro del bloque bump_data_version() solo
+    marca, y al salir sin error se hace un único UPDATE. Anidable (solo escribe el bloque
+    externo), así un seed que llama a varios services dentro de su transacción sube la
+    versión una vez. Usar dentro de la transacción (debajo de @transaction.atomic).
+    """
+    depth = getattr(_batch, "depth", 0)
+    if not depth:
+        _batch.pending = False
+    _batch.depth = depth + 1
+    try:
+        yield
+    finally:
+        _batch.depth = depth
+    if not depth and _batch.pending:
+        _batch.pending = False
+        _bump()
+
+
+def bump_data_version() -> None:
+    """
+    +1 al contador (llamar dentro de la transacción que escribe). Si la transacción hace
+    rollback el bump también, así que nunca se invalida de más ni de menos.
+    Dentro de data_version_batch() se difiere al final del bloque.
+    """
+    if getattr(_batch, "depth", 0):
+        _batch.pending = True
+        return
+    _bump()
+
+
+def _bump() -> None:
+    if not ReportDataVersion.objects.filter(pk=_VERSION_PK).update(version=F("version") + 1):
+        ReportDataVersion.objects.bulk_create([ReportDataVersion(pk=_VERSION_PK, version=0)], ignore_conflicts=True)
+        ReportDataVersion.objects.filter(pk=_VERSION_PK).update(version=F("version") + 1)
+
+
+class ReportCache:
+    """
+    LRU en memoria de respuestas de reportes, con clave (data_version, *parámetros).
+    Una escritura sube la versión: las entradas viejas quedan inalcanzables y el LRU las
+    va desalojando. Funciona igual con varios procesos (la versión vive en la base).
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, params: Tuple[Hashable, ...], builder: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Devuelve (valor, hit)."""
+        key = (data_version(), *params)
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key], True
+            self.misses += 1
+
+        value = builder()
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value, False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+report_cache = ReportCache()
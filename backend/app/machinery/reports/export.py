@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import csv
+import json
+from typing import Iterator
+
+from .services import FinanceDayRow
+
+COLUMNS = ("fecha", "ingresos", "egresos", "ganancia")
+
+
+class _Echo:
+    """Pseudo-buffer para csv.writer: devuelve la línea en vez de acumularla."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _values(r: FinanceDayRow) -> tuple:
+    return (r.fecha.isoformat(), str(r.ingresos), str(r.egresos), str(r.ganancia))
+
+
+def iter_csv(rows: Iterator[FinanceDayRow]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMNS)
+    for r in rows:
+        yield writer.writerow(_values(r))
+
+
+def iter_ndjson(rows: Iterator[FinanceDayRow]) -> Iterator[str]:
+    for r in rows:
+        yield json.dumps(dict(zip(COLUMNS, _values(r)))) + "\n"
+
+
+# format -> (generador, content type)
+EXPORTS = {
+    "csv": (iter_csv, "text/csv; charset=utf-8"),
+    "ndjson": (iter_ndjson, "application/x-ndjson"),
+}
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+
+from machinery.models import DailyFinanceLedger, Purchase, RevenueEvent, RevenueType
+
+from .cache import bump_data_version
+
+ZERO = Decimal("0")
+
+# fecha -> (ingresos, egresos)
+Deltas = Dict[date, Tuple[Decimal, Decimal]]
+
+
+@dataclass(frozen=True)
+class LedgerDrift:
+    fecha: date
+    ingresos_ledger: Decimal
+    egresos_ledger: Decimal
+    ingresos_real: Decimal
+    egresos_real: Decimal
+
+
+class FinanceLedgerService:
+    """
+    daily_finance_ledger: lo llaman los services que escriben ingresos/egresos, dentro de
+    su transacción. Mismas reglas que el reporte:
+    - VENTA -> ingreso en RevenueEvent.fecha
+    - ALQUILER -> ingreso en fecha_retorno_real (al cerrarse)
+    - Purchase -> egreso en fecha_compra
+    """
+
+    @staticmethod
+    def apply(deltas: Deltas) -> None:
+        """
+        Suma los deltas en dos queries fijas (sin importar cuántos días):
+        - INSERT ... ON CONFLICT DO NOTHING de los días que falten
+        - un UPDATE con CASE por día
+        """
+        deltas = {d: (i, e) for d, (i, e) in deltas.items() if i or e}
+        if not deltas:
+            return
+
+        DailyFinanceLedger.objects.bulk_create(
+            [DailyFinanceLedger(fecha=d) for d in deltas],
+            ignore_conflicts=True,
+        )
+
+        money = DecimalField(max_digits=16, decimal_places=2)
+        ing_whens, egr_whens = [], []
+        for d, (i, e) in deltas.items():
+            ing_whens.append(When(fecha=d, then=Value(i, output_field=money)))
+            egr_whens.append(When(fecha=d, then=Value(e, output_field=money)))
+
+        DailyFinanceLedger.objects.filter(fecha__in=list(deltas)).update(
+            ingresos=F("ingresos") + Case(*ing_whens, default=Value(ZERO), output_field=money),
+            egresos=F("egresos") + Case(*egr_whens, default=Value(ZERO), output_field=money),
+        )
+        # todo cambio del ledger invalida los reportes cacheados
+        bump_data_version()
+
+    @classmethod
+    def add_ingresos(cls, movimientos: Iterable[Tuple[date, Decimal]]) -> None:
+        deltas: Dict[date, Decimal] = defaultdict(lambda: ZERO)
+        for d, monto in movimientos:
+            deltas[d] += Decimal(monto or 0)
+        cls.apply({d: (m, ZERO) for d, m in deltas.items()})
+
+    @classmethod
+    def add_egresos(cls, movimientos: Iterable[Tuple[date, Decimal]]) -> None:
+        deltas: Dict[date, Decimal] = defaultdict(lambda: ZERO)
+        for d, monto in movimientos:
+            deltas[d] += Decimal(monto or 0)
+        cls.apply({d: (ZERO, m) for d, m in deltas.items()})
+
+    # -------------------------
+    # Fuente (tablas originales) + rebuild
+    # -------------------------
+    @staticmethod
+    def source_query(*, desde: Optional[date] = None, hasta: Optional[date] = None):
+        """
+        Un solo query: UNION ALL de los tres agregados por día (dia, ingresos, egresos)
+        ordenado por día. Cada rama es un range scan de su índice:
+        - VENTA por (tipo, fecha)
+        - ALQUILER cerrado por (tipo, fecha_retorno_real, ...)
+        - Purchase por fecha_compra
+        Un mismo día puede venir en más de una rama (filas contiguas por el ORDER BY).
+        """
+        money = DecimalField(max_digits=16, decimal_places=2)
+        cero = Value(ZERO, output_field=money)
+
+        def _rango(campo: str) -> Q:
+            q = Q()
+            if desde is not None:
+                q &= Q(**{f"{campo}__gte": desde})
+            if hasta is not None:
+                q &= Q(**{f"{campo}__lte": hasta})
+            return q
+
+        def _por_dia(qs, campo: str, *, ingreso: Optional[str] = None, egreso: Optional[str] = None):
+            return (
+                qs.filter(_rango(campo))
+                .annotate(dia=F(campo))
+                .values_list("dia")
+                .annotate(
+                    ing=Sum(ingreso, output_field=money) if ingreso else cero,
+                    egr=Sum(egreso, output_field=money) if egreso else cero,
+                )
+                .order_by()
+            )
+
+        ventas = _por_dia(RevenueEvent.objects.filter(tipo=RevenueType.VENTA), "fecha", ingreso="monto_total")
+        alquileres = _por_dia(
+            RevenueEvent.objects.filter(tipo=RevenueType.ALQUILER, fecha_retorno_real__isnull=False),
+            "fecha_retorno_real",
+            ingreso="monto_total",
+        )
+        compras = _por_dia(Purchase.objects.all(), "fecha_compra", egreso="total_snapshot")
+
+        return ventas.union(alquileres, compras, all=True).order_by("dia")
+
+    @classmethod
+    def source_days(cls, *, desde: Optional[date] = None, hasta: Optional[date] = None) -> Deltas:
+        """Ingresos/egresos por día calculados desde revenue_event + purchase (un round trip)."""
+        out: Deltas = {}
+        for d, ing, egr in cls.source_query(desde=desde, hasta=hasta):
+            i, e = out.get(d, (ZERO, ZERO))
+            out[d] = (i + (ing or ZERO), e + (egr or ZERO))
+        return out
+
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls, *, fix: bool = True) -> List[LedgerDrift]:
+        """
+        Compara el ledger con las tablas originales y devuelve los días distintos.
+        fix=True lo regenera completo.
+        """
+        actual = {
+            r.fecha: (r.ingresos, r.egresos)
+            for r in DailyFinanceLedger.objects.select_for_update()
+        }
+        real = cls.source_days()
+
+        drift = []
+        for d in sorted(set(actual) | set(real)):
+            li, le = actual.get(d, (ZERO, ZERO))
+            ri, re_ = real.get(d, (ZERO, ZERO))
+            if li != ri or le != re_:
+                drift.append(LedgerDrift(fecha=d, ingresos_ledger=li, egresos_ledger=le, ingresos_real=ri, egresos_real=re_))
+
+        if fix and drift:
+            DailyFinanceLedger.objects.all().delete()
+            DailyFinanceLedger.objects.bulk_create(
+                [DailyFinanceLedger(fecha=d, ingresos=i, egresos=e) for d, (i, e) in real.items()],
+                batch_size=1000,
+            )
+            bump_data_version()
+        return drift
@@ -4,10 +4,63 @@ from collections import defaultdict
 from dataclasses import dataclass
 from datetime import date, timedelta
 from decimal import Decimal
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
 
 from django.db.models import Sum
+from django.db.models.functions import TruncMonth, TruncQuarter, TruncWeek, TruncYear
 
-from machinery.models import Purchase, RevenueEvent, RevenueType
+from machinery.models import DailyFinanceLedger, RevenueEvent, RevenueType
+
+from .accrual import accrued_rentals
+
+
+def _add_months(d: date, months: int) -> date:
+    idx = d.year * 12 + (d.month - 1) + months
+    return date(idx // 12, idx % 12 + 1, 1)
+
+
+@dataclass(frozen=True)
+class Granularity:
+    """Bucket de la serie: truncado en SQL + inicio/paso para completar buckets vacíos."""
+    trunc: type
+    start: Callable[[date], date]
+    step: Callable[[date], date]
+
+
+GRANULARIDADES: Dict[str, Granularity] = {
+    "semana": Granularity(
+        trunc=TruncWeek,
+        start=lambda d: d - timedelta(days=d.weekday()),
+        step=lambda d: d + timedelta(days=7),
+    ),
+    "mes": Granularity(
+        trunc=TruncMonth,
+        start=lambda d: date(d.year, d.month, 1),
+        step=lambda d: _add_months(d, 1),
+    ),
+    "trimestre": Granularity(
+        trunc=TruncQuarter,
+        start=lambda d: date(d.year, 3 * ((d.month - 1) // 3) + 1, 1),
+        step=lambda d: _add_months(d, 3),
+    ),
+    "anio": Granularity(
+        trunc=TruncYear,
+        start=lambda d: date(d.year, 1, 1),
+        step=lambda d: _add_months(d, 12),
+    ),
+}
+DIA = "dia"
+
+# criterio de reconocimiento de los alquileres
+CAJA = "caja"  # monto_total al cerrarse (fecha_retorno_real)
+DEVENGADO = "devengado"  # monto_mensual en cada mes del alquiler (abiertos: hasta hoy)
+CRITERIOS = (CAJA, DEVENGADO)
+
+# filas por fetch del cursor en el modo streaming
+CHUNK_SIZE = 2000
+
+ZERO = Decimal("0")
+_CENT = Decimal("0.01")
 
 
 @dataclass(frozen=True)
@@ -17,12 +70,16 @@ class FinanceTotals:
     ganancia: Decimal
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FinanceDayRow:
-    fecha: date
+    """Fila de la serie (slots: sin __dict__ por fila; la ganancia se calcula al leerla)."""
+    fecha: date  # día, o inicio del bucket (semana/mes/trimestre/año)
     ingresos: Decimal
     egresos: Decimal
-    ganancia: Decimal
+
+    @property
+    def ganancia(self) -> Decimal:
+        return self.ingresos - self.egresos
 
 
 @dataclass(frozen=True)
@@ -30,7 +87,9 @@ class FinanceReport:
     desde: date
     hasta: date
     totales: FinanceTotals
-    serie_diaria: list[FinanceDayRow]
+    serie: list[FinanceDayRow]
+    granularidad: str = DIA
+    criterio: str = CAJA
 
 
 class FinanceReportService:
@@ -40,68 +99,149 @@ class FinanceReportService:
     - Ingresos por ALQUILER: RevenueEvent.tipo=ALQUILER pero solo cuando fecha_retorno_real != null,
       y se contabiliza en fecha_retorno_real (cuando efectivamente se cobra).
     - Egresos: Purchase.total_snapshot por Purchase.fecha_compra
+
+    Lee el rango de daily_finance_ledger (un range scan por fecha, ya agregado por día);
+    las tablas originales solo se recorren al regenerarlo (FinanceLedgerService.rebuild).
+
+    criterio=devengado: los alquileres se reconocen mes a mes (monto_mensual el 1er día de
+    cada mes, o `desde` si el rango empieza a mitad de mes); ventas y compras no cambian.
     """
 
     @staticmethod
-    def build(*, desde: date, hasta: date) -> FinanceReport:
-        if hasta < desde:
-            raise ValueError("hasta debe ser >= desde")
+    def build(*, desde: date, hasta: date, granularidad: str = DIA, criterio: str = CAJA) -> FinanceReport:
+        serie = list(
+            FinanceReportService.iter_serie(desde=desde, hasta=hasta, granularidad=granularidad, criterio=criterio)
+        )
 
-        ingresos_por_dia: dict[date, Decimal] = defaultdict(lambda: Decimal("0"))
-        egresos_por_dia: dict[date, Decimal] = defaultdict(lambda: Decimal("0"))
+        total_ing = sum((r.ingresos for r in serie), ZERO)
+        total_egr = sum((r.egresos for r in serie), ZERO)
+        totales = FinanceTotals(
+            ingresos=total_ing,
+            egresos=total_egr,
+            ganancia=(total_ing - total_egr),
+        )
 
-        # --- Ventas (por fecha)
-        ventas = (
-            RevenueEvent.objects.filter(tipo=RevenueType.VENTA, fecha__gte=desde, fecha__lte=hasta)
-            .values("fecha")
-            .annotate(total=Sum("monto_total"))
+        return FinanceReport(
+            desde=desde,
+            hasta=hasta,
+            totales=totales,
+            serie=serie,
+            granularidad=granularidad,
+            criterio=criterio,
         )
-        for r in ventas:
-            ingresos_por_dia[r["fecha"]] += r["total"] or Decimal("0")
-
-        # --- Alquileres cobrados (por retorno real)
-        alquileres_cobrados = (
-            RevenueEvent.objects.filter(
-                tipo=RevenueType.ALQUILER,
-                fecha_retorno_real__isnull=False,
-                fecha_retorno_real__gte=desde,
-                fecha_retorno_real__lte=hasta,
+
+    @staticmethod
+    def iter_serie(
+        *, desde: date, hasta: date, granularidad: str = DIA, criterio: str = CAJA
+    ) -> Iterator[FinanceDayRow]:
+        """
+        La serie como generador: recorre el cursor ordenado del ledger por chunks y lo
+        intercala con el calendario, así que la memoria no depende del largo del rango.
+        """
+        if hasta < desde:
+            raise ValueError("hasta debe ser >= desde")
+        if granularidad != DIA and granularidad not in GRANULARIDADES:
+            raise ValueError(f"granularidad inválida: {granularidad}")
+        if criterio not in CRITERIOS:
+            raise ValueError(f"criterio inválido: {criterio}")
+
+        if criterio == DEVENGADO:
+            if granularidad == DIA:
+                inicio, step, bucket = desde, (lambda d: d + timedelta(days=1)), (lambda d: d)
+            else:
+                g = GRANULARIDADES[granularidad]
+                inicio, step, bucket = g.start(desde), g.step, g.start
+            rows = FinanceReportService._devengado(desde=desde, hasta=hasta, bucket=bucket)
+            return FinanceReportService._fill(rows, inicio=inicio, hasta=hasta, step=step)
+
+        rango = DailyFinanceLedger.objects.filter(fecha__gte=desde, fecha__lte=hasta)
+        if granularidad == DIA:
+            # el ledger solo tiene días con movimientos
+            rows = rango.values_list("fecha", "ingresos", "egresos").order_by("fecha")
+            return FinanceReportService._fill(
+                rows.iterator(chunk_size=CHUNK_SIZE),
+                inicio=desde,
+                hasta=hasta,
+                step=lambda d: d + timedelta(days=1),
             )
-            .values("fecha_retorno_real")
-            .annotate(total=Sum("monto_total"))
-        )
-        for r in alquileres_cobrados:
-            ingresos_por_dia[r["fecha_retorno_real"]] += r["total"] or Decimal("0")
-
-        # --- Egresos: compras (por fecha_compra)
-        compras = (
-            Purchase.objects.filter(fecha_compra__gte=desde, fecha_compra__lte=hasta)
-            .values("fecha_compra")
-            .annotate(total=Sum("total_snapshot"))
-        )
-        for r in compras:
-            egresos_por_dia[r["fecha_compra"]] += r["total"] or Decimal("0")
 
-        # Serie diaria completa
-        serie: list[FinanceDayRow] = []
-        total_ing = Decimal("0")
-        total_egr = Decimal("0")
+        g = GRANULARIDADES[granularidad]
+        return FinanceReportService._fill(
+            FinanceReportService._buckets(rango, g), inicio=g.start(desde), hasta=hasta, step=g.step
+        )
 
-        d = desde
+    @staticmethod
+    def _fill(
+        rows: Iterable[Tuple[date, Optional[Decimal], Optional[Decimal]]],
+        *,
+        inicio: date,
+        hasta: date,
+        step: Callable[[date], date],
+    ) -> Iterator[FinanceDayRow]:
+        """
+        Merge del cursor (ordenado por fecha/bucket) con el calendario: un paso por bucket
+        (no por día); los buckets sin movimientos van en 0.
+        """
+        rows = iter(rows)
+        pendiente = next(rows, None)
+
+        d = inicio
         while d <= hasta:
-            ing = ingresos_por_dia[d]
-            egr = egresos_por_dia[d]
-            gan = ing - egr
+            while pendiente is not None and pendiente[0] < d:
+                pendiente = next(rows, None)
+            if pendiente is not None and pendiente[0] == d:
+                ing, egr = pendiente[1] or ZERO, pendiente[2] or ZERO
+                pendiente = next(rows, None)
+            else:
+                ing, egr = ZERO, ZERO
+            yield FinanceDayRow(d, ing, egr)
+            d = step(d)
 
-            total_ing += ing
-            total_egr += egr
-            serie.append(FinanceDayRow(fecha=d, ingresos=ing, egresos=egr, ganancia=gan))
-            d = d + timedelta(days=1)
+    @staticmethod
+    def _buckets(rango, g: Granularity) -> Iterator[Tuple[date, Decimal, Decimal]]:
+        """
+        GROUP BY Trunc*(fecha) en SQL: una fila por bucket con movimientos.
+        Cada bucket se etiqueta con su inicio (p.ej. 1er día del mes), aunque el primero/último
+        puedan estar recortados por desde/hasta.
+        """
+        rows = (
+            rango.annotate(bucket=g.trunc("fecha"))
+            .values_list("bucket")
+            .annotate(ing=Sum("ingresos"), egr=Sum("egresos"))
+            .order_by("bucket")
+        )
+        for bucket, ing, egr in rows.iterator(chunk_size=CHUNK_SIZE):
+            yield bucket, (ing or ZERO).quantize(_CENT), (egr or ZERO).quantize(_CENT)
 
-        totales = FinanceTotals(
-            ingresos=total_ing,
-            egresos=total_egr,
-            ganancia=(total_ing - total_egr),
+    @staticmethod
+    def _devengado(
+        *, desde: date, hasta: date, bucket: Callable[[date], date]
+    ) -> list[Tuple[date, Decimal, Decimal]]:
+        """
+        Movimientos por bucket con alquileres devengados: ventas (GROUP BY fecha),
+        egresos del ledger y el devengado mensual de accrued_rentals.
+        Acotado por los días con movimientos, no por el largo del rango.
+        """
+        por_bucket: Dict[date, list] = defaultdict(lambda: [ZERO, ZERO])
+
+        ventas = (
+            RevenueEvent.objects.filter(tipo=RevenueType.VENTA, fecha__gte=desde, fecha__lte=hasta)
+            .values_list("fecha")
+            .annotate(total=Sum("monto_total"))
+            .order_by()
         )
+        for fecha, total in ventas:
+            por_bucket[bucket(fecha)][0] += total or ZERO
+
+        egresos = (
+            DailyFinanceLedger.objects.filter(fecha__gte=desde, fecha__lte=hasta)
+            .exclude(egresos=0)
+            .values_list("fecha", "egresos")
+        )
+        for fecha, egr in egresos:
+            por_bucket[bucket(fecha)][1] += egr
+
+        for mes, monto in accrued_rentals(desde=desde, hasta=hasta).items():
+            por_bucket[bucket(max(mes, desde))][0] += monto
 
-        return FinanceReport(desde=desde, hasta=hasta, totales=totales, serie_diaria=serie)
+        return [(b, ing.quantize(_CENT), egr.quantize(_CENT)) for b, (ing, egr) in sorted(por_bucket.items())]
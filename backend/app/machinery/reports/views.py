@@ -1,12 +1,44 @@
 from __future__ import annotations
 
 from datetime import date
+from typing import Optional
 
-from rest_framework.decorators import api_view
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
 from machinery.shared.errors import DomainError, ErrorCodes
-from .services import FinanceReportService
+from .breakdown import GROUP_BYS, FinanceBreakdownService
+from .cache import report_cache
+from .export import EXPORTS
+from .services import CAJA, CRITERIOS, DEVENGADO, DIA, GRANULARIDADES, FinanceDayRow, FinanceReportService
+
+
+class _ExportRenderer(JSONRenderer):
+    """
+    Solo habilita ?format=csv|ndjson en la negociación de DRF: el export se devuelve como
+    StreamingHttpResponse y este renderer únicamente se usa para errores, que van en JSON
+    con Content-Type application/json (no el del export).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get("response")
+        if response is not None:
+            # Response ya puso el media_type del export; lo pisamos antes de devolver el cuerpo
+            response["Content-Type"] = JSONRenderer.media_type
+        return super().render(data, JSONRenderer.media_type, renderer_context)
+
+
+class CSVRenderer(_ExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class NDJSONRenderer(_ExportRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
 
 
 def _parse_date(value: str) -> date:
@@ -19,7 +51,95 @@ def _parse_date(value: str) -> date:
         )
 
 
+# ?serie=filas|columnas (default filas)
+FILAS = "filas"
+COLUMNAS = "columnas"
+
+
+def _cents(value) -> int:
+    return int((value * 100).to_integral_value())
+
+
+def _serie_filas(serie: list[FinanceDayRow]) -> list[dict]:
+    return [
+        {
+            "fecha": r.fecha.isoformat(),
+            "ingresos": str(r.ingresos),
+            "egresos": str(r.egresos),
+            "ganancia": str(r.ganancia),
+        }
+        for r in serie
+    ]
+
+
+def _serie_columnas(serie: list[FinanceDayRow], *, desde: date) -> dict:
+    """
+    Un array por columna: fechas como días desde `desde` (el primer bucket puede ser
+    negativo si empieza antes) y montos en centavos enteros.
+    """
+    base = desde.toordinal()
+    ingresos = [_cents(r.ingresos) for r in serie]
+    egresos = [_cents(r.egresos) for r in serie]
+    return {
+        "base": desde.isoformat(),
+        "fecha": [r.fecha.toordinal() - base for r in serie],
+        "ingresos": ingresos,
+        "egresos": egresos,
+        "ganancia": [i - e for i, e in zip(ingresos, egresos)],
+    }
+
+
+def _desglose(desde: date, hasta: date, group_by: str) -> dict:
+    filas = FinanceBreakdownService.build(desde=desde, hasta=hasta, group_by=group_by)
+    return {
+        "group_by": group_by,
+        "filas": [
+            {
+                "clave": r.clave,
+                "nombre": r.nombre,
+                "ingresos": str(r.ingresos),
+                "egresos": str(r.egresos),
+                "ganancia": str(r.ganancia),
+            }
+            for r in filas
+        ],
+    }
+
+
+def _report_data(
+    desde: date, hasta: date, granularidad: str, criterio: str, forma: str, group_by: Optional[str] = None
+) -> dict:
+    rep = FinanceReportService.build(desde=desde, hasta=hasta, granularidad=granularidad, criterio=criterio)
+
+    if forma == COLUMNAS:
+        serie = _serie_columnas(rep.serie, desde=rep.desde)
+    else:
+        serie = _serie_filas(rep.serie)
+
+    data = {
+        "desde": rep.desde.isoformat(),
+        "hasta": rep.hasta.isoformat(),
+        "granularidad": rep.granularidad,
+        "criterio": rep.criterio,
+        "totales": {
+            "ingresos": str(rep.totales.ingresos),
+            "egresos": str(rep.totales.egresos),
+            "ganancia": str(rep.totales.ganancia),
+        },
+    }
+    if group_by:
+        data["desglose"] = _desglose(desde, hasta, group_by)
+
+    if forma == COLUMNAS:
+        data["serie_columnas"] = serie
+    else:
+        # por día se mantiene `serie_diaria`; con buckets la serie va en `serie` (fecha = inicio del bucket)
+        data["serie_diaria" if granularidad == DIA else "serie"] = serie
+    return data
+
+
 @api_view(["GET"])
+@renderer_classes([*api_settings.DEFAULT_RENDERER_CLASSES, CSVRenderer, NDJSONRenderer])
 def finance_report(request):
     desde_str = request.query_params.get("desde")
     hasta_str = request.query_params.get("hasta")
@@ -39,25 +159,75 @@ def finance_report(request):
             message_override="El rango es inválido: hasta debe ser >= desde.",
         )
 
-    rep = FinanceReportService.build(desde=desde, hasta=hasta)
+    # ?granularidad=dia|semana|mes|trimestre|anio (default dia)
+    granularidad = request.query_params.get("granularidad") or DIA
+    if granularidad != DIA and granularidad not in GRANULARIDADES:
+        raise DomainError(
+            ErrorCodes.VALIDATION_ERROR,
+            message_override="granularidad inválida.",
+            details={"disponibles": [DIA, *GRANULARIDADES]},
+        )
 
-    return Response(
-        {
-            "desde": rep.desde.isoformat(),
-            "hasta": rep.hasta.isoformat(),
-            "totales": {
-                "ingresos": str(rep.totales.ingresos),
-                "egresos": str(rep.totales.egresos),
-                "ganancia": str(rep.totales.ganancia),
-            },
-            "serie_diaria": [
-                {
-                    "fecha": r.fecha.isoformat(),
-                    "ingresos": str(r.ingresos),
-                    "egresos": str(r.egresos),
-                    "ganancia": str(r.ganancia),
-                }
-                for r in rep.serie_diaria
-            ],
-        }
+    # ?criterio=caja|devengado (default caja)
+    criterio = request.query_params.get("criterio") or CAJA
+    if criterio not in CRITERIOS:
+        raise DomainError(
+            ErrorCodes.VALIDATION_ERROR,
+            message_override="criterio inválido.",
+            details={"disponibles": list(CRITERIOS)},
+        )
+
+    forma = request.query_params.get("serie") or FILAS
+    if forma not in (FILAS, COLUMNAS):
+        raise DomainError(
+            ErrorCodes.VALIDATION_ERROR,
+            message_override="serie inválida.",
+            details={"disponibles": [FILAS, COLUMNAS]},
+        )
+
+    # ?group_by=maquina|tipo|cliente -> desglose del rango (criterio caja)
+    group_by = request.query_params.get("group_by") or None
+    if group_by is not None and group_by not in GROUP_BYS:
+        raise DomainError(
+            ErrorCodes.VALIDATION_ERROR,
+            message_override="group_by inválido.",
+            details={"disponibles": list(GROUP_BYS)},
+        )
+    if group_by is not None and criterio != CAJA:
+        raise DomainError(
+            ErrorCodes.VALIDATION_ERROR,
+            message_override="group_by solo está disponible con criterio=caja.",
+        )
+
+    # ?format=csv|ndjson -> export en streaming (memoria constante, sin cache)
+    export = EXPORTS.get(request.accepted_renderer.format)
+    if export is not None:
+        if group_by is not None:
+            # el export es solo la serie: no descartamos el desglose en silencio
+            raise DomainError(
+                ErrorCodes.VALIDATION_ERROR,
+                message_override="group_by no está disponible con format=csv/ndjson.",
+                details={"format": request.accepted_renderer.format, "group_by": group_by},
+            )
+        iter_rows, content_type = export
+        rows = FinanceReportService.iter_serie(
+            desde=desde, hasta=hasta, granularidad=granularidad, criterio=criterio
+        )
+        resp = StreamingHttpResponse(iter_rows(rows), content_type=content_type)
+        filename = (
+            f"finanzas_{desde.isoformat()}_{hasta.isoformat()}_{granularidad}_{criterio}"
+            f".{request.accepted_renderer.format}"
+        )
+        resp["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return resp
+
+    # cache por (versión de datos, parámetros): cualquier escritura que cambie el reporte sube la versión.
+    # devengado además depende del mes actual (los alquileres abiertos devengan hasta hoy)
+    mes = date.today().replace(day=1) if criterio == DEVENGADO else None
+    data, hit = report_cache.get_or_build(
+        (desde, hasta, granularidad, criterio, mes, forma, group_by),
+        lambda: _report_data(desde, hasta, granularidad, criterio, forma, group_by),
     )
+    resp = Response(data)
+    resp["X-Report-Cache"] = "HIT" if hit else "MISS"
+    return resp
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+
+from .errors import DomainError, ErrorCodes
+
+SPARSE_CONTEXT_KEY = "sparse_fields"
+
+
+def _csv_param(raw: Optional[str]) -> List[str]:
+    return [p.strip() for p in (raw or "").split(",") if p.strip()]
+
+
+@dataclass(frozen=True)
+class SparseSource:
+    """
+    Qué necesita un campo del queryset:
+    - columns: columnas para `.only()` (con `__` para relaciones)
+    - select: relaciones para `select_related`
+    - prefetch: claves de prefetch (las resuelve el service de cada dominio)
+    """
+    columns: Tuple[str, ...] = ()
+    select: Tuple[str, ...] = ()
+    prefetch: Tuple[str, ...] = ()
+
+
+def source_for_attrs(model: type[models.Model], attrs: Sequence[str]) -> Optional[SparseSource]:
+    """
+    Traduce el `source` de un campo DRF ("purchase.budget.numero") a columnas +
+    select_related. None si no se puede proyectar (property, relación inversa, etc.).
+    """
+    if not attrs:
+        return None
+
+    columns: List[str] = []
+    select: Optional[str] = None
+    path: List[str] = []
+
+    for i, attr in enumerate(attrs):
+        try:
+            f = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+
+        path.append(attr)
+        lookup = "__".join(path)
+
+        if i == len(attrs) - 1:
+            if not f.concrete:
+                return None
+            columns.append(lookup)
+            break
+
+        if not (f.is_relation and (f.many_to_one or f.one_to_one)):
+            return None
+        if f.concrete:
+            # la FK tiene que viajar para poder seguir el join
+            columns.append(lookup)
+        select = lookup
+        model = f.related_model
+
+    return SparseSource(columns=tuple(columns), select=(select,) if select else ())
+
+
+@dataclass(frozen=True)
+class SparsePlan:
+    """
+    Resultado de `?fields=` / `?exclude=` para un serializer.
+    - fields: campos a serializar (None = todos)
+    - columns: proyección para `.only()` (None = columnas completas)
+    """
+    fields: Optional[FrozenSet[str]]
+    columns: Optional[FrozenSet[str]]
+    select: FrozenSet[str]
+    prefetch: FrozenSet[str]
+
+    def apply(self, qs: models.QuerySet) -> models.QuerySet:
+        if self.select:
+            qs = qs.select_related(*sorted(self.select))
+        if self.columns is not None:
+            qs = qs.only(*sorted(self.columns))
+        return qs
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Serializer que respeta los campos pedidos por la vista (context[SPARSE_CONTEXT_KEY]).
+    Solo recorta el serializer raíz (o el hijo de un many=True); los anidados quedan igual.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        root = self.root
+        if self is not root and not (isinstance(root, serializers.ListSerializer) and self.parent is root):
+            return fields
+
+        keep = self.context.get(SPARSE_CONTEXT_KEY)
+        if keep is None:
+            return fields
+        return {name: f for name, f in fields.items() if name in keep}
+
+
+class SparseFieldsetViewSetMixin:
+    """
+    ✅ ?fields=id,numero,total_snapshot / ?exclude=items
+
+    - recorta el serializer (que tiene que usar SparseFieldsetSerializerMixin)
+    - arma un SparsePlan: `.only()` de las columnas que usan los campos pedidos,
+      select_related solo de las relaciones necesarias y las claves de prefetch
+      que declaran los campos calculados en `sparse_sources`
+    - sin ?fields/?exclude el plan igual sirve para saber qué relaciones cargar
+    """
+
+    sparse_actions: Tuple[str, ...] = ("list", "retrieve")
+    # campo -> SparseSource (SerializerMethodField y campos que no salen de una columna)
+    sparse_sources: Dict[str, SparseSource] = {}
+
+    def get_sparse_plan(self) -> Optional[SparsePlan]:
+        if hasattr(self, "_sparse_plan"):
+            return self._sparse_plan
+
+        plan = None
+        request = getattr(self, "request", None)
+        if request is not None and self.action in self.sparse_actions:
+            plan = self._build_sparse_plan(request.query_params)
+
+        self._sparse_plan = plan
+        return plan
+
+    def _build_sparse_plan(self, params) -> SparsePlan:
+        serializer_class = self.get_serializer_class()
+        all_fields = serializer_class().fields
+        model = serializer_class.Meta.model
+
+        requested = _csv_param(params.get("fields"))
+        excluded = _csv_param(params.get("exclude"))
+
+        unknown = [name for name in (*requested, *excluded) if name not in all_fields]
+        if unknown:
+            raise DomainError(
+                ErrorCodes.VALIDATION_ERROR,
+                message_override="Campos desconocidos en fields/exclude.",
+                details={"desconocidos": unknown, "disponibles": list(all_fields.keys())},
+            )
+
+        trimmed = bool(requested or excluded)
+        keep = [
+            name for name in all_fields
+            if (not requested or name in requested) and name not in excluded
+        ]
+
+        columns: Optional[set] = {model._meta.pk.name}
+        select: set = set()
+        prefetch: set = set()
+
+        for name in keep:
+            field = all_fields[name]
+            source = self.sparse_sources.get(name)
+            if source is None and not isinstance(field, serializers.SerializerMethodField):
+                source = source_for_attrs(model, field.source_attrs)
+            if source is None:
+                # no sabemos qué columnas usa: cargamos la fila completa
+                columns = None
+                continue
+
+            if columns is not None:
+                columns.update(source.columns)
+            select.update(source.select)
+            prefetch.update(source.prefetch)
+
+        return SparsePlan(
+            fields=frozenset(keep) if trimmed else None,
+            columns=frozenset(columns) if (trimmed and columns is not None) else None,
+            select=frozenset(select),
+            prefetch=frozenset(prefetch),
+        )
+
+    def sparse_queryset(self, qs: models.QuerySet) -> models.QuerySet:
+        plan = self.get_sparse_plan()
+        return plan.apply(qs) if plan is not None else qs
+
+    def get_serializer_context(self):
+        ctx = super().get_serializer_context()
+        plan = self.get_sparse_plan()
+        if plan is not None and plan.fields is not None:
+            ctx[SPARSE_CONTEXT_KEY] = plan.fields
+        return ctx
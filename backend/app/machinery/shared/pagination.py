@@ -1,6 +1,21 @@
 from __future__ import annotations
 
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from machinery.shared.errors import DomainError, ErrorCodes
+
+
 
 class DefaultPagination(PageNumberPagination):
     """
@@ -9,3 +24,199 @@ class DefaultPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    """Como DjangoJSONEncoder pero sin truncar microsegundos (el cursor compara por igualdad)."""
+
+    def default(self, o):
+        if isinstance(o, (datetime, date)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _parse_ordering(ordering: Sequence[str]) -> List[Tuple[str, bool]]:
+    """("-fecha", "id") -> [("fecha", True), ("id", False)]"""
+    return [(o[1:], True) if o.startswith("-") else (o, False) for o in ordering]
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre el orden real de la vista (`view.cursor_ordering`,
+    que tiene que terminar en una clave única, ej. "id").
+
+    - ?cursor=<opaco>&page_size=20 (cursor vacío = primera página)
+    - sin COUNT(*) ni OFFSET: cada página es un WHERE sobre la última fila + LIMIT
+    - next / previous como links con el cursor ya armado
+    """
+
+    cursor_query_param = "cursor"
+    page_size = DefaultPagination.page_size
+    page_size_query_param = DefaultPagination.page_size_query_param
+    max_page_size = DefaultPagination.max_page_size
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params.get(self.page_size_query_param) or self.page_size)
+        except ValueError:
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # -------------------------
+    # Cursor (base64 de JSON)
+    # -------------------------
+    @staticmethod
+    def encode_cursor(values: Sequence[Any], *, reverse: bool) -> str:
+        raw = json.dumps({"v": list(values), "r": int(reverse)}, cls=_CursorEncoder, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(token: str, fields: Sequence[Any]) -> Tuple[List[Any], bool]:
+        """
+        Valida el cursor contra los campos del orden: misma cantidad de valores y cada uno
+        convertible con `field.to_python` (y no nulo). Cualquier falla -> VALIDATION_ERROR
+        (400): es un parámetro mal formado, no un recurso inexistente.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            data = json.loads(raw)
+            values, reverse = data["v"], bool(data["r"])
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            values = [field.to_python(v) for field, v in zip(fields, values)]
+            if any(v is None for v in values):
+                raise ValueError
+        except (ValueError, KeyError, TypeError, ValidationError):
+            raise DomainError(ErrorCodes.VALIDATION_ERROR, message_override="Cursor inválido.")
+        return values, reverse
+
+    @staticmethod
+    def _key_fields(model, keys: List[Tuple[str, bool]]) -> List[Any]:
+        """Campo del modelo de cada clave del orden (sigue relaciones con "__")."""
+        fields = []
+        for name, _ in keys:
+            opts, field = model._meta, None
+            for part in name.split("__"):
+                field = opts.get_field(part)
+                if field.is_relation:
+                    opts = field.related_model._meta
+            fields.append(field.target_field if field.is_relation else field)
+        return fields
+
+    @staticmethod
+    def _after(keys: List[Tuple[str, bool]], values: Sequence[Any], *, reverse: bool) -> Q:
+        """
+        Filas estrictamente después de `values` en el orden `keys` (o antes si reverse):
+        (a > va) OR (a = va AND b > vb) OR ... respetando la dirección de cada clave.
+        """
+        q = Q()
+        for i, (field, desc) in enumerate(keys):
+            op = "lt" if desc != reverse else "gt"
+            cond = Q(**{f"{field}__{op}": values[i]})
+            for (prev_field, _), prev_value in zip(keys[:i], values[:i]):
+                cond &= Q(**{prev_field: prev_value})
+            q |= cond
+        return q
+
+    # -------------------------
+    # BasePagination
+    # -------------------------
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        keys = _parse_ordering(view.cursor_ordering)
+        size = self.get_page_size(request)
+
+        token = request.query_params.get(self.cursor_query_param) or ""
+        if token:
+            values, reverse = self.decode_cursor(token, self._key_fields(queryset.model, keys))
+        else:
+            values, reverse = None, False
+
+        # los valores de las claves viajan como anotación (sirve aunque haya .only())
+        aliases = [f"_cursor_{i}" for i in range(len(keys))]
+        qs = queryset.annotate(**{a: F(field) for a, (field, _) in zip(aliases, keys)})
+        if values is not None:
+            qs = qs.filter(self._after(keys, values, reverse=reverse))
+
+        order = [(field if desc == reverse else f"-{field}") for field, desc in keys]
+        rows = list(qs.order_by(*order)[: size + 1])
+
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if reverse:
+            rows.reverse()
+
+        def _key(obj) -> List[Any]:
+            return [getattr(obj, a) for a in aliases]
+
+        self.next_cursor = self.previous_cursor = None
+        if rows:
+            if has_more or reverse:
+                self.next_cursor = self.encode_cursor(_key(rows[-1]), reverse=False)
+            if (has_more and reverse) or (values is not None and not reverse):
+                self.previous_cursor = self.encode_cursor(_key(rows[0]), reverse=True)
+        elif values is not None:
+            # página vacía: volver desde el mismo punto en la otra dirección
+            self.previous_cursor = None if reverse else self.encode_cursor(values, reverse=True)
+            self.next_cursor = self.encode_cursor(values, reverse=False) if reverse else None
+
+        return rows
+
+    def _link(self, cursor: Optional[str]) -> Optional[str]:
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self._link(self.next_cursor)),
+                    ("previous", self._link(self.previous_cursor)),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class DefaultOrKeysetPagination(DefaultPagination):
+    """
+    ✅ Page-number por defecto (igual que DefaultPagination); con ?cursor= en la URL
+    pasa a KeysetPagination. La vista tiene que definir `cursor_ordering`.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self._keyset = None
+        if KeysetPagination.cursor_query_param in request.query_params:
+            self._keyset = KeysetPagination()
+            return self._keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self._keyset is not None:
+            return self._keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        params = super().get_schema_operation_parameters(view)
+        params.append(
+            {
+                "name": KeysetPagination.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Paginación por cursor (vacío = primera página). Sin count.",
+                "schema": {"type": "string"},
+            }
+        )
+        return params
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import List, Sequence
+
+from machinery.budgets.repositories import BudgetRepository
+from machinery.budgets.services import BudgetService
+from machinery.models import Budget, MachineBase, Purchase, PurchasedUnit
+from machinery.purchases.services import PurchaseService
+
+
+def machines(n: int, *, total: Decimal = Decimal("10000.00")) -> List[MachineBase]:
+    return [MachineBase.objects.create(nombre=f"Máquina {i}", total=total * (i + 1)) for i in range(n)]
+
+
+def budget_payload(machines: Sequence[MachineBase], *, cantidad: int = 1) -> dict:
+    return {"items": [{"machine_base_id": m.id, "cantidad": cantidad} for m in machines]}
+
+
+def draft_budget(machines: Sequence[MachineBase], *, cantidad: int = 1) -> Budget:
+    return BudgetService(repo=BudgetRepository()).create_from_payload(budget_payload(machines, cantidad=cantidad))
+
+
+def purchase(machines: Sequence[MachineBase], *, cantidad: int = 1, fecha_compra: str = "2025-01-15") -> Purchase:
+    """Presupuesto DRAFT comprado (cerrado + compra + unidades en DEPÓSITO)."""
+    budget = draft_budget(machines, cantidad=cantidad)
+    return BudgetService(repo=BudgetRepository()).purchase_from_draft(
+        budget_id=budget.id,
+        fecha_compra=fecha_compra,
+        notas="",
+        purchase_service=PurchaseService(),
+    )
+
+
+def units(purchase: Purchase) -> List[PurchasedUnit]:
+    return list(PurchasedUnit.objects.filter(purchase=purchase).order_by("id"))
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from machinery.models import PurchasedUnit, RevenueEvent, UnitStatus
+from machinery.purchases.availability import availability_index
+from machinery.purchases.services import UnitLifecycleService
+
+from . import factories
+
+
+class ActiveRentalTests(TestCase):
+    """alquiler_activo: finalizar un alquiler es un lookup por PK, no una búsqueda en el historial."""
+
+    def setUp(self):
+        availability_index.invalidate()
+        machine = factories.machines(1)[0]
+        self.unit, self.other = factories.units(factories.purchase([machine], cantidad=2))
+
+    def _rent(self, unit_id: int, month: int = 1) -> RevenueEvent:
+        unit = UnitLifecycleService.mark_rented(
+            unit_id=unit_id,
+            inicio_year=2025,
+            inicio_month=month,
+            retorno_estimada_year=2025,
+            retorno_estimada_month=month + 1,
+            monto_mensual=Decimal("100.00"),
+        )
+        return unit.alquiler_activo
+
+    def _finish(self, unit_id: int, month: int = 2) -> PurchasedUnit:
+        return UnitLifecycleService.finish_rental(unit_id=unit_id, retorno_real_year=2025, retorno_real_month=month)
+
+    def test_pointer_follows_the_rental(self):
+        ev = self._rent(self.unit.id)
+        self.assertEqual(PurchasedUnit.objects.get(pk=self.unit.id).alquiler_activo_id, ev.id)
+
+        unit = self._finish(self.unit.id)
+        self.assertIsNone(unit.alquiler_activo_id)
+        self.assertIsNone(PurchasedUnit.objects.get(pk=self.unit.id).alquiler_activo_id)
+        ev.refresh_from_db()
+        self.assertEqual(ev.monto_total, Decimal("200.00"))
+
+    def test_bulk_sets_and_clears_the_pointer(self):
+        ids = [self.unit.id, self.other.id]
+        ev, _ = UnitLifecycleService.mark_rented_many(
+            unit_ids=ids,
+            inicio_year=2025,
+            inicio_month=1,
+            retorno_estimada_year=2025,
+            retorno_estimada_month=2,
+            monto_mensual=Decimal("100.00"),
+        )
+        self.assertEqual(set(PurchasedUnit.objects.values_list("alquiler_activo_id", flat=True)), {ev.id})
+
+        UnitLifecycleService.finish_rental_many(unit_ids=ids, retorno_real_year=2025, retorno_real_month=2)
+        self.assertEqual(set(PurchasedUnit.objects.values_list("alquiler_activo_id", flat=True)), {None})
+
+    def test_finish_does_not_depend_on_history(self):
+        # la otra unidad ya tiene historial; la primera solo un alquiler
+        for month in (1, 4, 7):
+            self._rent(self.other.id, month)
+            self._finish(self.other.id, month + 1)
+        self._rent(self.other.id, 10)
+        self._rent(self.unit.id, 10)
+
+        with CaptureQueriesContext(connection) as sin_historial:
+            self._finish(self.unit.id, 11)
+        with CaptureQueriesContext(connection) as con_historial:
+            self._finish(self.other.id, 11)
+
+        self.assertEqual(len(con_historial), len(sin_historial))
+        # sin la búsqueda por unidad en el historial (solo la usa el fallback sin puntero)
+        historial = '"revenue_event_unit"."purchased_unit_id" IN'
+        self.assertFalse(any(historial in q["sql"] for q in con_historial.captured_queries))
+
+    def test_legacy_rental_without_pointer(self):
+        # alquiler anterior al puntero: se encuentra por el historial (índice parcial)
+        ev = self._rent(self.unit.id)
+        PurchasedUnit.objects.filter(pk=self.unit.id).update(alquiler_activo=None)
+
+        unit = self._finish(self.unit.id)
+        self.assertEqual(unit.estado, UnitStatus.DEPOSITO)
+        ev.refresh_from_db()
+        self.assertEqual((ev.fecha_retorno_real.month, ev.monto_total), (2, Decimal("200.00")))
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from unittest import mock
+
+from django.db.models import F
+from rest_framework.test import APITestCase
+
+from machinery.budgets.repositories import BudgetRepository
+from machinery.budgets.services import BudgetService
+from machinery.models import AvailabilityVersion
+from machinery.purchases.availability import AvailabilityIndex, availability_index
+
+from . import factories
+
+RANGO = "desde=2030-01&hasta=2030-03"
+
+
+class AvailabilityTests(APITestCase):
+    def setUp(self):
+        # índice del proceso: las versiones vuelven atrás con el rollback de cada test
+        availability_index.invalidate()
+        self.machine = factories.machines(1)[0]
+        self.units = factories.units(factories.purchase([self.machine], cantidad=3))
+        self.unit = self.units[0]
+
+    def _availability(self, rango: str = RANGO) -> dict:
+        r = self.client.get(f"/api/units/availability/?machine_base={self.machine.id}&{rango}")
+        self.assertEqual(r.status_code, 200)
+        return r.json()
+
+    def _rent(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            r = self.client.post(
+                f"/api/units/{self.unit.id}/mark-rented/",
+                {
+                    "inicio_year": 2030,
+                    "inicio_month": 2,
+                    "retorno_estimada_year": 2030,
+                    "retorno_estimada_month": 6,
+                    "monto_mensual": "100.00",
+                },
+                format="json",
+            )
+        self.assertEqual(r.status_code, 200, r.content)
+
+    def _return(self, year: int, month: int) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            r = self.client.post(
+                f"/api/units/{self.unit.id}/finish-rental/",
+                {"retorno_real_year": year, "retorno_real_month": month},
+                format="json",
+            )
+        self.assertEqual(r.status_code, 200, r.content)
+
+    def test_all_free(self):
+        data = self._availability()
+        self.assertEqual((data["total"], data["libres"]), (3, 3))
+        self.assertEqual([m["libres"] for m in data["capacidad_por_mes"]], [3, 3, 3])
+
+    def test_after_rent(self):
+        self._availability()
+        self._rent()
+
+        data = self._availability()
+        self.assertEqual(data["libres"], 2)
+        self.assertEqual([u["id"] for u in data["unidades_ocupadas"]], [self.unit.id])
+        # enero libre, febrero/marzo alquilada
+        self.assertEqual([m["libres"] for m in data["capacidad_por_mes"]], [3, 2, 2])
+
+    def test_after_return(self):
+        self._availability()
+        self._rent()
+        self._return(2030, 2)
+
+        # ocupada solo en febrero (inicio y retorno real)
+        data = self._availability()
+        self.assertEqual([m["libres"] for m in data["capacidad_por_mes"]], [3, 2, 3])
+        self.assertEqual(self._availability("desde=2030-03&hasta=2030-12")["libres"], 3)
+
+    def test_writer_applies_delta_without_rebuild(self):
+        self._availability()
+        with mock.patch.object(AvailabilityIndex, "rebuild", wraps=availability_index.rebuild) as rebuild:
+            self._rent()
+            self._return(2030, 3)
+            data = self._availability()
+        rebuild.assert_not_called()
+        self.assertEqual([m["libres"] for m in data["capacidad_por_mes"]], [3, 2, 2])
+
+    def test_other_process_write_triggers_rebuild(self):
+        self._availability()
+        # otro proceso subió la versión (no pasó por este índice)
+        AvailabilityVersion.objects.update(version=F("version") + 1)
+        with mock.patch.object(AvailabilityIndex, "rebuild", wraps=availability_index.rebuild) as rebuild:
+            self._availability()
+        rebuild.assert_called_once()
+
+    def test_unrelated_writes_keep_the_index(self):
+        self._availability()
+        # alta y baja de un presupuesto: sube la versión de los reportes, no la de disponibilidad
+        budget = factories.draft_budget([self.machine])
+        BudgetService(repo=BudgetRepository()).delete(budget.id)
+        with mock.patch.object(AvailabilityIndex, "rebuild", wraps=availability_index.rebuild) as rebuild:
+            self._availability()
+        rebuild.assert_not_called()
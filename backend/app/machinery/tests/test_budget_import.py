@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+
+from machinery.budgets.services import BudgetService
+from machinery.models import Budget, BudgetItem, BudgetTaxApplied
+
+from .test_budget_update import BudgetTestData
+
+URL = "/api/budgets/import/"
+
+
+class BudgetImportTests(BudgetTestData):
+    """POST /api/budgets/import/: errores por línea y un chunk por transacción."""
+
+    def _ndjson(self, *lines) -> bytes:
+        return "\n".join(l if isinstance(l, str) else json.dumps(l) for l in lines).encode()
+
+    def _import(self, body: bytes, *, chunk_size: int = 500) -> dict:
+        r = self.client.post(f"{URL}?chunk_size={chunk_size}", body, content_type="application/x-ndjson")
+        self.assertEqual(r.status_code, 200, r.content)
+        return r.json()
+
+    def _errores(self, report: dict) -> dict:
+        return {e["linea"]: e["errores"] for e in report["errores"]}
+
+    def test_imports_like_create(self):
+        payload = self._payload(2, cantidad=3)
+        report = self._import(self._ndjson(payload, payload))
+        self.assertEqual((report["lineas"], report["importados"], report["con_error"]), (2, 2, 0))
+
+        # mismos totales que el alta individual
+        self.client.post("/api/budgets/", payload, content_type="application/json")
+        self.assertEqual(len(set(Budget.objects.values_list("total_snapshot", flat=True))), 1)
+        self.assertEqual(BudgetItem.objects.count(), 3 * 2)
+
+    def test_line_errors(self):
+        ok = self._payload(1)
+        dup_tax = {**ok, "impuestos": [{"tax_id": self.tax.id}, {"tax_id": self.tax.id}]}
+        unknown = {"items": [{"machine_base_id": 999999, "cantidad": 1}]}
+        report = self._import(self._ndjson(ok, "{no es json", {"items": []}, "", dup_tax, unknown, ok))
+
+        self.assertEqual((report["lineas"], report["importados"], report["con_error"]), (7, 2, 4))
+        errores = self._errores(report)
+        self.assertEqual(sorted(errores), [2, 3, 5, 6])
+        self.assertTrue(errores[2].startswith("JSON inválido"))
+        self.assertIn("items", errores[3])
+        self.assertIn("Impuestos repetidos", errores[5])
+        self.assertIn("Referencia inexistente", errores[6])
+        self.assertEqual(Budget.objects.count(), 2)
+
+    def test_failed_chunk_is_rolled_back(self):
+        payload = self._payload(1)
+        flush = BudgetService._flush_catalog
+        calls = []
+
+        def falla_en_el_segundo(overrides):
+            calls.append(1)
+            if len(calls) == 2:
+                raise DatabaseError("boom")
+            return flush(overrides)
+
+        with mock.patch.object(BudgetService, "_flush_catalog", side_effect=falla_en_el_segundo):
+            report = self._import(self._ndjson(*[payload] * 5), chunk_size=2)
+
+        self.assertEqual((report["chunks"], report["importados"], report["con_error"]), (3, 3, 2))
+        errores = self._errores(report)
+        self.assertEqual(sorted(errores), [3, 4])
+        self.assertTrue(errores[3].startswith("Chunk 2 revertido"))
+        # nada del chunk 2 quedó escrito (ni el presupuesto ni sus hijos)
+        self.assertEqual(Budget.objects.count(), 3)
+        self.assertEqual(BudgetTaxApplied.objects.count(), 3)
+
+    def test_multipart(self):
+        archivo = SimpleUploadedFile("presupuestos.ndjson", self._ndjson(self._payload(1), self._payload(2)))
+        r = self.client.post(URL, {"archivo": archivo})
+        self.assertEqual(r.status_code, 200, r.content)
+        self.assertEqual(r.json()["importados"], 2)
+
+        r = self.client.post(URL, {"otro": "x"})
+        self.assertEqual(r.status_code, 400)
+
+    def test_invalid_chunk_size(self):
+        r = self.client.post(f"{URL}?chunk_size=abc", b"", content_type="application/x-ndjson")
+        self.assertEqual(r.status_code, 400)
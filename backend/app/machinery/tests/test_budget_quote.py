@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from machinery.models import Budget, MachineBase, Tax
+
+from .test_budget_update import BudgetTestData
+
+# campos del detalle que solo existen una vez guardado el presupuesto
+PERSISTED = {"id", "numero", "fecha", "estado", "created_at", "updated_at"}
+
+
+def _sin_ids(value):
+    """Detalle guardado -> forma de la cotización (sin ids ni campos de la fila)."""
+    if isinstance(value, dict):
+        return {k: _sin_ids(v) for k, v in value.items() if k not in PERSISTED}
+    if isinstance(value, list):
+        return [_sin_ids(v) for v in value]
+    return value
+
+
+class BudgetQuoteTests(BudgetTestData):
+    """POST /api/budgets/quote/ devuelve lo mismo que create, sin escribir nada."""
+
+    def _post(self, url: str, payload: dict):
+        return self.client.post(url, payload, content_type="application/json")
+
+    def _assert_quote_equals_create(self, payload: dict) -> dict:
+        quote = self._post("/api/budgets/quote/", payload)
+        self.assertEqual(quote.status_code, 200, quote.content)
+        created = self._post("/api/budgets/", payload)
+        self.assertEqual(created.status_code, 201, created.content)
+
+        self.assertEqual(quote.json(), _sin_ids(created.json()))
+        return quote.json()
+
+    def test_quote_equals_create(self):
+        data = self._assert_quote_equals_create(self._payload(3, cantidad=2))
+        self.assertEqual(len(data["items"]), 3)
+        self.assertNotEqual(Decimal(data["total_impuestos_snapshot"]), 0)
+
+    def test_excluded_tax_and_minimum(self):
+        minimo = Tax.objects.create(nombre="Tasa", porcentaje=Decimal("0.10"), monto_minimo=Decimal("999.99"))
+        payload = self._payload(1)
+        payload["impuestos"] = [
+            {"tax_id": self.tax.id, "incluido": False},
+            {"tax_id": minimo.id, "incluido": True},
+        ]
+        data = self._assert_quote_equals_create(payload)
+        # solo los incluidos, con el mínimo aplicado
+        self.assertEqual([t["tax_nombre"] for t in data["impuestos"]], ["Tasa"])
+        self.assertEqual(data["impuestos"][0]["monto_aplicado_snapshot"], "999.99")
+
+    def test_quote_writes_nothing(self):
+        machine = self.machines[0]
+        with self.captureOnCommitCallbacks() as callbacks:
+            r = self._post("/api/budgets/quote/", self._payload(2))
+        self.assertEqual(r.status_code, 200)
+
+        self.assertFalse(Budget.objects.exists())
+        self.assertEqual(callbacks, [])
+        # el precio del catálogo no se toca
+        self.assertEqual(MachineBase.objects.get(pk=machine.id).total, machine.total)
+
+    def test_invalid_payload(self):
+        r = self._post("/api/budgets/quote/", {"items": [{"machine_base_id": 999999, "cantidad": 1}]})
+        self.assertEqual(r.status_code, 404)
+        self.assertEqual(r.json()["error"]["code"], "NOT_FOUND")
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from machinery.budgets.services import MAX_SCENARIOS
+from machinery.models import Budget, LogisticsLeg, LogisticsStage, LogisticsType, Tax
+
+from .test_budget_update import BudgetTestData
+
+URL = "/api/budgets/scenarios/"
+
+
+class BudgetScenariosTests(BudgetTestData):
+    """POST /api/budgets/scenarios/: cada variante cotiza igual que /quote/ y el ranking es estable."""
+
+    def setUp(self):
+        super().setUp()
+        self.leg_aereo = LogisticsLeg.objects.create(
+            desde="Aeropuerto",
+            hasta="Aduana",
+            tipo=LogisticsType.AEREO,
+            etapa=LogisticsStage.HASTA_ADUANA,
+            total=Decimal("4000.00"),
+        )
+        self.tasa = Tax.objects.create(nombre="Tasa", porcentaje=Decimal("3.00"))
+        self.body = {
+            "base": self._payload(2),
+            "cantidades": [{"item": 0, "valores": [1, 2, 3]}],
+            "rutas": [[{"logistics_leg_id": self.leg.id}], [{"logistics_leg_id": self.leg_aereo.id}]],
+            "impuestos_opcionales": [self.tasa.id],
+        }
+
+    def _post(self, url: str, body: dict):
+        return self.client.post(url, body, content_type="application/json")
+
+    def _scenarios(self, **extra) -> dict:
+        r = self._post(URL, {**self.body, **extra})
+        self.assertEqual(r.status_code, 200, r.content)
+        return r.json()
+
+    def _quote(self, fila: dict) -> dict:
+        """Payload equivalente a una variante, cotizado por /quote/."""
+        payload = self._payload(2)
+        for item, cantidad in zip(payload["items"], fila["cantidades"]):
+            item["cantidad"] = cantidad
+        payload["logisticas"] = [{"logistics_leg_id": i} for i in fila["logisticas"]]
+        payload["impuestos"] = [{"tax_id": i, "incluido": True} for i in fila["impuestos"]]
+        return self._post("/api/budgets/quote/", payload).json()
+
+    def test_every_variant_matches_quote(self):
+        data = self._scenarios()
+
+        self.assertEqual(data["variantes"], 3 * 2 * 2)
+        self.assertEqual(len(data["resultados"]), 12)
+        for fila in data["resultados"]:
+            quote = self._quote(fila)
+            for campo in ("base_imponible", "total_impuestos", "costo_aduana", "total"):
+                self.assertEqual(fila[campo], quote[f"{campo}_snapshot"], (campo, fila))
+        self.assertFalse(Budget.objects.exists())
+
+    def test_ranking(self):
+        for ordenar_por in ("total", "costo_aduana"):
+            with self.subTest(ordenar_por=ordenar_por):
+                filas = self._scenarios(ordenar_por=ordenar_por)["resultados"]
+                claves = [(Decimal(f[ordenar_por]), Decimal(f["total"])) for f in filas]
+                self.assertEqual(claves, sorted(claves))
+
+        mas_barata = self._scenarios()["resultados"][0]
+        self.assertEqual(
+            (mas_barata["cantidades"], mas_barata["logisticas"], mas_barata["impuestos"]),
+            ([1, 1], [self.leg.id], [self.tax.id]),
+        )
+
+    def test_limit_keeps_the_top_rows(self):
+        todas = self._scenarios()["resultados"]
+        data = self._scenarios(limite=3)
+        self.assertEqual(data["variantes"], 12)
+        self.assertEqual(data["resultados"], todas[:3])
+
+    def test_too_many_variants(self):
+        # 2 ** 13 combinaciones de impuestos opcionales: se rechaza antes de leer el catálogo
+        opcionales = list(range(1, 14))
+        self.assertGreater(2 ** len(opcionales), MAX_SCENARIOS)
+
+        r = self._post(URL, {**self.body, "cantidades": [], "rutas": [], "impuestos_opcionales": opcionales})
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.json()["error"]["details"], {"variantes": 2 ** 13, "maximo": MAX_SCENARIOS})
+
+    def test_quantity_for_missing_item(self):
+        r = self._post(URL, {**self.body, "cantidades": [{"item": 5, "valores": [1]}]})
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.json()["error"]["details"]["items"], [5])
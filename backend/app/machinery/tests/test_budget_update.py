@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.test import TestCase
+
+from machinery.budgets.repositories import BudgetRepository
+from machinery.budgets.services import BudgetService
+from machinery.models import (
+    Accessory,
+    BudgetItem,
+    BudgetItemAccessory,
+    LogisticsLeg,
+    LogisticsStage,
+    LogisticsType,
+    MachineBase,
+    Tax,
+)
+
+# incluyen SAVEPOINT/RELEASE del @transaction.atomic del service
+# create: insert budget + 4 lookups de catálogo + 4 bulk_create + update de totales
+CREATE_QUERIES = 12
+# update: lock + compra + 4 lookups + 4 selects de filas actuales + update de totales
+UPDATE_UNCHANGED_QUERIES = 13
+# + bulk_update de items y de impuestos (cambia la base imponible)
+UPDATE_CHANGED_QUERIES = 15
+# + borrado del item: protección de unidades + cascade a accesorios + delete
+UPDATE_REMOVE_QUERIES = 18
+# GET /api/budgets/: count + página (con la compra por join) + items (con su máquina)
+LIST_QUERIES = 3
+# GET /api/budgets/{id}/: budget + items + accesorios + impuestos + logísticas
+DETAIL_QUERIES = 5
+
+
+class BudgetTestData(TestCase):
+    """Catálogo chico compartido por los tests de presupuestos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.machines = [
+            MachineBase.objects.create(nombre=f"Máquina {i}", total=Decimal("10000.00") * (i + 1)) for i in range(3)
+        ]
+        cls.accessories = [
+            Accessory.objects.create(nombre=f"Accesorio {i}", total=Decimal("500.00") * (i + 1)) for i in range(3)
+        ]
+        cls.leg = LogisticsLeg.objects.create(
+            desde="Puerto",
+            hasta="Aduana",
+            tipo=LogisticsType.MARITIMO,
+            etapa=LogisticsStage.HASTA_ADUANA,
+            total=Decimal("1500.00"),
+        )
+        cls.tax = Tax.objects.create(nombre="IVA", porcentaje=Decimal("21.00"))
+
+    def setUp(self):
+        self.service = BudgetService(repo=BudgetRepository())
+
+    def _payload(self, n_items: int, *, cantidad: int = 1) -> dict:
+        return {
+            "items": [
+                {
+                    "machine_base_id": self.machines[i].id,
+                    "cantidad": cantidad,
+                    "accesorios": [{"accessory_id": self.accessories[i].id, "cantidad": 1}],
+                }
+                for i in range(n_items)
+            ],
+            "logisticas": [{"logistics_leg_id": self.leg.id}],
+            "impuestos": [{"tax_id": self.tax.id, "incluido": True}],
+        }
+
+
+class BudgetUpdateQueryCountTests(BudgetTestData):
+    """
+    Cantidad de queries de create/update: no debe depender de cuántas filas tenga el
+    payload (lookups del catálogo en bloque + bulk_create/bulk_update por tabla).
+    """
+
+    def test_create(self):
+        with self.assertNumQueries(CREATE_QUERIES):
+            budget = self.service.create_from_payload(self._payload(3))
+
+        self.assertEqual(budget.items.count(), 3)
+        self.assertEqual(BudgetItemAccessory.objects.filter(budget_item__budget=budget).count(), 3)
+
+    def test_create_does_not_depend_on_payload_size(self):
+        with self.assertNumQueries(CREATE_QUERIES):
+            self.service.create_from_payload(self._payload(1))
+
+    def test_update_keeps_item_ids(self):
+        budget = self.service.create_from_payload(self._payload(3))
+        ids = list(budget.items.order_by("id").values_list("id", flat=True))
+
+        with self.assertNumQueries(UPDATE_CHANGED_QUERIES):
+            self.service.update_from_payload(budget_id=budget.id, payload=self._payload(3, cantidad=2))
+
+        self.assertEqual(list(budget.items.order_by("id").values_list("id", flat=True)), ids)
+        self.assertEqual(set(budget.items.values_list("cantidad", flat=True)), {2})
+
+    def test_update_unchanged_writes_nothing_but_totals(self):
+        budget = self.service.create_from_payload(self._payload(3))
+
+        with self.assertNumQueries(UPDATE_UNCHANGED_QUERIES):
+            self.service.update_from_payload(budget_id=budget.id, payload=self._payload(3))
+
+    def test_update_removes_item(self):
+        budget = self.service.create_from_payload(self._payload(3))
+        kept = list(budget.items.order_by("id").values_list("id", flat=True))[:2]
+
+        with self.assertNumQueries(UPDATE_REMOVE_QUERIES):
+            self.service.update_from_payload(budget_id=budget.id, payload=self._payload(2))
+
+        self.assertEqual(list(budget.items.order_by("id").values_list("id", flat=True)), kept)
+        # el delete del item cascadea a su accesorio
+        self.assertFalse(BudgetItemAccessory.objects.filter(accessory=self.accessories[2]).exists())
+        self.assertEqual(BudgetItem.objects.filter(budget=budget).count(), 2)
+
+
+class BudgetReadQueryCountTests(BudgetTestData):
+    """Listado y detalle: cantidad fija de queries, sin importar cuántos presupuestos/filas haya."""
+
+    def _create(self, n: int) -> None:
+        for _ in range(n):
+            self.service.create_from_payload(self._payload(3))
+
+    def test_list(self):
+        self._create(2)
+        with self.assertNumQueries(LIST_QUERIES):
+            r = self.client.get("/api/budgets/")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["count"], 2)
+
+    def test_list_does_not_depend_on_page_size(self):
+        self._create(8)
+        with self.assertNumQueries(LIST_QUERIES):
+            r = self.client.get("/api/budgets/")
+        self.assertEqual(len(r.json()["results"]), 8)
+
+    def test_detail(self):
+        budget = self.service.create_from_payload(self._payload(3))
+        with self.assertNumQueries(DETAIL_QUERIES):
+            r = self.client.get(f"/api/budgets/{budget.id}/")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(r.json()["items"]), 3)
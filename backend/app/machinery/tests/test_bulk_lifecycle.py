@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+from rest_framework.test import APITestCase
+
+from machinery.models import DailyFinanceLedger, InventoryCounter, PurchasedUnit, RevenueEvent, UnitStatus
+from machinery.purchases.availability import availability_index
+from machinery.purchases.counters import InventoryCounterService
+from machinery.reports.ledger import FinanceLedgerService
+
+from . import factories
+
+ALQUILER = {
+    "inicio_year": 2030,
+    "inicio_month": 1,
+    "retorno_estimada_year": 2030,
+    "retorno_estimada_month": 3,
+    "monto_mensual": "100.00",
+}
+
+
+class BulkLifecycleTests(APITestCase):
+    """Transiciones en lote: montos del evento compartido, contadores y ledger (sin drift contra un rebuild)."""
+
+    def setUp(self):
+        availability_index.invalidate()
+        self.machine = factories.machines(1)[0]
+        self.units = factories.units(factories.purchase([self.machine], cantidad=3))
+        self.ids = [u.id for u in self.units]
+
+    def _post(self, url: str, payload: dict) -> dict:
+        r = self.client.post(url, payload, format="json")
+        self.assertEqual(r.status_code, 200, r.content)
+        return r.json()
+
+    def _rent(self, ids) -> RevenueEvent:
+        data = self._post("/api/units/bulk/mark-rented/", {"unit_ids": ids, **ALQUILER})
+        return RevenueEvent.objects.get(pk=data["revenue_event_ids"][0])
+
+    def _finish(self, ids, month: int) -> list:
+        data = self._post(
+            "/api/units/bulk/finish-rental/",
+            {"unit_ids": ids, "retorno_real_year": 2030, "retorno_real_month": month},
+        )
+        return list(RevenueEvent.objects.filter(pk__in=data["revenue_event_ids"]).order_by("pk"))
+
+    def _counters(self) -> dict:
+        qs = InventoryCounter.objects.filter(machine_base=self.machine, cantidad__gt=0)
+        return dict(qs.values_list("estado", "cantidad"))
+
+    def _ingresos(self, fecha: date) -> Decimal:
+        row = DailyFinanceLedger.objects.filter(fecha=fecha).first()
+        return row.ingresos if row else Decimal("0.00")
+
+    def _assert_no_drift(self) -> None:
+        self.assertEqual(InventoryCounterService.rebuild(fix=False), [])
+        self.assertEqual(FinanceLedgerService.rebuild(fix=False), [])
+
+    def test_bulk_rent(self):
+        ev = self._rent(self.ids)
+
+        # monto_mensual por unidad -> el evento guarda el del contrato
+        self.assertEqual((ev.monto_mensual, ev.monto_total), (Decimal("300.00"), Decimal("900.00")))
+        self.assertEqual(sorted(ev.unidades.values_list("purchased_unit_id", flat=True)), self.ids)
+        self.assertEqual(self._counters(), {UnitStatus.ALQUILADA: 3})
+        # un alquiler abierto no toca el ledger
+        self.assertFalse(DailyFinanceLedger.objects.filter(fecha__year=2030).exists())
+        self._assert_no_drift()
+
+    def test_bulk_finish(self):
+        self._rent(self.ids)
+        (ev,) = self._finish(self.ids, 2)
+
+        self.assertEqual((ev.fecha_retorno_real, ev.monto_total), (date(2030, 2, 1), Decimal("600.00")))
+        self.assertEqual(self._ingresos(date(2030, 2, 1)), Decimal("600.00"))
+        self.assertEqual(self._counters(), {UnitStatus.DEPOSITO: 3})
+        self.assertFalse(PurchasedUnit.objects.filter(alquiler_activo__isnull=False).exists())
+        self._assert_no_drift()
+
+    def test_bulk_sell(self):
+        data = self._post(
+            "/api/units/bulk/mark-sold/",
+            {"unit_ids": self.ids[:2], "fecha_venta": "2030-05-10", "monto_total": "500.00"},
+        )
+        ev = RevenueEvent.objects.get(pk=data["revenue_event_ids"][0])
+
+        self.assertEqual((ev.monto_total, ev.monto_mensual), (Decimal("500.00"), None))
+        self.assertEqual(self._ingresos(date(2030, 5, 10)), Decimal("500.00"))
+        self.assertEqual(self._counters(), {UnitStatus.VENDIDA: 2, UnitStatus.DEPOSITO: 1})
+        self._assert_no_drift()
+
+    def test_single_return_splits_shared_rental(self):
+        ev = self._rent(self.ids)
+
+        r = self.client.post(
+            f"/api/units/{self.ids[0]}/finish-rental/",
+            {"retorno_real_year": 2030, "retorno_real_month": 2},
+            format="json",
+        )
+        self.assertEqual(r.status_code, 200, r.content)
+
+        propio = RevenueEvent.objects.get(unidades__purchased_unit_id=self.ids[0])
+        self.assertNotEqual(propio.id, ev.id)
+        self.assertEqual(
+            (propio.monto_mensual, propio.monto_total, propio.fecha_retorno_real),
+            (Decimal("100.00"), Decimal("200.00"), date(2030, 2, 1)),
+        )
+        # el compartido sigue abierto con el resto del contrato
+        ev.refresh_from_db()
+        self.assertEqual((ev.monto_mensual, ev.monto_total, ev.fecha_retorno_real), (Decimal("200.00"), Decimal("600.00"), None))
+        self.assertEqual(sorted(ev.unidades.values_list("purchased_unit_id", flat=True)), self.ids[1:])
+        self.assertEqual(self._ingresos(date(2030, 2, 1)), Decimal("200.00"))
+        self.assertEqual(self._counters(), {UnitStatus.DEPOSITO: 1, UnitStatus.ALQUILADA: 2})
+        self._assert_no_drift()
+
+        # el resto vuelve después: se cierra el evento original
+        (cerrado,) = self._finish(self.ids[1:], 3)
+        self.assertEqual((cerrado.id, cerrado.monto_total), (ev.id, Decimal("600.00")))
+        self.assertEqual(self._ingresos(date(2030, 3, 1)), Decimal("600.00"))
+        self.assertEqual(self._counters(), {UnitStatus.DEPOSITO: 3})
+        self._assert_no_drift()
+
+    def test_partial_bulk_return(self):
+        ev = self._rent(self.ids)
+        (propio,) = self._finish(self.ids[:2], 1)
+
+        self.assertNotEqual(propio.id, ev.id)
+        self.assertEqual((propio.monto_mensual, propio.monto_total), (Decimal("200.00"), Decimal("200.00")))
+        ev.refresh_from_db()
+        self.assertEqual((ev.monto_mensual, ev.monto_total), (Decimal("100.00"), Decimal("300.00")))
+        self.assertEqual(PurchasedUnit.objects.get(pk=self.ids[2]).alquiler_activo_id, ev.id)
+        self.assertEqual(self._counters(), {UnitStatus.DEPOSITO: 2, UnitStatus.ALQUILADA: 1})
+        self._assert_no_drift()
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+from rest_framework.test import APITestCase
+
+from machinery.purchases.services import UnitLifecycleService
+from machinery.reports.cache import report_cache
+
+from . import factories
+
+URL = "/api/reports/finance/?desde=2025-01-01&hasta=2025-12-31&group_by={}"
+
+
+class FinanceBreakdownTotalsTests(APITestCase):
+    """Las filas del desglose suman exactamente los totales del reporte (sin perder centavos)."""
+
+    def setUp(self):
+        # el cache es del proceso y la versión de datos vuelve atrás con el rollback de cada test
+        report_cache.clear()
+        self.machines = factories.machines(3, total=Decimal("1000.01"))
+        self.purchase = factories.purchase(self.machines, fecha_compra="2025-01-15")
+        # venta de flota: 100.00 entre 3 unidades de máquinas distintas
+        UnitLifecycleService.mark_sold_many(
+            unit_ids=[u.id for u in factories.units(self.purchase)],
+            fecha_venta=date(2025, 3, 10),
+            monto_total=Decimal("100.00"),
+        )
+
+    def _assert_sums_match(self, group_by: str) -> list:
+        data = self.client.get(URL.format(group_by)).json()
+        filas = data["desglose"]["filas"]
+        for campo in ("ingresos", "egresos"):
+            self.assertEqual(sum(Decimal(f[campo]) for f in filas), Decimal(data["totales"][campo]), campo)
+        return filas
+
+    def test_maquina(self):
+        filas = self._assert_sums_match("maquina")
+        self.assertEqual(len(filas), 3)
+        self.assertEqual(sorted(Decimal(f["ingresos"]) for f in filas), [Decimal("33.33"), Decimal("33.33"), Decimal("33.34")])
+
+    def test_tipo(self):
+        self._assert_sums_match("tipo")
+
+    def test_cliente(self):
+        self._assert_sums_match("cliente")
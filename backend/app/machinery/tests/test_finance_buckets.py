@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+from rest_framework.test import APITestCase
+
+from machinery.purchases.services import UnitLifecycleService
+from machinery.reports.cache import report_cache
+
+from . import factories
+
+URL = "/api/reports/finance/"
+
+# una venta por día, montos potencia de 2 para que cada suma identifique sus días
+VENTAS = [
+    date(2025, 1, 1),  # miércoles
+    date(2025, 1, 5),  # domingo
+    date(2025, 1, 6),  # lunes
+    date(2025, 3, 31),
+    date(2025, 4, 1),
+    date(2025, 12, 31),
+    date(2026, 1, 1),
+]
+
+
+class FinanceBucketTests(APITestCase):
+    """?granularidad=semana|mes|trimestre|anio: buckets etiquetados con su inicio y recortados por desde/hasta."""
+
+    def setUp(self):
+        report_cache.clear()
+        machine = factories.machines(1)[0]
+        # la compra cae en la misma semana que el 2025-01-01, pero fuera del rango
+        self.purchase = factories.purchase([machine], cantidad=len(VENTAS), fecha_compra="2024-12-31")
+        for i, (unit, fecha) in enumerate(zip(factories.units(self.purchase), VENTAS)):
+            UnitLifecycleService.mark_sold(unit_id=unit.id, fecha_venta=fecha, monto_total=Decimal(2**i))
+
+    def _serie(self, granularidad: str, desde: str, hasta: str) -> list:
+        r = self.client.get(URL, {"desde": desde, "hasta": hasta, "granularidad": granularidad})
+        self.assertEqual(r.status_code, 200, r.content)
+        data = r.json()
+        self.assertEqual(data["granularidad"], granularidad)
+
+        # los buckets suman lo mismo que la serie diaria del mismo rango
+        diaria = self.client.get(URL, {"desde": desde, "hasta": hasta}).json()
+        self.assertEqual(data["totales"], diaria["totales"])
+        return [(x["fecha"], Decimal(x["ingresos"]), Decimal(x["egresos"])) for x in data["serie"]]
+
+    def test_semana(self):
+        self.assertEqual(
+            self._serie("semana", "2025-01-01", "2025-01-12"),
+            [("2024-12-30", 3, 0), ("2025-01-06", 4, 0)],
+        )
+
+    def test_mes(self):
+        self.assertEqual(
+            self._serie("mes", "2025-01-01", "2025-04-30"),
+            [("2025-01-01", 7, 0), ("2025-02-01", 0, 0), ("2025-03-01", 8, 0), ("2025-04-01", 16, 0)],
+        )
+
+    def test_mes_clipped(self):
+        # primer y último bucket recortados: se etiquetan igual con el 1ro del mes
+        self.assertEqual(
+            self._serie("mes", "2025-01-02", "2025-03-15"),
+            [("2025-01-01", 6, 0), ("2025-02-01", 0, 0), ("2025-03-01", 0, 0)],
+        )
+
+    def test_trimestre(self):
+        self.assertEqual(
+            self._serie("trimestre", "2025-01-01", "2025-12-31"),
+            [("2025-01-01", 15, 0), ("2025-04-01", 16, 0), ("2025-07-01", 0, 0), ("2025-10-01", 32, 0)],
+        )
+
+    def test_anio(self):
+        self.assertEqual(
+            self._serie("anio", "2024-06-01", "2026-12-31"),
+            [("2024-01-01", 0, self.purchase.total_snapshot), ("2025-01-01", 63, 0), ("2026-01-01", 64, 0)],
+        )
+
+    def test_invalid(self):
+        r = self.client.get(URL, {"desde": "2025-01-01", "hasta": "2025-12-31", "granularidad": "hora"})
+        self.assertEqual(r.status_code, 400)
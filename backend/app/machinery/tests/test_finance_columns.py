@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+from rest_framework.test import APITestCase
+
+from machinery.purchases.services import UnitLifecycleService
+from machinery.reports.cache import report_cache
+
+from . import factories
+
+URL = "/api/reports/finance/"
+
+
+class FinanceColumnsTests(APITestCase):
+    """?serie=columnas: un array por columna, fechas como offset en días y montos en centavos."""
+
+    def setUp(self):
+        report_cache.clear()
+        machine = factories.machines(1, total=Decimal("1234.56"))[0]
+        self.purchase = factories.purchase([machine], cantidad=2, fecha_compra="2025-01-02")
+        a, b = factories.units(self.purchase)
+        UnitLifecycleService.mark_sold(unit_id=a.id, fecha_venta=date(2025, 1, 3), monto_total=Decimal("100.05"))
+        UnitLifecycleService.mark_sold(unit_id=b.id, fecha_venta=date(2025, 1, 15), monto_total=Decimal("0.99"))
+
+    def _get(self, **params) -> dict:
+        r = self.client.get(URL, params)
+        self.assertEqual(r.status_code, 200, r.content)
+        return r.json()
+
+    def test_daily(self):
+        data = self._get(desde="2025-01-01", hasta="2025-01-04", serie="columnas")
+        egreso = int(self.purchase.total_snapshot * 100)
+
+        self.assertNotIn("serie_diaria", data)
+        self.assertEqual(
+            data["serie_columnas"],
+            {
+                "base": "2025-01-01",
+                "fecha": [0, 1, 2, 3],
+                "ingresos": [0, 0, 10005, 0],
+                "egresos": [0, egreso, 0, 0],
+                "ganancia": [0, -egreso, 10005, 0],
+            },
+        )
+        self.assertEqual(Decimal(data["totales"]["ingresos"]), Decimal("100.05"))
+
+    def test_first_bucket_before_desde(self):
+        # la semana del 2025-01-08 empieza el lunes 6: offset negativo
+        data = self._get(desde="2025-01-08", hasta="2025-01-19", granularidad="semana", serie="columnas")
+        cols = data["serie_columnas"]
+        self.assertEqual((cols["base"], cols["fecha"]), ("2025-01-08", [-2, 5]))
+        self.assertEqual(cols["ingresos"], [0, 99])
+
+    def test_matches_rows(self):
+        for granularidad in ("dia", "semana", "mes"):
+            with self.subTest(granularidad=granularidad):
+                params = dict(desde="2024-12-20", hasta="2025-02-10", granularidad=granularidad)
+                filas = self._get(**params)
+                cols = self._get(**params, serie="columnas")["serie_columnas"]
+                serie = filas["serie_diaria" if granularidad == "dia" else "serie"]
+
+                base = date.fromisoformat(cols["base"]).toordinal()
+                self.assertEqual(
+                    [date.fromordinal(base + d).isoformat() for d in cols["fecha"]], [x["fecha"] for x in serie]
+                )
+                for campo in ("ingresos", "egresos", "ganancia"):
+                    self.assertEqual([Decimal(x[campo]) * 100 for x in serie], cols[campo], campo)
+
+    def test_invalid(self):
+        r = self.client.get(URL, {"desde": "2025-01-01", "hasta": "2025-01-31", "serie": "matriz"})
+        self.assertEqual(r.status_code, 400)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+
+from rest_framework.test import APITestCase
+
+from machinery.purchases.services import UnitLifecycleService
+from machinery.reports.cache import report_cache
+
+from . import factories
+
+URL = "/api/reports/finance/"
+RANGO = "desde=2025-01-01&hasta=2025-03-31&granularidad=mes"
+
+
+class FinanceExportTests(APITestCase):
+    """?format=csv|ndjson: la serie en streaming; los errores siguen en JSON."""
+
+    def setUp(self):
+        report_cache.clear()
+        machine = factories.machines(1)[0]
+        self.purchase = factories.purchase([machine], fecha_compra="2025-01-15")
+        UnitLifecycleService.mark_sold(
+            unit_id=factories.units(self.purchase)[0].id,
+            fecha_venta=date(2025, 3, 10),
+            monto_total=Decimal("100.00"),
+        )
+        self.egreso = self.purchase.total_snapshot
+
+    def _export(self, fmt: str):
+        r = self.client.get(f"{URL}?{RANGO}&format={fmt}")
+        self.assertEqual(r.status_code, 200)
+        return r, b"".join(r.streaming_content).decode()
+
+    def _assert_json_error(self, query: str):
+        r = self.client.get(f"{URL}?{query}")
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r["Content-Type"], "application/json")
+        self.assertEqual(json.loads(r.content)["error"]["code"], "VALIDATION_ERROR")
+
+    def test_csv(self):
+        r, body = self._export("csv")
+
+        self.assertEqual(r["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn('filename="finanzas_2025-01-01_2025-03-31_mes_caja.csv"', r["Content-Disposition"])
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0], ["fecha", "ingresos", "egresos", "ganancia"])
+        self.assertEqual([r[0] for r in rows[1:]], ["2025-01-01", "2025-02-01", "2025-03-01"])
+        self.assertEqual(Decimal(rows[1][2]), self.egreso)
+        self.assertEqual([Decimal(v) for v in rows[3][1:]], [Decimal("100.00"), 0, Decimal("100.00")])
+
+    def test_ndjson(self):
+        r, body = self._export("ndjson")
+
+        self.assertEqual(r["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([l["fecha"] for l in lines], ["2025-01-01", "2025-02-01", "2025-03-01"])
+        self.assertEqual(Decimal(lines[0]["egresos"]), self.egreso)
+        self.assertEqual((lines[2]["ingresos"], lines[2]["ganancia"]), ("100.00", "100.00"))
+
+    def test_export_matches_json_serie(self):
+        _, body = self._export("ndjson")
+        serie = self.client.get(f"{URL}?{RANGO}").json()["serie"]
+        self.assertEqual([json.loads(line) for line in body.splitlines()], serie)
+
+    def test_errors_are_json(self):
+        for fmt in ("csv", "ndjson"):
+            with self.subTest(fmt=fmt):
+                self._assert_json_error(f"desde=2025-01-01&format={fmt}")
+                self._assert_json_error(f"{RANGO}&criterio=otro&format={fmt}")
+                self._assert_json_error(f"{RANGO}&group_by=maquina&format={fmt}")
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import F
+from rest_framework.test import APITestCase
+
+from machinery.models import DailyFinanceLedger
+from machinery.purchases.availability import availability_index
+from machinery.purchases.services import UnitLifecycleService
+from machinery.reports.cache import report_cache
+from machinery.reports.ledger import FinanceLedgerService
+
+from . import factories
+
+URL = "/api/reports/finance/?desde=2025-01-01&hasta=2025-12-31"
+ALQUILER = dict(
+    inicio_year=2025,
+    inicio_month=2,
+    retorno_estimada_year=2025,
+    retorno_estimada_month=4,
+    monto_mensual=Decimal("100.00"),
+)
+
+
+class FinanceLedgerTests(APITestCase):
+    """daily_finance_ledger: lo que mueven los services coincide con recalcularlo desde las tablas originales."""
+
+    def setUp(self):
+        report_cache.clear()
+        availability_index.invalidate()
+        self.machines = factories.machines(2)
+        self.compras = [
+            factories.purchase(self.machines, cantidad=2, fecha_compra="2025-01-15"),
+            factories.purchase(self.machines[:1], cantidad=2, fecha_compra="2025-01-15"),
+        ]
+        a = factories.units(self.compras[0])
+        b = factories.units(self.compras[1])
+
+        # individual, en lote, devolución parcial de un alquiler compartido y ventas el mismo día
+        UnitLifecycleService.mark_rented(unit_id=a[0].id, **ALQUILER)
+        UnitLifecycleService.finish_rental(unit_id=a[0].id, retorno_real_year=2025, retorno_real_month=3)
+        UnitLifecycleService.mark_rented_many(unit_ids=[a[1].id, a[2].id, b[0].id], **ALQUILER)
+        UnitLifecycleService.finish_rental(unit_id=a[2].id, retorno_real_year=2025, retorno_real_month=3)
+        UnitLifecycleService.finish_rental_many(unit_ids=[a[1].id, b[0].id], retorno_real_year=2025, retorno_real_month=5)
+        UnitLifecycleService.mark_sold(unit_id=a[0].id, fecha_venta=date(2025, 6, 10), monto_total=Decimal("500.00"))
+        UnitLifecycleService.mark_sold_many(
+            unit_ids=[a[3].id, b[1].id], fecha_venta=date(2025, 6, 10), monto_total=Decimal("0.05")
+        )
+        # alquiler abierto: no suma hasta cerrarse
+        UnitLifecycleService.mark_rented(
+            unit_id=a[2].id, **dict(ALQUILER, inicio_month=7, retorno_estimada_month=9)
+        )
+
+    def _ledger(self) -> dict:
+        return {r.fecha: (r.ingresos, r.egresos) for r in DailyFinanceLedger.objects.all()}
+
+    def test_matches_source(self):
+        self.assertEqual(self._ledger(), FinanceLedgerService.source_days())
+        self.assertEqual(FinanceLedgerService.rebuild(fix=False), [])
+
+        egresos = sum(c.total_snapshot for c in self.compras)
+        self.assertEqual(
+            self._ledger(),
+            {
+                date(2025, 1, 15): (Decimal("0.00"), egresos),
+                # 2 meses x 100 + lo que devuelve la unidad del alquiler compartido
+                date(2025, 3, 1): (Decimal("400.00"), Decimal("0.00")),
+                # el resto del alquiler compartido: 4 meses x 200
+                date(2025, 5, 1): (Decimal("800.00"), Decimal("0.00")),
+                date(2025, 6, 10): (Decimal("500.05"), Decimal("0.00")),
+            },
+        )
+
+    def test_report_reads_the_ledger(self):
+        totales = self.client.get(URL).json()["totales"]
+        self.assertEqual(Decimal(totales["ingresos"]), Decimal("1700.05"))
+        self.assertEqual(Decimal(totales["egresos"]), sum(c.total_snapshot for c in self.compras))
+
+        # el reporte no vuelve a las tablas originales: si el ledger se desfasa, se ve
+        DailyFinanceLedger.objects.filter(fecha=date(2025, 6, 10)).update(ingresos=F("ingresos") + 1)
+        report_cache.clear()
+        self.assertEqual(Decimal(self.client.get(URL).json()["totales"]["ingresos"]), Decimal("1701.05"))
+
+    def test_source_days_range(self):
+        dias = FinanceLedgerService.source_days(desde=date(2025, 3, 1), hasta=date(2025, 5, 31))
+        self.assertEqual(sorted(dias), [date(2025, 3, 1), date(2025, 5, 1)])
+
+    def test_rebuild_fixes_drift(self):
+        DailyFinanceLedger.objects.filter(fecha=date(2025, 3, 1)).update(ingresos=F("ingresos") + 7)
+        DailyFinanceLedger.objects.filter(fecha=date(2025, 6, 10)).delete()
+        DailyFinanceLedger.objects.create(fecha=date(2025, 8, 1), ingresos=Decimal("3.00"))
+
+        out = StringIO()
+        call_command("rebuild_finance_ledger", "--check", stdout=out, stderr=StringIO())
+        self.assertIn("3 días desfasados", out.getvalue())
+        self.assertEqual(self._ledger()[date(2025, 3, 1)][0], Decimal("407.00"))
+
+        drift = FinanceLedgerService.rebuild()
+        self.assertEqual(
+            [(d.fecha, d.ingresos_ledger, d.ingresos_real) for d in drift],
+            [
+                (date(2025, 3, 1), Decimal("407.00"), Decimal("400.00")),
+                (date(2025, 6, 10), Decimal("0"), Decimal("500.05")),
+                (date(2025, 8, 1), Decimal("3.00"), Decimal("0")),
+            ],
+        )
+        self.assertEqual(self._ledger(), FinanceLedgerService.source_days())
+        self.assertEqual(FinanceLedgerService.rebuild(fix=False), [])
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from machinery.purchases.availability import availability_index
+from machinery.purchases.services import UnitLifecycleService
+from machinery.reports.ledger import FinanceLedgerService
+
+from . import factories
+
+DIA = date(2025, 3, 1)
+
+
+class FinanceSourceTests(TestCase):
+    """source_days: los tres agregados por día (ventas, alquileres cerrados, compras) en un solo UNION ALL."""
+
+    def setUp(self):
+        availability_index.invalidate()
+        machine = factories.machines(1)[0]
+        self.compras = [
+            factories.purchase([machine], cantidad=2, fecha_compra="2025-01-15"),
+            factories.purchase([machine], cantidad=2, fecha_compra="2025-03-01"),
+        ]
+        a, b = factories.units(self.compras[0])
+        c, d = factories.units(self.compras[1])
+
+        # el mismo día: una compra, una venta y el cierre de un alquiler (una fila por rama)
+        UnitLifecycleService.mark_rented(
+            unit_id=a.id,
+            inicio_year=2025,
+            inicio_month=2,
+            retorno_estimada_year=2025,
+            retorno_estimada_month=3,
+            monto_mensual=Decimal("100.00"),
+        )
+        UnitLifecycleService.finish_rental(unit_id=a.id, retorno_real_year=2025, retorno_real_month=3)
+        UnitLifecycleService.mark_sold(unit_id=b.id, fecha_venta=DIA, monto_total=Decimal("10.00"))
+        UnitLifecycleService.mark_sold(unit_id=c.id, fecha_venta=DIA, monto_total=Decimal("0.01"))
+        UnitLifecycleService.mark_sold(unit_id=d.id, fecha_venta=date(2025, 4, 30), monto_total=Decimal("5.00"))
+        # abierto: no es ingreso todavía
+        UnitLifecycleService.mark_rented(
+            unit_id=a.id,
+            inicio_year=2025,
+            inicio_month=4,
+            retorno_estimada_year=2025,
+            retorno_estimada_month=5,
+            monto_mensual=Decimal("100.00"),
+        )
+
+    def test_one_query(self):
+        with self.assertNumQueries(1):
+            dias = FinanceLedgerService.source_days()
+
+        self.assertEqual(
+            dias,
+            {
+                date(2025, 1, 15): (Decimal("0"), self.compras[0].total_snapshot),
+                # venta + venta + alquiler cerrado (2 meses) + compra, sumados en una sola fila
+                DIA: (Decimal("210.01"), self.compras[1].total_snapshot),
+                date(2025, 4, 30): (Decimal("5.00"), Decimal("0")),
+            },
+        )
+
+    def test_range(self):
+        with self.assertNumQueries(1):
+            dias = FinanceLedgerService.source_days(desde=DIA, hasta=date(2025, 4, 29))
+        self.assertEqual(list(dias), [DIA])
+
+    def test_query_is_ordered(self):
+        filas = list(FinanceLedgerService.source_query())
+        self.assertEqual([f[0] for f in filas], sorted(f[0] for f in filas))
+        # el día compartido viene en una fila por rama
+        self.assertEqual(sum(1 for f in filas if f[0] == DIA), 3)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import F
+from rest_framework.test import APITestCase
+
+from machinery.models import InventoryCounter, UnitStatus
+from machinery.purchases.availability import availability_index
+from machinery.purchases.counters import InventoryCounterService
+from machinery.purchases.services import UnitLifecycleService
+
+from . import factories
+
+ALQUILER = dict(
+    inicio_year=2025,
+    inicio_month=2,
+    retorno_estimada_year=2025,
+    retorno_estimada_month=4,
+    monto_mensual=Decimal("100.00"),
+)
+
+
+class InventoryCounterTests(APITestCase):
+    """Los contadores que mueven los services coinciden con un GROUP BY sobre purchased_unit."""
+
+    def setUp(self):
+        availability_index.invalidate()
+        self.machines = factories.machines(2)
+        a = factories.units(factories.purchase(self.machines[:1], cantidad=4))
+        b = factories.units(factories.purchase(self.machines, cantidad=2))
+
+        # un poco de todo: individual, en lote y devolución parcial de un alquiler compartido
+        UnitLifecycleService.mark_rented(unit_id=a[0].id, **ALQUILER)
+        UnitLifecycleService.finish_rental(unit_id=a[0].id, retorno_real_year=2025, retorno_real_month=3)
+        UnitLifecycleService.mark_sold(unit_id=a[0].id, fecha_venta=date(2025, 5, 1), monto_total=Decimal("1.00"))
+        UnitLifecycleService.mark_rented_many(unit_ids=[a[1].id, a[2].id, b[0].id], **ALQUILER)
+        UnitLifecycleService.finish_rental(unit_id=a[2].id, retorno_real_year=2025, retorno_real_month=3)
+        UnitLifecycleService.mark_sold_many(
+            unit_ids=[b[1].id, b[2].id], fecha_venta=date(2025, 5, 1), monto_total=Decimal("2.00")
+        )
+
+    def _summary(self) -> dict:
+        r = self.client.get("/api/units/summary/")
+        self.assertEqual(r.status_code, 200)
+        return r.json()
+
+    def test_counters_match_rebuild(self):
+        self.assertEqual(InventoryCounterService.rebuild(fix=False), [])
+
+        data = self._summary()
+        m0, m1 = self.machines
+        por_maquina = {m["machine_base"]: m for m in data["maquinas"]}
+        self.assertEqual(
+            {k: por_maquina[m0.id][k] for k in ("DEPOSITO", "ALQUILADA", "VENDIDA", "total")},
+            {"DEPOSITO": 2, "ALQUILADA": 2, "VENDIDA": 2, "total": 6},
+        )
+        self.assertEqual(
+            {k: por_maquina[m1.id][k] for k in ("DEPOSITO", "ALQUILADA", "VENDIDA", "total")},
+            {"DEPOSITO": 1, "ALQUILADA": 0, "VENDIDA": 1, "total": 2},
+        )
+        self.assertEqual(data["totales"]["total"], 8)
+
+    def test_summary_reads_only_the_counters(self):
+        with self.assertNumQueries(1):
+            self._summary()
+
+    def test_rebuild_fixes_drift(self):
+        machine = self.machines[0]
+        InventoryCounter.objects.filter(machine_base=machine, estado=UnitStatus.DEPOSITO).update(
+            cantidad=F("cantidad") + 5
+        )
+
+        out = StringIO()
+        call_command("rebuild_inventory_counters", "--check", stdout=out, stderr=StringIO())
+        self.assertIn("1 contadores desfasados", out.getvalue())
+        self.assertEqual(len(InventoryCounterService.rebuild(fix=False)), 1)
+
+        (drift,) = InventoryCounterService.rebuild()
+        self.assertEqual((drift.machine_base_id, drift.contador, drift.real), (machine.id, 7, 2))
+        self.assertEqual(InventoryCounterService.rebuild(fix=False), [])
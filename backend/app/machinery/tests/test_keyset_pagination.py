@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import date, timedelta
+from typing import List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from machinery.models import Budget, PurchasedUnit
+
+from . import factories
+
+PAGE_SIZE = 3
+
+
+def _cursor(link: Optional[str]) -> Optional[str]:
+    return parse_qs(urlparse(link).query)["cursor"][0] if link else None
+
+
+def _token(payload) -> str:
+    raw = json.dumps(payload).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+class KeysetPaginationTests(APITestCase):
+    """?cursor=: recorrer las páginas ida y vuelta devuelve el mismo orden que el listado."""
+
+    def setUp(self):
+        machines = factories.machines(2)
+        budgets = [factories.draft_budget(machines) for _ in range(7)]
+        units = factories.units(factories.purchase(machines, cantidad=4))
+
+        # empates en las claves del orden: desempata el id
+        now = timezone.now()
+        Budget.objects.filter(pk__in=[b.id for b in budgets[:4]]).update(fecha=date(2025, 1, 1), created_at=now)
+        Budget.objects.filter(pk__in=[b.id for b in budgets[4:]]).update(fecha=date(2025, 2, 1))
+        PurchasedUnit.objects.filter(pk__in=[u.id for u in units[:5]]).update(created_at=now)
+        PurchasedUnit.objects.filter(pk__in=[u.id for u in units[5:]]).update(created_at=now + timedelta(microseconds=1))
+
+    def _ids(self, data: dict) -> List[int]:
+        return [row["id"] for row in data["results"]]
+
+    def _page(self, url: str, cursor: str) -> dict:
+        r = self.client.get(url, {"cursor": cursor, "page_size": PAGE_SIZE})
+        self.assertEqual(r.status_code, 200, r.content)
+        return r.json()
+
+    def _assert_round_trip(self, url: str, total: int) -> None:
+        expected = self._ids(self.client.get(url, {"page_size": 100}).json())
+        self.assertEqual(len(expected), total)
+
+        # hacia adelante con next
+        pages, data, cursor = [], None, ""
+        while cursor is not None:
+            data = self._page(url, cursor)
+            pages.append(self._ids(data))
+            cursor = _cursor(data["next"])
+        self.assertEqual([i for p in pages for i in p], expected)
+        self.assertEqual(len(pages), -(-total // PAGE_SIZE))
+
+        # y de vuelta con previous desde la última página
+        back = [pages[-1]]
+        cursor = _cursor(data["previous"])
+        while cursor is not None:
+            data = self._page(url, cursor)
+            back.append(self._ids(data))
+            cursor = _cursor(data["previous"])
+        self.assertEqual(back[::-1], pages)
+        # la primera página vuelve a ofrecer next
+        self.assertIsNotNone(data["next"])
+
+    def test_budgets_round_trip(self):
+        self._assert_round_trip("/api/budgets/", 8)  # 7 + el de la compra
+
+    def test_units_round_trip(self):
+        self._assert_round_trip("/api/units/", 8)
+
+    def test_filters_apply(self):
+        data = self._page("/api/budgets/?estado=DRAFT", "")
+        self.assertEqual(len(data["results"]), PAGE_SIZE)
+        self.assertNotIn("count", data)
+
+    def test_invalid_cursor(self):
+        invalidos = {
+            "basura": "%%%no-base64",
+            "no es json": base64.urlsafe_b64encode(b"hola").decode(),
+            "sin claves": _token({"x": 1}),
+            "menos valores": _token({"v": ["2025-01-01"], "r": 0}),
+            "fecha inválida": _token({"v": ["no-fecha", "2025-01-01T00:00:00", 1], "r": 0}),
+            "valor nulo": _token({"v": ["2025-01-01", None, 1], "r": 0}),
+        }
+        for caso, token in invalidos.items():
+            for url in ("/api/budgets/", "/api/units/"):
+                with self.subTest(caso=caso, url=url):
+                    r = self.client.get(url, {"cursor": token})
+                    self.assertEqual(r.status_code, 400)
+                    self.assertEqual(r.json()["error"]["code"], "VALIDATION_ERROR")
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+
+from machinery.purchases.availability import availability_index
+from machinery.purchases.overdue import iter_overdue
+from machinery.purchases.services import UnitLifecycleService
+
+from . import factories
+
+HOY = date(2025, 6, 10)
+
+
+class OverdueRentalTests(APITestCase):
+    """Alquileres vencidos: abiertos y con retorno estimado anterior al mes actual, una fila por unidad."""
+
+    def setUp(self):
+        availability_index.invalidate()
+        self.machines = factories.machines(2)
+        a = factories.units(factories.purchase(self.machines[:1], cantidad=4))
+        (b,) = factories.units(factories.purchase(self.machines[1:], cantidad=1))
+
+        # vencido hace 3 meses, compartido por dos unidades
+        self.compartido, _ = UnitLifecycleService.mark_rented_many(
+            unit_ids=[a[0].id, a[1].id], **self._fechas(2024, 12, 2025, 3), monto_mensual=Decimal("100.00")
+        )
+        # vencido hace 1 mes, otra máquina
+        self.reciente = self._rent(b.id, 2025, 2, 2025, 5)
+        # vence este mes: todavía no está vencido
+        self._rent(a[2].id, 2025, 4, 2025, 6)
+        # vencido pero ya devuelto
+        self._rent(a[3].id, 2024, 1, 2024, 2)
+        UnitLifecycleService.finish_rental(unit_id=a[3].id, retorno_real_year=2024, retorno_real_month=4)
+        self.units = (a, b)
+
+    @staticmethod
+    def _fechas(y0: int, m0: int, y1: int, m1: int) -> dict:
+        return dict(inicio_year=y0, inicio_month=m0, retorno_estimada_year=y1, retorno_estimada_month=m1)
+
+    def _rent(self, unit_id: int, y0: int, m0: int, y1: int, m1: int):
+        unit = UnitLifecycleService.mark_rented(
+            unit_id=unit_id, **self._fechas(y0, m0, y1, m1), monto_mensual=Decimal("50.00")
+        )
+        return unit.alquiler_activo
+
+    def test_rows(self):
+        a, b = self.units
+        rows = list(iter_overdue(hoy=HOY))
+
+        # del más atrasado al menos atrasado, una fila por unidad
+        self.assertEqual(
+            [(r["revenue_event_id"], r["unit_id"], r["meses_vencido"]) for r in rows],
+            [
+                (self.compartido.id, a[0].id, 3),
+                (self.compartido.id, a[1].id, 3),
+                (self.reciente.id, b.id, 1),
+            ],
+        )
+        self.assertEqual(
+            {k: rows[-1][k] for k in ("identificador", "machine_base", "fecha_retorno_estimada", "monto_mensual")},
+            {
+                "identificador": b.identificador,
+                "machine_base": self.machines[1].id,
+                "fecha_retorno_estimada": date(2025, 5, 1),
+                "monto_mensual": "50.00",
+            },
+        )
+
+    def test_filter_by_machine(self):
+        rows = list(iter_overdue(hoy=HOY, machine_base_id=self.machines[1].id))
+        self.assertEqual([r["revenue_event_id"] for r in rows], [self.reciente.id])
+
+    def test_finished_rental_leaves_the_feed(self):
+        a, _ = self.units
+        UnitLifecycleService.finish_rental(unit_id=a[0].id, retorno_real_year=2025, retorno_real_month=6)
+        self.assertEqual([r["unit_id"] for r in iter_overdue(hoy=HOY)], [a[1].id, self.units[1].id])
+
+    def test_ndjson_endpoint(self):
+        # la vista usa la fecha de hoy: todo lo de arriba ya está vencido salvo lo devuelto
+        r = self.client.get("/api/units/overdue/", {"machine_base": self.machines[0].id})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r["Content-Type"], "application/x-ndjson")
+
+        lines = b"".join(r.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        a, _ = self.units
+        self.assertEqual([x["unit_id"] for x in rows], [a[0].id, a[1].id, a[2].id])
+        self.assertEqual(rows[0]["fecha_retorno_estimada"], "2025-03-01")
+        # el evento compartido guarda el mensual de las dos unidades
+        self.assertEqual(rows[0]["monto_mensual"], "200.00")
+
+    def test_invalid_machine_base(self):
+        r = self.client.get("/api/units/overdue/", {"machine_base": "x"})
+        self.assertEqual(r.status_code, 400)
+
+    def test_command(self):
+        out = StringIO()
+        call_command("overdue_rentals", "--ndjson", "--machine-base", str(self.machines[1].id), stdout=out)
+        (line,) = out.getvalue().splitlines()
+        self.assertEqual(json.loads(line)["revenue_event_id"], self.reciente.id)
+
+        out = StringIO()
+        call_command("overdue_rentals", stdout=out)
+        self.assertIn("4 unidades con alquiler vencido.", out.getvalue())
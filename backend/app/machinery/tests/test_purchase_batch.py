@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from datetime import date
+
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from machinery.models import Budget, BudgetStatus, DailyFinanceLedger, Purchase, PurchasedUnit
+from machinery.purchases.availability import availability_index
+
+from . import factories
+
+URL = "/api/budgets/purchase-batch/"
+
+
+class PurchaseBatchTests(APITestCase):
+    """POST /api/budgets/purchase-batch/: todo o nada, con defaults por lote."""
+
+    def setUp(self):
+        availability_index.invalidate()
+        self.machines = factories.machines(2)
+        self.budgets = [factories.draft_budget(self.machines, cantidad=i + 1) for i in range(3)]
+
+    def _post(self, body: dict):
+        return self.client.post(URL, body, format="json")
+
+    def test_purchases_all(self):
+        a, b, c = self.budgets
+        r = self._post(
+            {
+                "fecha_compra": "2025-06-30",
+                "notas": "cierre de junio",
+                "compras": [
+                    {"budget_id": c.id},
+                    {"budget_id": a.id, "fecha_compra": "2025-06-15"},
+                    {"budget_id": b.id, "notas": ""},
+                ],
+            }
+        )
+        self.assertEqual(r.status_code, 201, r.content)
+
+        compras = {x["budget_id"]: x for x in r.json()["compras"]}
+        self.assertEqual({i: x["unidades"] for i, x in compras.items()}, {a.id: 2, b.id: 4, c.id: 6})
+        self.assertEqual(compras[a.id]["fecha_compra"], "2025-06-15")
+
+        purchases = {p.budget_id: p for p in Purchase.objects.all()}
+        self.assertEqual(
+            {i: (p.fecha_compra, p.notas) for i, p in purchases.items()},
+            {
+                a.id: (date(2025, 6, 15), "cierre de junio"),
+                b.id: (date(2025, 6, 30), ""),
+                c.id: (date(2025, 6, 30), "cierre de junio"),
+            },
+        )
+        self.assertEqual(PurchasedUnit.objects.count(), 12)
+        self.assertFalse(Budget.objects.filter(estado=BudgetStatus.DRAFT).exists())
+
+        # egresos en el ledger = total de las compras de ese día
+        for fecha in (date(2025, 6, 15), date(2025, 6, 30)):
+            total = Purchase.objects.filter(fecha_compra=fecha).aggregate(t=Sum("total_snapshot"))["t"]
+            self.assertEqual(DailyFinanceLedger.objects.get(fecha=fecha).egresos, total)
+
+    def test_conflict_writes_nothing(self):
+        a, b, c = self.budgets
+        factories.purchase(self.machines)  # otra compra previa, fuera del lote
+        Budget.objects.filter(pk=b.id).update(estado=BudgetStatus.CERRADO)
+        antes = (Purchase.objects.count(), PurchasedUnit.objects.count(), DailyFinanceLedger.objects.count())
+
+        r = self._post({"compras": [{"budget_id": a.id}, {"budget_id": b.id}, {"budget_id": c.id}]})
+        self.assertEqual(r.status_code, 409)
+        errores = r.json()["error"]["details"]["errores"]
+        self.assertEqual([(e["budget_id"], e["estado_actual"]) for e in errores], [(b.id, BudgetStatus.CERRADO)])
+
+        self.assertEqual((Purchase.objects.count(), PurchasedUnit.objects.count(), DailyFinanceLedger.objects.count()), antes)
+        self.assertEqual(Budget.objects.get(pk=a.id).estado, BudgetStatus.DRAFT)
+
+    def test_already_purchased(self):
+        purchase = factories.purchase(self.machines)
+        r = self._post({"compras": [{"budget_id": self.budgets[0].id}, {"budget_id": purchase.budget_id}]})
+        self.assertEqual(r.status_code, 409)
+        # el presupuesto comprado ya no es DRAFT: se informa su estado
+        self.assertEqual(r.json()["error"]["details"]["errores"][0]["budget_id"], purchase.budget_id)
+
+    def test_missing_and_repeated(self):
+        r = self._post({"compras": [{"budget_id": self.budgets[0].id}, {"budget_id": 999999}]})
+        self.assertEqual(r.status_code, 404)
+        self.assertEqual(r.json()["error"]["details"], {"budget_ids": [999999]})
+
+        r = self._post({"compras": [{"budget_id": self.budgets[0].id}, {"budget_id": self.budgets[0].id}]})
+        self.assertEqual(r.status_code, 400)
+        self.assertFalse(Purchase.objects.exists())
+
+    def test_queries_do_not_depend_on_batch_size(self):
+        # la primera escritura crea las filas de versión; la dejamos fuera de la medición
+        factories.purchase(self.machines)
+        mas = [factories.draft_budget(self.machines, cantidad=5) for _ in range(5)]
+
+        with CaptureQueriesContext(connection) as uno:
+            self.assertEqual(self._post({"compras": [{"budget_id": self.budgets[0].id}]}).status_code, 201)
+        with CaptureQueriesContext(connection) as siete:
+            body = {"compras": [{"budget_id": b.id} for b in [*self.budgets[1:], *mas]]}
+            self.assertEqual(self._post(body).status_code, 201)
+
+        self.assertEqual(len(siete), len(uno))
+        self.assertEqual(Purchase.objects.count(), 1 + 1 + 7)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from machinery.models import BudgetStatus, DailyFinanceLedger, InventoryCounter, Purchase, PurchasedUnit, UnitStatus
+from machinery.purchases.availability import availability_index
+
+from . import factories
+
+
+class PurchaseUnitsTests(APITestCase):
+    """POST /api/budgets/{id}/purchase/: una unidad por item x cantidad, con bulk insert."""
+
+    def setUp(self):
+        availability_index.invalidate()
+        self.machines = factories.machines(2)
+
+    def _purchase(self, budget_id: int) -> Purchase:
+        r = self.client.post(f"/api/budgets/{budget_id}/purchase/", {"fecha_compra": "2025-04-02"}, format="json")
+        self.assertEqual(r.status_code, 201, r.content)
+        return Purchase.objects.select_related("budget").get(pk=r.json()["purchase_id"])
+
+    def test_units(self):
+        budget = factories.draft_budget(self.machines, cantidad=3)
+        purchase = self._purchase(budget.id)
+
+        units = list(PurchasedUnit.objects.filter(purchase=purchase))
+        self.assertEqual(Counter(u.machine_base_id for u in units), {m.id: 3 for m in self.machines})
+        for u in units:
+            self.assertEqual(u.estado, UnitStatus.DEPOSITO)
+            # columnas del read model ya cargadas en el insert
+            self.assertEqual(
+                (u.fecha_compra, u.budget_numero, u.machine_nombre, u.total_compra),
+                (date(2025, 4, 2), budget.numero, u.machine_base.nombre, purchase.total_snapshot),
+            )
+            self.assertEqual(u.budget_item.machine_base_id, u.machine_base_id)
+
+        self.assertEqual(purchase.budget.estado, BudgetStatus.CERRADO)
+        counters = InventoryCounter.objects.filter(estado=UnitStatus.DEPOSITO).values_list("machine_base_id", "cantidad")
+        self.assertEqual(dict(counters), {m.id: 3 for m in self.machines})
+        self.assertEqual(DailyFinanceLedger.objects.get(fecha=date(2025, 4, 2)).egresos, purchase.total_snapshot)
+
+    def test_queries_do_not_depend_on_quantity(self):
+        # la primera escritura crea las filas de versión; la dejamos fuera de la medición
+        self._purchase(factories.draft_budget(self.machines).id)
+        chico = factories.draft_budget(self.machines, cantidad=1)
+        grande = factories.draft_budget(self.machines, cantidad=20)
+
+        with CaptureQueriesContext(connection) as q1:
+            self._purchase(chico.id)
+        with CaptureQueriesContext(connection) as q20:
+            self._purchase(grande.id)
+
+        self.assertEqual(len(q20), len(q1))
+        self.assertEqual(PurchasedUnit.objects.count(), 2 + 2 + 40)
+
+    def test_second_purchase_conflicts(self):
+        budget = factories.draft_budget(self.machines)
+        self._purchase(budget.id)
+
+        r = self.client.post(f"/api/budgets/{budget.id}/purchase/", {}, format="json")
+        self.assertEqual(r.status_code, 409)
+        self.assertEqual(PurchasedUnit.objects.count(), 2)
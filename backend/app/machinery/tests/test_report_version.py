@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from machinery.purchases.availability import availability_index
+from machinery.purchases.services import UnitLifecycleService
+from machinery.reports.cache import bump_data_version, data_version, data_version_batch
+
+from . import factories
+
+ALQUILER = dict(
+    inicio_year=2030,
+    inicio_month=1,
+    retorno_estimada_year=2030,
+    retorno_estimada_month=3,
+    monto_mensual=Decimal("100.00"),
+)
+
+
+class ReportDataVersionTests(TestCase):
+    """Cada transacción que cambia el reporte sube la versión exactamente una vez."""
+
+    def setUp(self):
+        availability_index.invalidate()
+        self.machine = factories.machines(1)[0]
+        self.ids = [u.id for u in factories.units(factories.purchase([self.machine], cantidad=3))]
+
+    def _assert_one_bump(self, fn):
+        antes = data_version()
+        fn()
+        self.assertEqual(data_version(), antes + 1)
+
+    def test_purchase(self):
+        self._assert_one_bump(lambda: factories.purchase([self.machine]))
+
+    def test_single_lifecycle(self):
+        unit_id = self.ids[0]
+        self._assert_one_bump(lambda: UnitLifecycleService.mark_rented(unit_id=unit_id, **ALQUILER))
+        self._assert_one_bump(
+            lambda: UnitLifecycleService.finish_rental(unit_id=unit_id, retorno_real_year=2030, retorno_real_month=2)
+        )
+        self._assert_one_bump(
+            lambda: UnitLifecycleService.mark_sold(unit_id=unit_id, fecha_venta=date(2030, 5, 1), monto_total=Decimal("1.00"))
+        )
+
+    def test_bulk_lifecycle(self):
+        self._assert_one_bump(lambda: UnitLifecycleService.mark_rented_many(unit_ids=self.ids, **ALQUILER))
+        # devolución parcial: separa el evento y cierra el nuevo en la misma transacción
+        self._assert_one_bump(
+            lambda: UnitLifecycleService.finish_rental_many(
+                unit_ids=self.ids[:2], retorno_real_year=2030, retorno_real_month=2
+            )
+        )
+        self._assert_one_bump(
+            lambda: UnitLifecycleService.mark_sold_many(
+                unit_ids=self.ids[:2], fecha_venta=date(2030, 5, 1), monto_total=Decimal("1.00")
+            )
+        )
+
+    def test_nested_batch_bumps_once(self):
+        def varias():
+            with data_version_batch():
+                UnitLifecycleService.mark_rented(unit_id=self.ids[0], **ALQUILER)
+                UnitLifecycleService.mark_sold(
+                    unit_id=self.ids[1], fecha_venta=date(2030, 5, 1), monto_total=Decimal("1.00")
+                )
+
+        self._assert_one_bump(varias)
+
+    def test_failed_batch_does_not_bump(self):
+        antes = data_version()
+        with self.assertRaises(ValueError):
+            with data_version_batch():
+                bump_data_version()
+                raise ValueError
+        self.assertEqual(data_version(), antes)
+        # el bloque fallido no deja estado colgado
+        self._assert_one_bump(bump_data_version)
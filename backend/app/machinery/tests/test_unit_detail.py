@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+from rest_framework.test import APITestCase
+
+from machinery.budgets.repositories import BudgetRepository
+from machinery.budgets.services import BudgetService
+from machinery.models import Accessory
+from machinery.purchases.availability import availability_index
+from machinery.purchases.services import PurchaseService, UnitLifecycleService
+
+from . import factories
+
+# GET /api/units/{id}/: unidad (+ compra por join) + revenue_usos (con su evento) + budget_item + accesorios
+DETAIL_QUERIES = 4
+
+
+class UnitDetailTests(APITestCase):
+    """Detalle de unidad armado con prefetch: venta, alquileres y accesorios sin queries por fila."""
+
+    def setUp(self):
+        availability_index.invalidate()
+        machine = factories.machines(1)[0]
+        accesorios = [Accessory.objects.create(nombre=n, total=Decimal("10.00")) for n in ("Zeta", "Alfa")]
+        payload = factories.budget_payload([machine], cantidad=2)
+        payload["items"][0]["accesorios"] = [{"accessory_id": a.id, "cantidad": 1} for a in accesorios]
+
+        service = BudgetService(repo=BudgetRepository())
+        budget = service.create_from_payload(payload)
+        purchase = service.purchase_from_draft(
+            budget_id=budget.id, fecha_compra="2025-01-15", notas="compra", purchase_service=PurchaseService()
+        )
+        self.unit, self.other = factories.units(purchase)
+
+    def _rent(self, unit_id: int, start: int, end: int) -> None:
+        UnitLifecycleService.mark_rented(
+            unit_id=unit_id,
+            inicio_year=2025,
+            inicio_month=start,
+            retorno_estimada_year=2025,
+            retorno_estimada_month=end,
+            monto_mensual=Decimal("100.00"),
+        )
+        UnitLifecycleService.finish_rental(unit_id=unit_id, retorno_real_year=2025, retorno_real_month=end)
+
+    def _detail(self, unit_id: int, **params) -> dict:
+        r = self.client.get(f"/api/units/{unit_id}/", params)
+        self.assertEqual(r.status_code, 200, r.content)
+        return r.json()
+
+    def test_history(self):
+        self._rent(self.unit.id, 2, 3)
+        self._rent(self.unit.id, 5, 7)
+        UnitLifecycleService.mark_sold(unit_id=self.unit.id, fecha_venta=date(2025, 9, 1), monto_total=Decimal("900.00"))
+
+        data = self._detail(self.unit.id)
+        self.assertEqual(data["notas_compra"], "compra")
+        self.assertEqual([a["accessory_nombre"] for a in data["accesorios"]], ["Alfa", "Zeta"])
+        self.assertEqual((data["venta"]["monto_total"], data["venta"]["fecha"]), ("900.00", "2025-09-01"))
+        # del más reciente al más viejo
+        self.assertEqual(
+            [(a["inicio_month"], a["retorno_real_month"], a["monto_total"]) for a in data["alquileres"]],
+            [(5, 7, "300.00"), (2, 3, "200.00")],
+        )
+
+    def test_queries_do_not_depend_on_history(self):
+        for start in (1, 3, 5, 7):
+            self._rent(self.unit.id, start, start + 1)
+
+        with self.assertNumQueries(DETAIL_QUERIES):
+            self._detail(self.other.id)
+        with self.assertNumQueries(DETAIL_QUERIES):
+            self.assertEqual(len(self._detail(self.unit.id)["alquileres"]), 4)
+
+    def test_sparse_fields_skip_prefetch(self):
+        with self.assertNumQueries(1):
+            data = self._detail(self.unit.id, fields="id,estado,machine_nombre")
+        self.assertEqual(set(data), {"id", "estado", "machine_nombre"})
+
+    def test_lifecycle_response_is_the_detail(self):
+        r = self.client.post(
+            f"/api/units/{self.unit.id}/mark-rented/",
+            {
+                "inicio_year": 2025,
+                "inicio_month": 2,
+                "retorno_estimada_year": 2025,
+                "retorno_estimada_month": 4,
+                "monto_mensual": "50.00",
+            },
+            format="json",
+        )
+        self.assertEqual(r.status_code, 200, r.content)
+        self.assertEqual(r.json(), self._detail(self.unit.id))
+        self.assertEqual(r.json()["alquileres"][0]["monto_total"], "150.00")